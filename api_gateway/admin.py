@@ -0,0 +1,69 @@
+"""
+admin.py - Operator endpoints: model versions and hot reloads.
+
+Every route requires the ``X-Admin-Token`` header to match ADMIN_TOKEN. The
+routes are disabled (403) while ADMIN_TOKEN is unset.
+"""
+from datetime import datetime
+from typing import List, Optional
+import hmac
+import os
+
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from pydantic import BaseModel
+
+from shared.model_registry import ReloadInProgress, registry
+
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+router = APIRouter(prefix="/api/admin", tags=["Admin"])
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    if not ADMIN_TOKEN or not hmac.compare_digest(x_admin_token or "", ADMIN_TOKEN):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
+
+
+class ModelStatus(BaseModel):
+    name: str
+    version: Optional[str] = None
+    source: Optional[str] = None
+    loaded_at: Optional[datetime] = None
+    load_seconds: Optional[float] = None
+    warmup_seconds: Optional[float] = None
+    loading: Optional[str] = None
+    last_error: Optional[str] = None
+    previous_version: Optional[str] = None
+    previous_released: Optional[bool] = None
+
+
+class ModelsResponse(BaseModel):
+    pid: int
+    models: List[ModelStatus]
+
+
+class ReloadRequest(BaseModel):
+    source: Optional[str] = None  # artifact path; None reloads the default one
+
+
+@router.get("/models", response_model=ModelsResponse, dependencies=[Depends(require_admin)])
+def list_models():
+    """Live version, load and warmup durations of every model in this worker"""
+    return {"pid": os.getpid(), "models": registry.status()}
+
+
+@router.post(
+    "/models/{name}/reload",
+    response_model=ModelStatus,
+    status_code=status.HTTP_202_ACCEPTED,
+    dependencies=[Depends(require_admin)],
+)
+def reload_model(name: str, request: ReloadRequest):
+    """Load and warm a new version in the background; it replaces the live one once ready"""
+    try:
+        registry.request(name, request.source)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown model: {name}")
+    except ReloadInProgress as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return registry.slot(name).status()
@@ -4,31 +4,80 @@ from pathlib import Path
 # Add the project root to Python path
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
+import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from database.database import Base, engine
+from database.schema_upgrades import upgrade_schema
+from api_gateway.workers import PeriodicWorker
+from api_gateway.rate_limit import RateLimitMiddleware
+from api_gateway.admin import router as admin_router
+from shared.model_registry import registry
 
 from services.wallet_service.router import router as wallet_router
 from services.auth_service.router import router as auth_router
 from services.bill_service.router import router as bill_router
 from services.sms_parser_service.router import router as sms_parser_router
 from services.cash_flow_forcast_service.router import router as cashflow_router
-#from services.ETF_Recommendation.router import router as etf_router
+from services.export_service.router import router as export_router
+from services.wallet_service.ledger import ledger_maintenance_job
+from services.wallet_service.webhooks import stripe_events_job
+from services.wallet_service.stripe_client import close_stripe_client
+from services.auth_service.user_cache import user_cache_job
+from services.cash_flow_forcast_service.batch import forecast_job
+from services.ETF_Recommendation.etf_advisor_engine import refresh_prices
+from services.ETF_Recommendation.router import router as etf_router
+
+# Background jobs (seconds between runs, 0 disables)
+LEDGER_WORKER_INTERVAL = float(os.getenv("LEDGER_WORKER_INTERVAL", "300"))
+STRIPE_EVENTS_INTERVAL = float(os.getenv("STRIPE_EVENTS_INTERVAL", "2"))
+USER_CACHE_REFRESH_INTERVAL = float(os.getenv("USER_CACHE_REFRESH_INTERVAL", "5"))
+# The job itself waits for FORECAST_RUN_HOUR and skips dates already finished
+FORECAST_JOB_INTERVAL = float(os.getenv("FORECAST_JOB_INTERVAL", "3600"))
+ETF_PRICE_REFRESH_INTERVAL = float(os.getenv("ETF_PRICE_REFRESH_INTERVAL", "21600"))
+# Follow model reloads requested through another worker
+MODEL_SYNC_INTERVAL = float(os.getenv("MODEL_SYNC_INTERVAL", "10"))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    workers = [
+        PeriodicWorker("ledger-maintenance", ledger_maintenance_job, LEDGER_WORKER_INTERVAL),
+        PeriodicWorker("stripe-events", stripe_events_job, STRIPE_EVENTS_INTERVAL),
+        PeriodicWorker("user-cache", user_cache_job, USER_CACHE_REFRESH_INTERVAL),
+        PeriodicWorker("nightly-forecast", forecast_job, FORECAST_JOB_INTERVAL),
+        PeriodicWorker("etf-prices", refresh_prices, ETF_PRICE_REFRESH_INTERVAL),
+        PeriodicWorker("model-sync", registry.sync, MODEL_SYNC_INTERVAL),
+    ]
+    for worker in workers:
+        worker.start()
+    yield
+    for worker in workers:
+        worker.stop()
+    await close_stripe_client()
+
 
 app = FastAPI(
     title="BillWise App Backend",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
 Base.metadata.create_all(bind=engine)
+upgrade_schema(engine)  # create_all never alters tables that already exist
 
 app.include_router(auth_router)
 app.include_router(wallet_router)
 app.include_router(bill_router)
 app.include_router(sms_parser_router)
 app.include_router(cashflow_router)
-#app.include_router(etf_router)
+app.include_router(export_router)
+app.include_router(etf_router)
+app.include_router(admin_router)
 
+# Throttle password endpoints before any argon2 work; CORS stays outermost so 429s carry its headers
+app.add_middleware(RateLimitMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
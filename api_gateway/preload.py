@@ -0,0 +1,45 @@
+"""
+preload.py - Load the heavy read-only artifacts once in the gunicorn master.
+
+With ``preload_app`` the master imports the app, which loads the spaCy parser.
+It then calls ``preload`` before forking. Every worker therefore starts with
+the parser, the ETF model, prices and features already in memory, and shares
+those pages copy-on-write instead of loading its own copy.
+
+``gc.freeze`` moves everything loaded so far into the permanent generation.
+Otherwise the first collection in each worker writes to every object header
+and un-shares the pages. Connections opened while importing are dropped, so
+no worker inherits a socket that another process is using.
+"""
+import gc
+import logging
+import os
+
+from database.database import engine
+
+logger = logging.getLogger(__name__)
+
+PRELOAD_ETF = os.getenv("PRELOAD_ETF", "1") == "1"
+
+
+def preload():
+    """Master, before the first fork: load models and freeze the heap"""
+    from services.sms_parser_service.nlp_processor import SMSParser
+    from services.ETF_Recommendation.etf_advisor_engine import get_state
+
+    SMSParser()
+    if PRELOAD_ETF:
+        try:
+            get_state()
+        except Exception as e:
+            # Workers fall back to loading it on first use
+            logger.error(f" ETF preload failed: {str(e)}")
+
+    engine.dispose()
+    gc.freeze()
+    logger.info(f" Preloaded models, {gc.get_freeze_count()} objects frozen")
+
+
+def after_fork():
+    """Worker, right after the fork: never reuse the master's pooled connections"""
+    engine.dispose(close=False)
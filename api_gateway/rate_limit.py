@@ -0,0 +1,249 @@
+"""
+rate_limit.py - Token-bucket throttling for the password endpoints.
+
+Every login/register costs an argon2 hash, so a credential-stuffing burst is a
+CPU exhaustion attack on the whole gateway. ``RateLimitMiddleware`` is a plain
+ASGI middleware that rejects excess requests with 429 before the route (and
+its password work) runs: first per client IP, then per email read from the
+buffered JSON body, which is replayed to the app unchanged. Each check is O(1):
+one bucket read and write, in process (single worker) or in Redis
+(``RATE_LIMIT_BACKEND=redis``, the default when ``WEB_CONCURRENCY`` is above 1)
+so all workers share the same budget.
+"""
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Iterable, Optional, Tuple
+import json
+import logging
+import math
+import os
+import threading
+import time
+
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+# Per-process buckets would multiply the budget by the number of workers
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "redis" if WEB_CONCURRENCY > 1 else "memory")
+RATE_LIMIT_IP_PER_MINUTE = float(os.getenv("RATE_LIMIT_IP_PER_MINUTE", "20"))
+RATE_LIMIT_EMAIL_PER_MINUTE = float(os.getenv("RATE_LIMIT_EMAIL_PER_MINUTE", "5"))
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+# Behind a proxy (e.g. Heroku router) the client address is the last X-Forwarded-For hop
+RATE_LIMIT_TRUST_PROXY = os.getenv("RATE_LIMIT_TRUST_PROXY", "0") == "1"
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+AUTH_RATE_LIMITED_PATHS = ("/api/auth/login", "/api/auth/register")
+MAX_BUFFERED_BODY = 64 * 1024  # auth payloads are tiny; larger bodies skip the email check
+
+
+class TokenBucketLimiter(ABC):
+    """`capacity` requests at once, refilled at `capacity` per `period` seconds"""
+
+    blocking = False  # hit() does network I/O and must not run on the event loop
+
+    def __init__(self, capacity: float, period: float = 60.0):
+        self.capacity = capacity
+        self.rate = capacity / period
+
+    @abstractmethod
+    def hit(self, key: str) -> Tuple[bool, float]:
+        """Take one token; returns (allowed, seconds until a token is available)"""
+
+
+class InProcessLimiter(TokenBucketLimiter):
+    """Buckets in a bounded LRU, local to one worker process"""
+
+    def __init__(
+        self,
+        capacity: float,
+        period: float = 60.0,
+        maxsize: int = RATE_LIMIT_MAX_KEYS,
+        clock=time.monotonic,
+    ):
+        super().__init__(capacity, period)
+        self.maxsize = maxsize
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()  # key -> (tokens, updated_at)
+
+    def hit(self, key: str) -> Tuple[bool, float]:
+        now = self.clock()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - updated_at) * self.rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            if len(self._buckets) > self.maxsize:
+                # Evicting a bucket only forgets a client's debt, never over-throttles
+                self._buckets.popitem(last=False)
+        return allowed, 0.0 if allowed else (1 - tokens) / self.rate
+
+
+# KEYS[1] bucket hash; ARGV: capacity, rate per ms, now ms, ttl ms
+_TAKE_TOKEN = """
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], ARGV[4])
+return {allowed, tostring(tokens)}
+"""
+
+
+class RedisLimiter(TokenBucketLimiter):
+    """Buckets in Redis shared by every worker; errors fail open"""
+
+    blocking = True
+
+    def __init__(self, capacity: float, period: float = 60.0, url: str = REDIS_URL, client=None):
+        super().__init__(capacity, period)
+        if client is None:
+            import redis
+
+            client = redis.Redis.from_url(url, socket_timeout=0.2, socket_connect_timeout=0.2)
+        self._redis = client
+        self._take = client.register_script(_TAKE_TOKEN)
+        # A bucket left alone this long is full again, so it can expire
+        self.ttl_ms = int(math.ceil(capacity / self.rate * 1000))
+
+    def hit(self, key: str) -> Tuple[bool, float]:
+        try:
+            allowed, tokens = self._take(
+                keys=[f"ratelimit:{key}"],
+                args=[self.capacity, self.rate / 1000, int(time.time() * 1000), self.ttl_ms],
+            )
+        except Exception as e:
+            logger.warning(f" Rate limiter unavailable, allowing request: {str(e)}")
+            return True, 0.0
+        if allowed:
+            return True, 0.0
+        return False, (1 - float(tokens)) / self.rate
+
+
+def create_limiter(capacity: float, backend: str = RATE_LIMIT_BACKEND) -> TokenBucketLimiter:
+    if backend == "redis":
+        return RedisLimiter(capacity)
+    return InProcessLimiter(capacity)
+
+
+class RateLimitMiddleware:
+    """Per-IP and per-email token buckets in front of selected POST routes"""
+
+    def __init__(
+        self,
+        app,
+        paths: Iterable[str] = AUTH_RATE_LIMITED_PATHS,
+        ip_limiter: Optional[TokenBucketLimiter] = None,
+        email_limiter: Optional[TokenBucketLimiter] = None,
+        trust_proxy: bool = RATE_LIMIT_TRUST_PROXY,
+    ):
+        self.app = app
+        self.paths = frozenset(paths)
+        self.ip_limiter = ip_limiter or create_limiter(RATE_LIMIT_IP_PER_MINUTE)
+        self.email_limiter = email_limiter or create_limiter(RATE_LIMIT_EMAIL_PER_MINUTE)
+        self.trust_proxy = trust_proxy
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        allowed, retry_after = await self._hit(
+            self.ip_limiter, f"ip:{scope['path']}:{self._client_ip(scope)}"
+        )
+        if not allowed:
+            await self._reject(send, retry_after)
+            return
+
+        messages, body = await self._buffer_body(receive)
+        email = self._email(body)
+        if email is not None:
+            allowed, retry_after = await self._hit(
+                self.email_limiter, f"email:{scope['path']}:{email}"
+            )
+            if not allowed:
+                await self._reject(send, retry_after)
+                return
+
+        await self.app(scope, self._replay(messages, receive), send)
+
+    @staticmethod
+    async def _hit(limiter: TokenBucketLimiter, key: str) -> Tuple[bool, float]:
+        if limiter.blocking:
+            return await run_in_threadpool(limiter.hit, key)
+        return limiter.hit(key)
+
+    def _client_ip(self, scope) -> str:
+        if self.trust_proxy:
+            for name, value in scope.get("headers", ()):
+                if name == b"x-forwarded-for":
+                    return value.decode("latin-1").rsplit(",", 1)[-1].strip()
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    @staticmethod
+    async def _buffer_body(receive):
+        messages, chunks, size = [], [], 0
+        while True:
+            message = await receive()
+            messages.append(message)
+            if message["type"] != "http.request":
+                return messages, None
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if size > MAX_BUFFERED_BODY:
+                return messages, None
+            chunks.append(chunk)
+            if not message.get("more_body", False):
+                return messages, b"".join(chunks)
+
+    @staticmethod
+    def _email(body: Optional[bytes]) -> Optional[str]:
+        if not body:
+            return None
+        try:
+            email = json.loads(body).get("email")
+        except (ValueError, AttributeError):
+            return None
+        return email.strip().lower() if isinstance(email, str) else None
+
+    @staticmethod
+    def _replay(messages, receive):
+        pending = list(messages)
+
+        async def replay():
+            if pending:
+                return pending.pop(0)
+            return await receive()
+
+        return replay
+
+    @staticmethod
+    async def _reject(send, retry_after: float):
+        body = json.dumps({"detail": "Too many requests, try again later"}).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 429,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
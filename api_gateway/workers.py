@@ -0,0 +1,35 @@
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicWorker:
+    """Run a job every `interval` seconds on a daemon thread until stopped"""
+
+    def __init__(self, name: str, job, interval: float):
+        self.name = name
+        self.job = job
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self.interval <= 0:
+            logger.info(f" Background worker disabled: {self.name}")
+            return
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+        logger.info(f" Background worker started: {self.name} (every {self.interval}s)")
+
+    def stop(self, timeout: float = 10):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.job()
+            except Exception as e:
+                logger.error(f" Background worker {self.name} failed: {str(e)}", exc_info=True)
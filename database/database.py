@@ -44,18 +44,72 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
-def save_prediction(db: Session, prediction_data: dict):
+def _prediction_values(data: dict) -> dict:
+    return {
+        "user_id": data["user_id"],
+        "predicted_income": data["predicted_income"],
+        "predicted_expenses": data["predicted_expenses"],
+        "predicted_balance": data["predicted_balance"],
+        "confidence": data["confidence"],
+        "cashflow_risk": data.get("cashflow_risk"),
+        "risk_level": data.get("risk_level"),
+        "input_hash": data.get("input_hash"),
+        "prediction_date": data["timestamp"],
+        "last_seen_at": data["timestamp"],
+    }
+
+
+def _upsert_predictions(predictions: list):
+    """INSERT; a row already stored for (user_id, input_hash) only gets last_seen_at bumped"""
+    from sqlalchemy.dialects.postgresql import insert
+    from services.cash_flow_forcast_service.models import CashFlowPredictionDB
+
+    # One statement may not touch the same conflicting row twice: keep the last duplicate
+    rows = {}
+    for data in predictions:
+        values = _prediction_values(data)
+        key = (str(values["user_id"]), values["input_hash"] or id(data))
+        rows[key] = values
+    statement = insert(CashFlowPredictionDB).values(list(rows.values()))
+    return statement.on_conflict_do_update(
+        index_elements=[CashFlowPredictionDB.user_id, CashFlowPredictionDB.input_hash],
+        set_={"last_seen_at": statement.excluded.last_seen_at},
+    )
+
+
+def find_prediction(db: Session, user_id, input_hash: str, seen_at: datetime):
+    """Stored prediction for these inputs, marked as seen now; None on a miss"""
     from services.cash_flow_forcast_service.models import CashFlowPredictionDB
+    from database.persistence import update_returning
 
-    record = CashFlowPredictionDB(
-        user_id=prediction_data["user_id"],
-        predicted_income=prediction_data["predicted_income"],
-        predicted_expenses=prediction_data["predicted_expenses"],
-        predicted_balance=prediction_data["predicted_balance"],
-        confidence=prediction_data["confidence"],
-        prediction_date=prediction_data["timestamp"],
+    record = update_returning(
+        db,
+        CashFlowPredictionDB,
+        CashFlowPredictionDB.user_id == user_id,
+        CashFlowPredictionDB.input_hash == input_hash,
+        last_seen_at=seen_at,
     )
-    db.add(record)
+    if record is not None:
+        db.commit()
+    return record
+
+
+def save_prediction(db: Session, prediction_data: dict):
+    from services.cash_flow_forcast_service.models import CashFlowPredictionDB
+
+    statement = _upsert_predictions([prediction_data])
+    record = db.execute(statement.returning(*CashFlowPredictionDB.__table__.columns)).one()
     db.commit()
-    db.refresh(record)
     return record
+
+
+def add_predictions(db: Session, predictions: list):
+    """Store many predictions with one multi-row upsert (no commit)"""
+    if predictions:
+        db.execute(_upsert_predictions(predictions))
+
+
+def save_predictions(db: Session, predictions: list):
+    """Store many predictions with one multi-row upsert"""
+    add_predictions(db, predictions)
+    db.commit()
@@ -0,0 +1,39 @@
+"""
+persistence.py - Write helpers that return the stored row in the same round trip.
+
+The ORM pattern ``add(); commit(); refresh()`` costs an INSERT plus a SELECT
+per row (and the SELECT would happen anyway on first attribute access, since
+commit expires the instance). Every column default in our models is computed
+client-side (``uuid.uuid4``, ``datetime.utcnow``...), and SQLAlchemy Core
+applies those before sending ``INSERT/UPDATE ... RETURNING``, so the returned
+``Row`` already holds the server state. Rows expose columns as attributes, so
+they work wherever the ORM instance was used for reading (including pydantic
+``from_attributes`` response models).
+
+Usage:
+    bill = insert_returning(db, Bill, merchant="EDF", amount=89.5, ...)
+    db.commit()
+"""
+from typing import Optional
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+
+
+def _columns(model):
+    return model.__table__.columns
+
+
+def insert_returning(db: Session, model, **values) -> Row:
+    """INSERT one row and return every column of it (no commit)"""
+    return db.execute(insert(model).values(**values).returning(*_columns(model))).one()
+
+
+def update_returning(db: Session, model, *criteria, **values) -> Optional[Row]:
+    """UPDATE the row matching `criteria` and return it, or None if nothing matched (no commit)"""
+    if not values:
+        return db.execute(select(*_columns(model)).where(*criteria)).first()
+    return db.execute(
+        update(model).where(*criteria).values(**values).returning(*_columns(model))
+    ).first()
@@ -0,0 +1,123 @@
+"""
+schema_upgrades.py - Columns and indexes added to tables that already exist.
+
+``Base.metadata.create_all`` creates missing tables but never alters existing
+ones, so a database deployed before these changes would lack them. Without
+them the prediction upsert fails ("no unique or exclusion constraint matching
+the ON CONFLICT specification") and reads of the new columns fail too. Every
+statement is idempotent. They run at gateway startup, right after create_all,
+under an advisory lock so that concurrent workers do not race. Run them by
+hand with:
+    python -m database.schema_upgrades
+
+Indexes are built CONCURRENTLY so that writes to large tables are not blocked.
+A concurrent build that fails (a duplicate key, a killed worker) leaves an
+INVALID index behind, which IF NOT EXISTS would then skip forever; such an
+index is dropped and built again.
+"""
+import logging
+import re
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_LOCK_KEY = 4_040_002  # pg advisory lock id held while upgrading
+
+# (table, statement); statements for tables that do not exist yet are skipped
+UPGRADES = [
+    # Stored predictions reused per (user, inputs)
+    (
+        "cash_flow_prediction",
+        "ALTER TABLE cash_flow_prediction ADD COLUMN IF NOT EXISTS cashflow_risk INTEGER",
+    ),
+    (
+        "cash_flow_prediction",
+        "ALTER TABLE cash_flow_prediction ADD COLUMN IF NOT EXISTS risk_level VARCHAR(20)",
+    ),
+    (
+        "cash_flow_prediction",
+        "ALTER TABLE cash_flow_prediction ADD COLUMN IF NOT EXISTS input_hash VARCHAR(64)",
+    ),
+    (
+        "cash_flow_prediction",
+        "ALTER TABLE cash_flow_prediction ADD COLUMN IF NOT EXISTS last_seen_at TIMESTAMP",
+    ),
+    # Target of the prediction upsert's ON CONFLICT (user_id, input_hash)
+    (
+        "cash_flow_prediction",
+        "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS uq_cash_flow_prediction_user_input "
+        "ON cash_flow_prediction (user_id, input_hash)",
+    ),
+    (
+        "cash_flow_prediction",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_cash_flow_prediction_user_date "
+        "ON cash_flow_prediction (user_id, prediction_date, prediction_id)",
+    ),
+    ("users", "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_users_created_at ON users (created_at)"),
+    ("account", "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_account_user_id ON account (user_id)"),
+    (
+        "transaction",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_transaction_account_date "
+        'ON "transaction" (account_id, transaction_date, transaction_id)',
+    ),
+    (
+        "bill",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_bill_recurring_account_due "
+        "ON bill (account_id, due_date) WHERE is_recurring",
+    ),
+    (
+        "bill",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_bill_transaction_id ON bill (transaction_id)",
+    ),
+]
+
+
+_INDEX_NAME = re.compile(r"CREATE (?:UNIQUE )?INDEX CONCURRENTLY IF NOT EXISTS (\w+)")
+
+
+def _apply(conn, statement: str):
+    created = _INDEX_NAME.match(statement)
+    if created:
+        invalid = conn.execute(
+            text(
+                "SELECT NOT i.indisvalid FROM pg_index i "
+                "JOIN pg_class c ON c.oid = i.indexrelid "
+                "WHERE c.relname = :name AND c.relnamespace = current_schema()::regnamespace"
+            ),
+            {"name": created.group(1)},
+        ).scalar()
+        if invalid:
+            logger.warning(f" Index {created.group(1)} is INVALID, rebuilding it")
+            conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {created.group(1)}"))
+    conn.execute(text(statement))
+
+
+def upgrade_schema(engine: Engine):
+    """Apply UPGRADES (PostgreSQL only; other databases are always created fresh)"""
+    if engine.dialect.name != "postgresql":
+        return
+    # CONCURRENTLY cannot run inside a transaction block
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": SCHEMA_LOCK_KEY})
+        try:
+            tables = set(
+                conn.execute(
+                    text("SELECT tablename FROM pg_tables WHERE schemaname = current_schema()")
+                ).scalars()
+            )
+            for table, statement in UPGRADES:
+                if table in tables:
+                    _apply(conn, statement)
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": SCHEMA_LOCK_KEY})
+    logger.info(" Schema upgrades applied")
+
+
+if __name__ == "__main__":
+    from database.database import engine
+
+    logging.basicConfig(level=logging.INFO)
+    upgrade_schema(engine)
+    print("Schema is up to date")
@@ -0,0 +1,59 @@
+"""
+gunicorn.conf.py - Multi-worker launch of the API gateway.
+
+    gunicorn -c gunicorn.conf.py api_gateway.main:app
+
+The app and its models are loaded in the master and shared copy-on-write by
+the uvicorn workers (see api_gateway/preload.py). Each worker is replaced
+after GUNICORN_MAX_REQUESTS requests, with jitter so that workers are not
+all recycled at the same time. A replacement is forked from the preloaded
+master, so it starts in well under a second. Model reloads recorded by the
+previous release are cleared when the master starts.
+
+With more than one worker the wallet balance cache and the auth rate limiter
+default to Redis; explicitly keeping either one in memory is refused, since
+each worker would then hold its own copy.
+"""
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8001')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = os.getenv("GUNICORN_PRELOAD", "1") == "1"
+
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "5000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "500"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+
+if workers > 1:
+    in_memory = [
+        name
+        for name in ("WALLET_CACHE_BACKEND", "RATE_LIMIT_BACKEND")
+        if os.getenv(name, "redis") != "redis"
+    ]
+    if in_memory:
+        raise RuntimeError(
+            f"WEB_CONCURRENCY={workers} needs shared state: set {', '.join(in_memory)}=redis"
+        )
+
+
+def on_starting(server):
+    # Sources requested through /admin/models belong to the previous release
+    from shared.model_registry import registry
+
+    registry.reset()
+
+
+def when_ready(server):
+    if preload_app:
+        from api_gateway.preload import preload
+
+        preload()
+
+
+def post_fork(server, worker):
+    if preload_app:
+        from api_gateway.preload import after_fork
+
+        after_fork()
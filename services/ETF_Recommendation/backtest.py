@@ -0,0 +1,171 @@
+"""
+backtest.py - The ETF allocation rule replayed over the whole feature history.
+
+Every day of ``features_all`` is scored at once, with one ``predict`` call per
+ticker over that ticker's columns for all days. Each day's strategy, picks and
+weights then come from array operations that follow ``Allocation.rank``. The
+resulting portfolio is marked against the close-to-close return realized over
+the forecast horizon (504 trading days, the model's 2Y target).
+
+The same run is the ETF engine benchmark: the report includes the scoring
+time, the total time and the peak traced memory.
+    python -m services.ETF_Recommendation.backtest --horizon 504
+"""
+from typing import NamedTuple
+import argparse
+import json
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from .price_store import TICKERS
+
+HORIZON = 504  # trading days in the 2Y forecast
+
+CONCENTRATED_ABOVE = 0.22
+DIVERSIFIED_ABOVE = 0.15
+MAX_PICKS = 3
+STRATEGIES = ["concentrated", "diversified", "safe"]
+
+
+class Backtest(NamedTuple):
+    days: pd.DatetimeIndex
+    preds: np.ndarray  # (days, tickers) 2Y forecasts
+    strategies: np.ndarray  # (days,) strategy name
+    weights: np.ndarray  # (days, tickers), rows sum to 1
+    forward: np.ndarray  # (days, tickers) realized returns, NaN past the last price
+    predict_seconds: float
+
+    @property
+    def expected(self) -> np.ndarray:
+        """Forecast reported for each day (the best ticker's, as in the engine)"""
+        return self.preds.max(axis=1)
+
+    @property
+    def realized(self) -> np.ndarray:
+        """Realized portfolio return per day, NaN when the horizon is not over yet"""
+        # NaN forward returns only ever come as whole rows (the horizon is the same for all)
+        return (self.weights * self.forward).sum(axis=1)
+
+
+def score_all(state) -> np.ndarray:
+    """(days, tickers) forecasts: one predict call per ticker over every day"""
+    preds = np.empty((len(state.matrix), len(TICKERS)))
+    for t, columns in enumerate(state.column_index):
+        preds[:, t] = state.model.predict(
+            state.matrix[:, columns], predict_disable_shape_check=True
+        )
+    return preds
+
+
+def allocate(preds: np.ndarray):
+    """Strategy names and (days, tickers) weights for every day, as ``Allocation.rank``"""
+    days = np.arange(len(preds))
+    order = np.argsort(-preds, axis=1, kind="stable")
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.arange(preds.shape[1])[None, :], axis=1)
+    best = preds[days, order[:, 0]]
+
+    concentrated = best > CONCENTRATED_ABOVE
+    diversified = ~concentrated & (best > DIVERSIFIED_ABOVE)
+    safe = ~concentrated & ~diversified
+
+    chosen = np.zeros(preds.shape, dtype=bool)
+    chosen[concentrated] = ranks[concentrated] == 0
+    chosen[diversified] = (ranks[diversified] < MAX_PICKS) & (
+        preds[diversified] > DIVERSIFIED_ABOVE
+    )
+    chosen[safe, TICKERS.index("ACWI")] = True
+
+    weights = chosen / chosen.sum(axis=1, keepdims=True)
+    strategies = np.select([concentrated, diversified], STRATEGIES[:2], STRATEGIES[2])
+    return strategies, weights
+
+
+def forward_returns(prices: pd.DataFrame, days: pd.DatetimeIndex, horizon: int) -> np.ndarray:
+    """Close `horizon` trading days after each day over the close on it, minus one"""
+    closes = prices[TICKERS].to_numpy(dtype=np.float64)
+    start = prices.index.get_indexer(days)
+    if (start < 0).any():
+        raise KeyError("Feature days missing from prices")
+    end = start + horizon
+    forward = np.full((len(days), len(TICKERS)), np.nan)
+    known = end < len(closes)
+    forward[known] = closes[end[known]] / closes[start[known]] - 1
+    return forward
+
+
+def run_backtest(state, horizon: int = HORIZON) -> Backtest:
+    started = time.perf_counter()
+    preds = score_all(state)
+    predict_seconds = time.perf_counter() - started
+
+    strategies, weights = allocate(preds)
+    days = state.features_all.index
+    forward = forward_returns(state.prices, days, horizon)
+    return Backtest(days, preds, strategies, weights, forward, predict_seconds)
+
+
+def _stats(expected: np.ndarray, realized: np.ndarray) -> dict:
+    known = realized[~np.isnan(realized)]
+    return {
+        "days": int(len(expected)),
+        "mean_expected": float(expected.mean()) if len(expected) else None,
+        "realized_days": int(len(known)),
+        "mean_realized": float(known.mean()) if len(known) else None,
+        "hit_rate": float((known > 0).mean()) if len(known) else None,
+    }
+
+
+def summarize(result: Backtest, horizon: int = HORIZON) -> dict:
+    """Strategy distribution and realized forward returns, overall and per strategy"""
+    expected, realized = result.expected, result.realized
+    total = len(result.days)
+    strategies = {}
+    for name in STRATEGIES:
+        mask = result.strategies == name
+        strategies[name] = {"share": float(mask.sum() / total) if total else 0.0}
+        strategies[name].update(_stats(expected[mask], realized[mask]))
+
+    acwi = result.forward[:, TICKERS.index("ACWI")]
+    acwi = acwi[~np.isnan(acwi)]
+    return {
+        "first_day": str(result.days[0].date()) if total else None,
+        "last_day": str(result.days[-1].date()) if total else None,
+        "horizon": horizon,
+        "portfolio": _stats(expected, realized),
+        "strategies": strategies,
+        "acwi_mean_realized": float(acwi.mean()) if len(acwi) else None,
+    }
+
+
+def benchmark(state, horizon: int = HORIZON) -> dict:
+    """``summarize(run_backtest(...))`` plus run time and peak traced memory"""
+    tracemalloc.start()
+    try:
+        started = time.perf_counter()
+        result = run_backtest(state, horizon)
+        report = summarize(result, horizon)
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    report["timing"] = {
+        "predict_seconds": round(result.predict_seconds, 4),
+        "total_seconds": round(elapsed, 4),
+        "seconds_per_day": elapsed / len(result.days) if len(result.days) else None,
+        "peak_mb": round(peak / 2**20, 2),
+    }
+    return report
+
+
+if __name__ == "__main__":
+    from .etf_advisor_engine import get_state
+
+    parser = argparse.ArgumentParser(description="Backtest the ETF allocation rule")
+    parser.add_argument("--horizon", type=int, default=HORIZON, help="trading days ahead")
+    args = parser.parse_args()
+    print(json.dumps(benchmark(get_state(), args.horizon), indent=2))
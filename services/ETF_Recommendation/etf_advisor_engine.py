@@ -1,67 +1,149 @@
+"""
+etf_advisor_engine.py - ETF allocation from the long-term model.
+
+Nothing heavy happens at import: the model, the stored prices and the
+features are loaded together on first use (``get_state``), from the local
+price and feature stores rather than the network. ``refresh_prices`` runs in
+the background, appends the new trading days, computes features for those
+days only and swaps in the new state. The model is the registry's "etf" slot:
+reloading it swaps in a new state around the same prices and features.
+
+A day is scored with one ``predict`` call over a (tickers, features) block
+gathered through precomputed column positions. The ranked allocation only
+depends on the day, so it is cached on the state and each request just
+scales the weights by its amount.
+"""
+from typing import List, NamedTuple, Optional, Sequence, Tuple
 import joblib
-import pandas as pd
-import yfinance as yf
 import numpy as np
-import os
+import pandas as pd
+import threading
 from pathlib import Path
 
-# Load model once at import time
+from shared.model_registry import registry
+from .feature_store import FeatureStore
+from .price_store import TICKERS, PriceStore
+
 SCRIPT_DIR = Path(__file__).resolve().parent
 MODEL_PATH = SCRIPT_DIR / "ETF_LongTerm_Model_20251201.pkl"
-if not os.path.exists(MODEL_PATH):
-    raise FileNotFoundError(f"Model file not found: {MODEL_PATH}")
-
-model = joblib.load(MODEL_PATH)
-print("ETF Model loaded – December 2025 version")
-
-tickers = ["SPY", "ACWI", "EFA", "VEU", "VWO", "VNQ", "TLT", "IEF", "LQD", "GLD", "DBC", "BWX"]
-
-# Download and cache data
-prices = yf.download(tickers, period="max", auto_adjust=True, progress=False)["Close"]
-prices = prices[tickers].dropna()
-
-# Build features – 100% identical to your training code
-returns = prices.pct_change()
-mom_21 = prices.pct_change(21)
-mom_63 = prices.pct_change(63)
-mom_126 = prices.pct_change(126)
-mom_252 = prices.pct_change(252)
-mom_504 = prices.pct_change(504)
-acceleration = prices.pct_change(21) - prices.pct_change(252)
-near_52wh = prices / prices.rolling(252).max()
-
-spy_mom = prices["SPY"].pct_change(63)
-dbc_mom = prices["DBC"].pct_change(63)
-spread = spy_mom - dbc_mom
-
-anti = pd.DataFrame(index=prices.index, columns=tickers)
-for t in tickers:
-    anti[t] = -spread if t in ["DBC", "GLD"] else spread
-
-feature_list = [
-    mom_21.add_suffix("_mom_mom_21d"),
-    mom_63.add_suffix("_mom_63d"),
-    mom_126.add_suffix("_mom_126d"),
-    mom_252.add_suffix("_mom_252d"),
-    mom_504.add_suffix("_mom_504d"),
-    (mom_252 - mom_21).add_suffix("_dual_mom"),
-    (prices / prices.rolling(252).max() - 1).add_suffix("_dist_52whigh"),
-    (prices / prices.rolling(50).mean()).add_suffix("_vs_sma50"),
-    (prices / prices.rolling(200).mean()).add_suffix("_vs_sma200"),
-    (prices.rolling(50).mean() > prices.rolling(200).mean())
-    .astype(int)
-    .add_suffix("_golden_cross"),
-    (returns.rolling(63).std() * np.sqrt(252)).add_suffix("_vol_63d"),
-    (returns.rolling(252).std() * np.sqrt(252)).add_suffix("_vol_252d"),
-    mom_63.rank(axis=1, pct=True).add_suffix("_rs_63d"),
-    mom_252.rank(axis=1, pct=True).add_suffix("_rs_252d"),
-    mom_504.rank(axis=1, pct=True).add_suffix("_rs_504d"),
-    acceleration.add_suffix("_acceleration_21vs252"),
-    near_52wh.add_suffix("_near_52wh"),
-    anti.add_suffix("_anti_commodity_bias"),
-]
-
-features_all = pd.concat(feature_list, axis=1).dropna()
+
+tickers = TICKERS
+FEATURES_PER_TICKER = 18  # feature_list in build_features
+
+price_store = PriceStore()
+feature_store = FeatureStore()
+
+
+class EngineState:
+    """Model, prices and features that are swapped together, plus what is derived from them"""
+
+    def __init__(self, model, prices: pd.DataFrame, features_all: pd.DataFrame):
+        self.model = model
+        self.prices = prices
+        self.features_all = features_all
+        self.matrix = features_all.to_numpy()
+        # (tickers, features per ticker): positions of each ticker's columns, in column order
+        columns = list(features_all.columns)
+        self.column_index = np.array(
+            [[i for i, c in enumerate(columns) if c.startswith(t + "_")] for t in tickers]
+        )
+        self._allocations = {}  # trading day -> Allocation; dropped with the state on refresh
+
+    def trading_day(self, specific_date=None) -> pd.Timestamp:
+        """Last trading day on or before `specific_date` (latest day when None)"""
+        if specific_date is None:
+            return self.prices.index[-1]
+        position = self.prices.index.searchsorted(pd.to_datetime(specific_date), side="right")
+        if position == 0:
+            raise ValueError(f"No prices on or before {specific_date}")
+        return self.prices.index[position - 1]
+
+    def allocations(self, days) -> list:
+        """Ranked allocation per day; days not cached yet are scored in one predict call"""
+        missing = list(dict.fromkeys(day for day in days if day not in self._allocations))
+        if missing:
+            rows = self.features_all.index.get_indexer(missing)
+            if (rows < 0).any():
+                unknown = [str(d.date()) for d, r in zip(missing, rows) if r < 0]
+                raise KeyError(f"No features for {', '.join(unknown)}")
+            # One row per (day, ticker) with that ticker's feature columns
+            X = self.matrix[rows[:, None, None], self.column_index[None, :, :]]
+            preds = self.model.predict(
+                X.reshape(len(missing) * len(tickers), -1), predict_disable_shape_check=True
+            ).reshape(len(missing), len(tickers))
+            for day, day_preds in zip(missing, preds):
+                self._allocations[day] = Allocation.rank(day_preds)
+        return [self._allocations[day] for day in days]
+
+
+_state = None
+_state_lock = threading.Lock()
+
+
+def load_model(model_path=None):
+    path = Path(model_path) if model_path else MODEL_PATH
+    if not path.exists():
+        raise FileNotFoundError(f"Model file not found: {path}")
+    model = joblib.load(path)
+    print(f"ETF Model loaded – {path.stem}")
+    return path.stem, model
+
+
+def warm_model(model):
+    """Smoke batch: the latest day's features, or zeros before any prices are loaded"""
+    state = _state
+    if state is None:
+        X = np.zeros((len(tickers), FEATURES_PER_TICKER))
+    else:
+        X = state.matrix[-1][state.column_index]
+    preds = np.asarray(model.predict(X, predict_disable_shape_check=True))
+    if preds.shape != (len(tickers),) or not np.isfinite(preds).all():
+        raise ValueError(f"ETF model returned {preds.shape} forecasts for {len(tickers)} ETFs")
+
+
+def _swap_model(model):
+    """A new model invalidates the cached allocations: rebuild the state around it"""
+    global _state
+    with _state_lock:
+        if _state is not None:
+            _state = EngineState(model, _state.prices, _state.features_all)
+
+
+etf_model = registry.register("etf", load_model, warm_model, on_swap=_swap_model)
+
+
+def get_state() -> EngineState:
+    """Load the model and the stored prices once (fills an empty store first)"""
+    global _state
+    if _state is None:
+        etf_model.get()  # outside _state_lock: a first load swaps the model in under it
+        with _state_lock:
+            if _state is None:
+                prices = price_store.load()
+                if prices.empty:
+                    price_store.refresh()
+                    prices = price_store.load()
+                prices = prices[tickers].dropna()
+                _state = EngineState(etf_model.get(), prices, feature_store.update(prices))
+    return _state
+
+
+def refresh_prices():
+    """Background job: append new trading days and compute their features"""
+    global _state
+    price_store.refresh(blocking=False)  # another worker may be refreshing the store
+    if _state is None:
+        return
+    with _state_lock:
+        # Compared with the stored prices rather than what this call appended: another
+        # worker may have filled the store or re-adjusted its history, and a recycled worker
+        # starts from the master's preloaded state
+        prices = price_store.load()[tickers].dropna()
+        if prices.empty or prices.equals(_state.prices):
+            return
+        features = feature_store.update(prices, _state.features_all)
+        _state = EngineState(_state.model, prices, features)
+
 
 reasons = {
     "SPY": "US market leadership & AI/tech growth engine",
@@ -79,44 +161,60 @@ reasons = {
 }
 
 
+class Allocation(NamedTuple):
+    """Amount-independent part of a recommendation for one day"""
+
+    strategy: str
+    best: float
+    picks: Tuple[Tuple[str, float, float], ...]  # (ETF, forecast_2y, weight), best first
+
+    @classmethod
+    def rank(cls, preds: np.ndarray) -> "Allocation":
+        order = np.argsort(-preds, kind="stable")
+        best = float(preds[order[0]])
+
+        if best > 0.22:
+            chosen, strategy = order[:1], "concentrated"
+        elif best > 0.15:
+            chosen, strategy = [i for i in order if preds[i] > 0.15][:3], "diversified"
+        else:
+            return cls("safe", best, (("ACWI", best, 1.0),))
+
+        weight = 1.0 / len(chosen)
+        return cls(strategy, best, tuple((tickers[i], float(preds[i]), weight) for i in chosen))
+
+    def for_amount(self, day: pd.Timestamp, amount: float) -> dict:
+        return {
+            "date": day.date(),
+            "total_amount": float(amount),
+            "strategy": self.strategy,
+            "expected_2y_return": self.best,
+            "allocations": [
+                {
+                    "ETF": etf,
+                    "forecast_2y": forecast,
+                    "Weight": weight,
+                    "Amount_EUR": int(np.round(weight * amount)),
+                    "reason": reasons[etf],
+                }
+                for etf, forecast, weight in self.picks
+            ],
+        }
+
+
 def get_recommendation(amount: float, specific_date: str = None):
-    day = prices.index[-1] if specific_date is None else pd.to_datetime(specific_date)
-    day = prices.index[prices.index <= day][-1]
-
-    row = features_all.loc[day]
-    preds = {}
-    for t in tickers:
-        cols = [c for c in row.index if c.startswith(t + "_")]
-        X = row[cols].values.reshape(1, -1)
-        preds[t] = model.predict(X, predict_disable_shape_check=True)[0]
-
-    df = pd.DataFrame(list(preds.items()), columns=["ETF", "2Y"])
-    df = df.sort_values("2Y", ascending=False)
-
-    best = df.iloc[0]["2Y"]
-
-    if best > 0.22:
-        alloc = df.iloc[[0]].copy()
-        alloc["Weight"] = 1.0
-        strategy = "concentrated"
-    elif best > 0.15:
-        alloc = df[df["2Y"] > 0.15].head(3).copy()
-        alloc["Weight"] = 1.0 / len(alloc)
-        strategy = "diversified"
-    else:
-        alloc = pd.DataFrame({"ETF": ["ACWI"], "2Y": [best], "Weight": [1.0]})
-        strategy = "safe"
-
-    alloc["Amount_EUR"] = (alloc["Weight"] * amount).round().astype(int)
-    alloc["forecast_2y"] = alloc["2Y"]
-    alloc["reason"] = alloc["ETF"].map(reasons)
-
-    return {
-        "date": day.date(),
-        "total_amount": float(amount),
-        "strategy": strategy,
-        "expected_2y_return": float(best),
-        "allocations": alloc[["ETF", "forecast_2y", "Weight", "Amount_EUR", "reason"]].to_dict(
-            orient="records"
-        ),
-    }
+    state = get_state()
+    day = state.trading_day(specific_date)
+    (allocation,) = state.allocations([day])
+    return allocation.for_amount(day, amount)
+
+
+def get_recommendations(requests: Sequence[Tuple[float, Optional[str]]]) -> List[dict]:
+    """Many (amount, date) pairs at once: each distinct day is scored once"""
+    state = get_state()
+    days = [state.trading_day(specific_date) for _, specific_date in requests]
+    allocations = state.allocations(days)
+    return [
+        allocation.for_amount(day, amount)
+        for (amount, _), day, allocation in zip(requests, days, allocations)
+    ]
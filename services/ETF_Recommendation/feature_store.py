@@ -0,0 +1,122 @@
+"""
+feature_store.py - ETF model features, persisted next to the price store.
+
+``build_features`` is the training-time pipeline. Its longest lookback is
+MAX_LOOKBACK closes (504-day momentum; every rolling window is shorter), so
+the features of a new day depend only on the MAX_LOOKBACK closes before it.
+``FeatureStore.update`` therefore recomputes just the new days from that
+trailing price window instead of the whole history, and appends them to a
+float32 Parquet matrix that loads in milliseconds at startup. The window
+also recomputes the last stored day: if that no longer matches, the prices
+were re-adjusted (dividend or split) and every day is rebuilt.
+"""
+from pathlib import Path
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+from .price_store import ETF_PRICE_STORE, TICKERS, file_lock, write_parquet
+
+logger = logging.getLogger(__name__)
+
+ETF_FEATURE_STORE = os.getenv(
+    "ETF_FEATURE_STORE", str(Path(ETF_PRICE_STORE).with_name("etf_features.parquet"))
+)
+MAX_LOOKBACK = 504
+FEATURE_DTYPE = np.float32
+
+
+def build_features(prices: pd.DataFrame) -> pd.DataFrame:
+    """Model features for every date with full history – 100% identical to the training code"""
+    returns = prices.pct_change()
+    mom_21 = prices.pct_change(21)
+    mom_63 = prices.pct_change(63)
+    mom_126 = prices.pct_change(126)
+    mom_252 = prices.pct_change(252)
+    mom_504 = prices.pct_change(504)
+    acceleration = prices.pct_change(21) - prices.pct_change(252)
+    near_52wh = prices / prices.rolling(252).max()
+
+    spy_mom = prices["SPY"].pct_change(63)
+    dbc_mom = prices["DBC"].pct_change(63)
+    spread = spy_mom - dbc_mom
+
+    anti = pd.DataFrame(index=prices.index, columns=TICKERS)
+    for t in TICKERS:
+        anti[t] = -spread if t in ["DBC", "GLD"] else spread
+
+    feature_list = [
+        mom_21.add_suffix("_mom_mom_21d"),
+        mom_63.add_suffix("_mom_63d"),
+        mom_126.add_suffix("_mom_126d"),
+        mom_252.add_suffix("_mom_252d"),
+        mom_504.add_suffix("_mom_504d"),
+        (mom_252 - mom_21).add_suffix("_dual_mom"),
+        (prices / prices.rolling(252).max() - 1).add_suffix("_dist_52whigh"),
+        (prices / prices.rolling(50).mean()).add_suffix("_vs_sma50"),
+        (prices / prices.rolling(200).mean()).add_suffix("_vs_sma200"),
+        (prices.rolling(50).mean() > prices.rolling(200).mean())
+        .astype(int)
+        .add_suffix("_golden_cross"),
+        (returns.rolling(63).std() * np.sqrt(252)).add_suffix("_vol_63d"),
+        (returns.rolling(252).std() * np.sqrt(252)).add_suffix("_vol_252d"),
+        mom_63.rank(axis=1, pct=True).add_suffix("_rs_63d"),
+        mom_252.rank(axis=1, pct=True).add_suffix("_rs_252d"),
+        mom_504.rank(axis=1, pct=True).add_suffix("_rs_504d"),
+        acceleration.add_suffix("_acceleration_21vs252"),
+        near_52wh.add_suffix("_near_52wh"),
+        anti.add_suffix("_anti_commodity_bias"),
+    ]
+
+    return pd.concat(feature_list, axis=1).dropna()
+
+
+class FeatureStore:
+    """float32 feature matrix on disk, extended one price refresh at a time"""
+
+    def __init__(self, path=ETF_FEATURE_STORE, lookback: int = MAX_LOOKBACK):
+        self.path = Path(path)
+        self.lookback = lookback
+
+    def load(self) -> pd.DataFrame:
+        if not self.path.exists():
+            return pd.DataFrame()
+        return pd.read_parquet(self.path)
+
+    def update(self, prices: pd.DataFrame, features: pd.DataFrame = None) -> pd.DataFrame:
+        """Features for every date in `prices`, computing only dates not stored yet"""
+        features = self.load() if features is None else features
+        if features.empty:
+            return self._rebuild(prices)
+
+        last = features.index.max()
+        new_rows = int((prices.index > last).sum())
+        # Each day needs the `lookback` closes before it, nothing older
+        tail = build_features(prices.iloc[-(new_rows + self.lookback + 1) :])
+        if last not in tail.index or not np.allclose(
+            tail.loc[last].to_numpy(), features.loc[last].to_numpy(), rtol=1e-5, atol=1e-6
+        ):
+            logger.info(f" ETF features: prices changed up to {last.date()}, rebuilding")
+            return self._rebuild(prices)
+        if new_rows == 0:
+            return features
+
+        added = tail[tail.index > last].astype(FEATURE_DTYPE)
+        combined = pd.concat([features, added])
+        self._write(combined)
+        logger.info(f" ETF features: {len(added)} days computed, {len(combined)} stored")
+        return combined
+
+    def _rebuild(self, prices: pd.DataFrame) -> pd.DataFrame:
+        features = build_features(prices).astype(FEATURE_DTYPE)
+        if not features.empty:
+            self._write(features)
+            logger.info(f" ETF features: {len(features)} days computed")
+        return features
+
+    def _write(self, features: pd.DataFrame):
+        # Float features barely compress; uncompressed pages load faster
+        with file_lock(self.path):
+            write_parquet(features, self.path, compression=None)
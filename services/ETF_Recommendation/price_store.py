@@ -0,0 +1,184 @@
+"""
+price_store.py - Daily ETF close prices kept on disk as a Parquet file.
+
+Loading the store is a local columnar read (milliseconds) instead of a
+``yf.download(period="max")`` on every start. ``refresh`` asks the fetcher
+for the days after the last stored one plus the last REFRESH_OVERLAP stored
+days, and appends the new ones. Adjusted closes are rewritten backwards on
+every dividend or split: when the re-fetched overlap no longer matches what
+is stored, the whole history is fetched again and replaced, so old and new
+closes always share one adjustment basis.
+
+Every gateway worker runs the refresh job. A refresh takes an exclusive
+``flock`` on the store's lock file and is skipped while another process holds
+it. Writes go to a unique temporary file that is renamed over the store, so
+readers never see a partial file.
+
+Fetchers are pluggable: ``YahooFetcher`` for production and ``CsvFetcher``
+(``ETF_PRICE_SOURCE=/path/prices.csv``) for offline development and tests.
+
+Seed or update the store by hand with:
+    python -m services.ETF_Recommendation.price_store
+"""
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from datetime import date
+from pathlib import Path
+from typing import List, Optional
+import fcntl
+import logging
+import os
+import tempfile
+import threading
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+ETF_PRICE_STORE = os.getenv("ETF_PRICE_STORE", str(SCRIPT_DIR / "data" / "etf_prices.parquet"))
+ETF_PRICE_SOURCE = os.getenv("ETF_PRICE_SOURCE", "yahoo")
+
+REFRESH_OVERLAP = 5  # stored trading days fetched again to detect re-adjusted history
+
+TICKERS = ["SPY", "ACWI", "EFA", "VEU", "VWO", "VNQ", "TLT", "IEF", "LQD", "GLD", "DBC", "BWX"]
+
+
+class PriceFetcher(ABC):
+    """Source of daily close prices: one column per ticker, indexed by date"""
+
+    @abstractmethod
+    def fetch(self, tickers: List[str], start: Optional[date] = None) -> pd.DataFrame:
+        """Closes from `start` (inclusive) to today, or the full history when start is None"""
+
+
+class YahooFetcher(PriceFetcher):
+    def fetch(self, tickers: List[str], start: Optional[date] = None) -> pd.DataFrame:
+        import yfinance as yf
+
+        period = {"period": "max"} if start is None else {"start": start.isoformat()}
+        return yf.download(tickers, auto_adjust=True, progress=False, **period)["Close"]
+
+
+class CsvFetcher(PriceFetcher):
+    """Prices from a local CSV with a Date column and one column per ticker"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+
+    def fetch(self, tickers: List[str], start: Optional[date] = None) -> pd.DataFrame:
+        prices = pd.read_csv(self.path, index_col="Date", parse_dates=["Date"])[tickers]
+        return prices if start is None else prices[prices.index >= pd.Timestamp(start)]
+
+
+@contextmanager
+def file_lock(path: Path, blocking: bool = True):
+    """Exclusive flock on ``<path>.lock`` across processes; yields False if busy and not blocking"""
+    lock_path = Path(f"{path}.lock")
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_path, "a") as handle:
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            acquired = True
+        except BlockingIOError:
+            acquired = False
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def write_parquet(frame: pd.DataFrame, path: Path, **kwargs):
+    """Write to a unique temporary file next to `path`, then rename it over `path`"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(
+        dir=path.parent, prefix=f"{path.name}.", suffix=".tmp", delete=False
+    ) as tmp:
+        pass
+    try:
+        frame.to_parquet(tmp.name, engine="pyarrow", **kwargs)
+        os.replace(tmp.name, path)
+    except BaseException:
+        os.unlink(tmp.name)
+        raise
+
+
+def create_fetcher(source: str = ETF_PRICE_SOURCE) -> PriceFetcher:
+    if source == "yahoo":
+        return YahooFetcher()
+    return CsvFetcher(source)
+
+
+class PriceStore:
+    """Parquet-backed close prices for `tickers`, appended incrementally"""
+
+    def __init__(
+        self,
+        path=ETF_PRICE_STORE,
+        tickers: List[str] = TICKERS,
+        fetcher: Optional[PriceFetcher] = None,
+    ):
+        self.path = Path(path)
+        self.tickers = list(tickers)
+        self.fetcher = fetcher or create_fetcher()
+        self._lock = threading.Lock()
+
+    def load(self) -> pd.DataFrame:
+        """Stored prices (empty frame if the store was never filled)"""
+        if not self.path.exists():
+            return pd.DataFrame(columns=self.tickers, index=pd.DatetimeIndex([], name="Date"))
+        return pd.read_parquet(self.path, columns=self.tickers)
+
+    def refresh(self, blocking: bool = True) -> int:
+        """Append the days missing since the last stored one; returns the rows added
+
+        With ``blocking=False`` nothing is done (0) while another process refreshes.
+        """
+        with self._lock, file_lock(self.path, blocking) as acquired:
+            if not acquired:
+                return 0
+            stored = self.load()
+            start = stored.index[-REFRESH_OVERLAP:][0].date() if len(stored) else None
+            fetched = self._fetch(start)
+            if fetched.empty:
+                return 0
+
+            if len(stored):
+                common = fetched.index.intersection(stored.index)
+                if len(common) == 0 or not np.allclose(
+                    fetched.loc[common].to_numpy(), stored.loc[common].to_numpy(), rtol=1e-6
+                ):
+                    return self._rebuild(stored)
+                fetched = fetched[fetched.index > stored.index.max()]
+                if fetched.empty:
+                    return 0
+
+            combined = pd.concat([stored, fetched]) if len(stored) else fetched
+            self._write(combined)
+            logger.info(f" ETF prices: {len(fetched)} new days up to {fetched.index.max().date()}")
+            return len(fetched)
+
+    def _fetch(self, start: Optional[date]) -> pd.DataFrame:
+        fetched = self.fetcher.fetch(self.tickers, start)[self.tickers].dropna()
+        fetched.index = pd.DatetimeIndex(fetched.index, name="Date").tz_localize(None)
+        return fetched.astype("float64")
+
+    def _rebuild(self, stored: pd.DataFrame) -> int:
+        """The source re-adjusted past closes (dividend or split): replace the whole history"""
+        prices = self._fetch(None)
+        self._write(prices)
+        added = int((prices.index > stored.index.max()).sum())
+        logger.info(f" ETF prices: history re-adjusted, {len(prices)} days rewritten, {added} new")
+        return added
+
+    def _write(self, prices: pd.DataFrame):
+        write_parquet(prices, self.path)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    store = PriceStore()
+    added = store.refresh()
+    print(f"{added} new days, {len(store.load())} stored in {store.path}")
@@ -1,76 +1,87 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from database.database import get_db
+from services.auth_service.dependencies import get_current_user_id
+from sqlalchemy import insert
 from .models import Recommendation
-from .schemas import RecommendationRequest, RecommendationResponse
-from .etf_advisor_engine import get_recommendation
+from .schemas import BatchRecommendationRequest, RecommendationRequest, RecommendationResponse
+from .etf_advisor_engine import get_recommendation, get_recommendations
 from datetime import datetime
+from typing import List
+from uuid import UUID
 
+# Handlers are plain defs: the first call on a worker loads the model, prices and
+# features (possibly downloading them), which must not block the event loop
 router = APIRouter(prefix="/api/etf-recommendation", tags=["ETF Recommendation"])
 
 
+def _to_response(result: dict) -> RecommendationResponse:
+    return RecommendationResponse(
+        date=result["date"],
+        total_amount=result["total_amount"],
+        strategy=result["strategy"],
+        expected_2y_return=result["expected_2y_return"],
+        allocations=[
+            {
+                "ETF": item["ETF"],
+                "forecast_2y": item["forecast_2y"],
+                "weight": item["Weight"],
+                "amount_eur": item["Amount_EUR"],
+                "reason": item["reason"],
+            }
+            for item in result["allocations"]
+        ],
+    )
+
+
 # 1. Preview: Get recommendation WITHOUT saving to DB
 @router.post("/preview", response_model=RecommendationResponse)
-async def preview_recommendation(request: RecommendationRequest):
+def preview_recommendation(request: RecommendationRequest):
     try:
         result = get_recommendation(amount=request.amount_eur)
 
-        return RecommendationResponse(
-            date=result["date"],
-            total_amount=result["total_amount"],
-            strategy=result["strategy"],
-            expected_2y_return=result["expected_2y_return"],
-            allocations=[
-                {
-                    "ETF": item["ETF"],
-                    "forecast_2y": item["forecast_2y"],
-                    "weight": item["Weight"],
-                    "amount_eur": item["Amount_EUR"],
-                    "reason": item["reason"],
-                }
-                for item in result["allocations"]
-            ],
+        return _to_response(result)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Preview failed: {str(e)}")
+
+
+# 1b. Preview many amounts and/or dates at once (each trading day is scored once)
+@router.post("/preview/batch", response_model=List[RecommendationResponse])
+def preview_recommendations(request: BatchRecommendationRequest):
+    try:
+        results = get_recommendations(
+            [(item.amount_eur, item.specific_date) for item in request.items]
         )
+        return [_to_response(result) for result in results]
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Preview failed: {str(e)}")
 
 
 # 2. Confirm: Get recommendation AND save to database
 @router.post("/confirm", response_model=RecommendationResponse)
-async def confirm_recommendation(request: RecommendationRequest, db: Session = Depends(get_db)):
+def confirm_recommendation(
+    request: RecommendationRequest,
+    user_id: UUID = Depends(get_current_user_id),
+    db: Session = Depends(get_db),
+):
     try:
         result = get_recommendation(amount=request.amount_eur)
 
-        # Save to your existing Recommendation table
-        db_rec = Recommendation(
-            user_id=request.user_id,
-            amount_eur=request.amount_eur,
-            portfolio=result["allocations"],
-            expected_2y_return=result["expected_2y_return"],
-            strategy=result["strategy"],
-            recommendation_date=datetime.utcnow(),
+        # Save to your existing Recommendation table (nothing is read back: no refresh)
+        db.execute(
+            insert(Recommendation).values(
+                user_id=str(user_id),  # the token's user, not the body's
+                amount_eur=request.amount_eur,
+                portfolio=result["allocations"],
+                expected_2y_return=result["expected_2y_return"],
+                strategy=result["strategy"],
+                recommendation_date=datetime.utcnow(),
+            )
         )
-        db.add(db_rec)
         db.commit()
-        db.refresh(db_rec)
 
         # Return the same clean response as preview
-        return RecommendationResponse(
-            date=result["date"],
-            total_amount=result["total_amount"],
-            strategy=result["strategy"],
-            expected_2y_return=result["expected_2y_return"],
-            allocations=[
-                {
-                    "ETF": item["ETF"],
-                    "forecast_2y": item["forecast_2y"],
-                    "weight": item["Weight"],
-                    "amount_eur": item["Amount_EUR"],
-                    "reason": item["reason"],
-                }
-                for item in result["allocations"]
-            ],
-        )
+        return _to_response(result)
 
     except Exception as e:
         db.rollback()  # Important: rollback on error
@@ -79,7 +90,13 @@ async def confirm_recommendation(request: RecommendationRequest, db: Session = D
 
 # Optional: View user's investment history
 @router.get("/history/{user_id}")
-def get_history(user_id: str, db: Session = Depends(get_db)):
+def get_history(
+    user_id: str,
+    current_user_id: UUID = Depends(get_current_user_id),
+    db: Session = Depends(get_db),
+):
+    if user_id != str(current_user_id):
+        raise HTTPException(status_code=403, detail="Not allowed for this user")
     recs = (
         db.query(Recommendation)
         .filter(Recommendation.user_id == user_id)
@@ -1,7 +1,7 @@
 # services/Model_ETF/schemas.py
 
-from pydantic import BaseModel
-from typing import List
+from pydantic import BaseModel, Field
+from typing import List, Optional
 from datetime import date
 
 
@@ -23,5 +23,14 @@ class RecommendationResponse(BaseModel):
 
 
 class RecommendationRequest(BaseModel):
-    user_id: str
-    amount_eur: float
\ No newline at end of file
+    user_id: Optional[str] = None  # ignored: confirm stores the authenticated user
+    amount_eur: float
+
+
+class RecommendationQuery(BaseModel):
+    amount_eur: float
+    specific_date: Optional[date] = None  # latest trading day when omitted
+
+
+class BatchRecommendationRequest(BaseModel):
+    items: List[RecommendationQuery] = Field(..., min_length=1, max_length=1000)
@@ -0,0 +1,121 @@
+"""
+dependencies.py - Authentication dependencies for user-scoped routes.
+
+``get_current_user_id`` reads the bearer token, verifies it and returns the
+user id from its ``sub`` claim. Verified claims are kept in a bounded LRU keyed
+by the SHA-256 of the token until the token's ``exp``, so a client reusing its
+token costs one hash and a dictionary lookup instead of a JWT decode and HMAC
+check per request.
+"""
+from collections import OrderedDict
+from typing import Optional
+from uuid import UUID
+import hashlib
+import logging
+import os
+import threading
+import time
+
+from fastapi import Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from jose import JWTError
+
+from .utils import decode_access_token
+
+logger = logging.getLogger(__name__)
+
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "10000"))
+
+
+class TokenCache:
+    """Verified JWT claims by token hash, evicted by LRU or at token expiry"""
+
+    def __init__(self, maxsize: int = AUTH_TOKEN_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # sha256(token) -> (claims, exp)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode("utf-8")).digest()
+
+    def get(self, token: str) -> Optional[dict]:
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                claims, exp = entry
+                if exp > time.time():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return claims
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, token: str, claims: dict):
+        exp = claims.get("exp")
+        if not isinstance(exp, (int, float)):
+            return  # never cache a token that does not expire
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (claims, exp)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+token_cache = TokenCache()
+
+bearer_scheme = HTTPBearer(auto_error=False)
+
+
+def _unauthorized(detail: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=detail,
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def verify_access_token(token: str) -> dict:
+    """Claims of a valid token, served from the cache when it was verified before"""
+    claims = token_cache.get(token)
+    if claims is not None:
+        return claims
+    try:
+        claims = decode_access_token(token)
+    except JWTError as e:
+        logger.warning(f" Rejected access token: {str(e)}")
+        raise _unauthorized("Invalid or expired token")
+    token_cache.put(token, claims)
+    return claims
+
+
+async def get_current_user_id(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme),
+) -> UUID:
+    """Authenticated user's id from the Authorization: Bearer header"""
+    if credentials is None:
+        raise _unauthorized("Not authenticated")
+    claims = verify_access_token(credentials.credentials)
+    try:
+        return UUID(claims["sub"])
+    except (KeyError, TypeError, ValueError):
+        raise _unauthorized("Invalid token subject")
@@ -3,10 +3,13 @@ from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 import logging
 
+from api_gateway.admin import require_admin
 from database.database import get_db
+from database.persistence import insert_returning
 from .models import User
 from .schemas import UserRegister, UserLogin, UserResponse, AuthResponse
-from .utils import hash_password, verify_password, create_access_token
+from .user_cache import user_cache
+from .utils import hash_password_async, verify_and_update_async, create_access_token
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -31,23 +34,17 @@ async def health_check():
 async def register(user_data: UserRegister, db: Session = Depends(get_db)):
     """Register a new user"""
     try:
-        # Check if email already exists
-        existing_user = db.query(User).filter(User.email == user_data.email).first()
-        if existing_user:
-            logger.warning(f" Registration failed: Email already exists - {user_data.email}")
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered"
-            )
-
-        # Create new user
-        new_user = User(
+        # Duplicate emails are rejected by the unique constraint (IntegrityError below)
+        new_user = insert_returning(
+            db,
+            User,
             email=user_data.email,
             phone=user_data.phone,
-            password_hash=hash_password(user_data.password),
+            password_hash=await hash_password_async(user_data.password),
         )
-        db.add(new_user)
         db.commit()
-        db.refresh(new_user)
+
+        user_cache.add(new_user)
 
         # Create access token
         access_token = create_access_token(data={"sub": new_user.user_id})
@@ -58,7 +55,7 @@ async def register(user_data: UserRegister, db: Session = Depends(get_db)):
 
     except IntegrityError:
         db.rollback()
-        logger.error(f" Integrity error during registration: {user_data.email}")
+        logger.warning(f" Registration failed: Email already exists - {user_data.email}")
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered"
         )
@@ -78,12 +75,24 @@ async def login(credentials: UserLogin, db: Session = Depends(get_db)):
     try:
         user = db.query(User).filter(User.email == credentials.email).first()
 
-        if not user or not verify_password(credentials.password, user.password_hash):
+        valid, new_hash = (False, None)
+        if user:
+            valid, new_hash = await verify_and_update_async(
+                credentials.password, user.password_hash
+            )
+
+        if not valid:
             logger.warning(f" Login failed: Invalid credentials - {credentials.email}")
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid email or password"
             )
 
+        if new_hash:
+            # Stored hash used outdated argon2 parameters
+            user.password_hash = new_hash
+            db.commit()
+            logger.info(f" Password hash upgraded: {user.user_id}")
+
         access_token = create_access_token(data={"sub": user.user_id})
 
         logger.info(f" User logged in successfully: {user.user_id} - {user.email}")
@@ -102,14 +111,14 @@ async def login(credentials: UserLogin, db: Session = Depends(get_db)):
 async def get_user(user_id: str, db: Session = Depends(get_db)):
     """Get user information by user_id"""
     try:
-        user = db.query(User).filter(User.user_id == user_id).first()
+        user = user_cache.get(db, user_id)
 
         if not user:
             logger.warning(f" User not found: {user_id}")
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
 
         logger.info(f" User retrieved: {user_id}")
-        return UserResponse.from_orm(user)
+        return user
     except HTTPException:
         raise
     except Exception as e:
@@ -123,7 +132,7 @@ async def get_user(user_id: str, db: Session = Depends(get_db)):
 async def verify_user(user_id: str, db: Session = Depends(get_db)):
     """Verify if user exists"""
     try:
-        user = db.query(User).filter(User.user_id == user_id).first()
+        user = user_cache.get(db, user_id)
 
         if not user:
             logger.warning(f" User verification failed: {user_id}")
@@ -136,3 +145,8 @@ async def verify_user(user_id: str, db: Session = Depends(get_db)):
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error verifying user"
         )
+
+
+@router.get("/cache-stats", summary="User cache hit ratios", dependencies=[Depends(require_admin)])
+async def get_user_cache_stats():
+    return user_cache.stats()
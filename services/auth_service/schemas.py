@@ -1,5 +1,5 @@
 # auth_service/schemas.py
-from pydantic import BaseModel, EmailStr, ConfigDict
+from pydantic import BaseModel, EmailStr, ConfigDict, field_validator
 from datetime import datetime
 from typing import Optional
 from uuid import UUID
@@ -20,13 +20,16 @@ class UserResponse(BaseModel):
     created_at: datetime
     
     model_config = ConfigDict(from_attributes=True)
-    
+
+    @field_validator('user_id', mode='before')
+    @classmethod
+    def stringify_user_id(cls, value):
+        """Convert UUID to string (without touching the ORM object)"""
+        return str(value) if isinstance(value, UUID) else value
+
     @classmethod
     def from_orm(cls, obj):
-        """Convert UUID to string"""
-        if hasattr(obj, 'user_id') and isinstance(obj.user_id, UUID):
-            obj.user_id = str(obj.user_id)
-        return super().from_orm(obj)
+        return cls.model_validate(obj)
 
 class AuthResponse(BaseModel):
     user: UserResponse
@@ -0,0 +1,216 @@
+# auth_service/user_cache.py
+"""
+In-memory user lookups for /me and /verify.
+
+Known users are kept in a TTL'd LRU. Unknown ids are answered by a Bloom
+filter of every existing user_id: if the id is not in the filter the user
+cannot exist, so the database is never queried for it. The filter is primed
+from the users table by a background job and then topped up incrementally;
+register adds the new id immediately in the worker that created it, so other
+workers may miss a brand-new user for at most USER_CACHE_REFRESH_INTERVAL
+seconds.
+"""
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Optional
+from uuid import UUID
+import hashlib
+import logging
+import math
+import os
+import threading
+import time
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from database.database import SessionLocal
+from .models import User
+from .schemas import UserResponse
+
+logger = logging.getLogger(__name__)
+
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "300"))
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+USER_BLOOM_ERROR_RATE = float(os.getenv("USER_BLOOM_ERROR_RATE", "0.001"))
+USER_BLOOM_MIN_CAPACITY = 100_000
+# New rows are picked up with this overlap, so users whose transaction committed
+# after a newer created_at was already seen are not missed
+REFRESH_OVERLAP = timedelta(minutes=5)
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over UUIDs (no false negatives)"""
+
+    def __init__(self, capacity: int, error_rate: float = USER_BLOOM_ERROR_RATE):
+        self.capacity = max(1, capacity)
+        self.error_rate = error_rate
+        self.size = max(8, int(-self.capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, user_id: UUID):
+        digest = hashlib.blake2b(user_id.bytes, digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, user_id: UUID):
+        for position in self._positions(user_id):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, user_id: UUID) -> bool:
+        return all(self._bits[p >> 3] & (1 << (p & 7)) for p in self._positions(user_id))
+
+    def stats(self) -> dict:
+        fill = 1 - math.exp(-self.hashes * self.count / self.size)
+        return {
+            "capacity": self.capacity,
+            "count": self.count,
+            "bytes": len(self._bits),
+            "hashes": self.hashes,
+            "estimated_false_positive_rate": round(fill**self.hashes, 6),
+        }
+
+
+class UserCache:
+    """Positive LRU of UserResponse plus a Bloom filter of every known user_id"""
+
+    def __init__(self, maxsize: int = USER_CACHE_SIZE, ttl: float = USER_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # UUID -> (UserResponse, expires_at)
+        self._bloom: Optional[BloomFilter] = None  # None until primed: every miss hits the DB
+        self._watermark: Optional[datetime] = None
+        self._added_during_rebuild: Optional[set] = None
+        self._stats = {"hits": 0, "negative_hits": 0, "db_lookups": 0, "db_not_found": 0}
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+    def _remember(self, user: UserResponse, user_id: UUID):
+        with self._lock:
+            self._entries[user_id] = (user, time.monotonic() + self.ttl)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+            # Re-adding a known id would inflate the count and trigger early rebuilds
+            if self._bloom is not None and user_id not in self._bloom:
+                self._bloom.add(user_id)
+            if self._added_during_rebuild is not None:
+                self._added_during_rebuild.add(user_id)
+
+    def get(self, db: Session, user_id) -> Optional[UserResponse]:
+        """The user, or None if it does not exist"""
+        try:
+            user_id = user_id if isinstance(user_id, UUID) else UUID(str(user_id))
+        except ValueError:
+            self._count("negative_hits")
+            return None
+
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[1] > time.monotonic():
+                self._entries.move_to_end(user_id)
+                self._stats["hits"] += 1
+                return entry[0]
+            bloom = self._bloom
+            if bloom is not None and user_id not in bloom:
+                self._stats["negative_hits"] += 1
+                return None
+
+        self._count("db_lookups")
+        user = db.query(User).filter(User.user_id == user_id).first()
+        if user is None:
+            self._count("db_not_found")
+            return None
+        response = UserResponse.from_orm(user)
+        self._remember(response, user_id)
+        return response
+
+    def add(self, user: User):
+        """Register hook: cache the new user and mark its id as known"""
+        user_id = user.user_id if isinstance(user.user_id, UUID) else UUID(str(user.user_id))
+        self._remember(UserResponse.from_orm(user), user_id)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(UUID(str(user_id)), None)
+
+    def rebuild(self, db: Session):
+        """Build a fresh filter from every user_id and swap it in"""
+        with self._lock:
+            self._added_during_rebuild = set()
+        try:
+            total = db.execute(select(func.count()).select_from(User)).scalar_one()
+            # Headroom so incremental adds keep the error rate until the next rebuild
+            bloom = BloomFilter(max(USER_BLOOM_MIN_CAPACITY, total * 2))
+            watermark = None
+            rows = db.execute(
+                select(User.user_id, User.created_at).execution_options(yield_per=10_000)
+            )
+            for user_id, created_at in rows:
+                bloom.add(user_id if isinstance(user_id, UUID) else UUID(str(user_id)))
+                if watermark is None or created_at > watermark:
+                    watermark = created_at
+        except Exception:
+            with self._lock:
+                self._added_during_rebuild = None
+            raise
+        with self._lock:
+            # Registered in this worker after the scan started
+            for user_id in self._added_during_rebuild:
+                if user_id not in bloom:
+                    bloom.add(user_id)
+            self._added_during_rebuild = None
+            self._bloom = bloom
+            self._watermark = watermark
+        logger.info(f" User bloom filter rebuilt: {bloom.count} ids")
+
+    def refresh(self, db: Session):
+        """Add users created since the last refresh; rebuild when unprimed or over capacity"""
+        bloom = self._bloom
+        if bloom is None or bloom.count >= bloom.capacity:
+            self.rebuild(db)
+            return
+
+        statement = select(User.user_id, User.created_at)
+        if self._watermark is not None:
+            statement = statement.where(User.created_at >= self._watermark - REFRESH_OVERLAP)
+        watermark = self._watermark
+        for user_id, created_at in db.execute(statement):
+            user_id = user_id if isinstance(user_id, UUID) else UUID(str(user_id))
+            with self._lock:
+                if user_id not in bloom:
+                    bloom.add(user_id)
+            if watermark is None or created_at > watermark:
+                watermark = created_at
+        self._watermark = watermark
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["cached_users"] = len(self._entries)
+            bloom = self._bloom.stats() if self._bloom is not None else None
+        lookups = stats["hits"] + stats["negative_hits"] + stats["db_lookups"]
+        stats["hit_ratio"] = (
+            round((stats["hits"] + stats["negative_hits"]) / lookups, 4) if lookups else 0.0
+        )
+        stats["bloom"] = bloom
+        return stats
+
+
+user_cache = UserCache()
+
+
+def user_cache_job():
+    """Background entry point: prime the Bloom filter, then keep it current"""
+    db = SessionLocal()
+    try:
+        user_cache.refresh(db)
+    finally:
+        db.close()
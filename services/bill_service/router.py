@@ -1,12 +1,14 @@
 from fastapi import APIRouter, HTTPException, Depends, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy import desc, select
 from typing import List
 from uuid import UUID
 import logging
 
 from database.database import get_db
-from .models import Bill
+from database.persistence import insert_returning, update_returning
+from services.auth_service.dependencies import get_current_user_id
+from .models import Bill, Account
 from .schemas import BillCreate, BillUpdate, BillResponse, BillStats
 
 # Configuration du logging
@@ -16,6 +18,15 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/bills", tags=["Bills"])
 
 
+def _owned_accounts(user_id: UUID):
+    return select(Account.account_id).where(Account.user_id == user_id)
+
+
+def _user_bills(db: Session, user_id: UUID):
+    """Factures des comptes de l'utilisateur authentifié"""
+    return db.query(Bill).filter(Bill.account_id.in_(_owned_accounts(user_id)))
+
+
 @router.get("/health")
 async def health_check():
     """Vérifier la santé du service"""
@@ -25,15 +36,27 @@ async def health_check():
 @router.post(
     "/", response_model=BillResponse, status_code=201, summary="Créer une nouvelle facture"
 )
-async def create_bill(bill: BillCreate, db: Session = Depends(get_db)):
+async def create_bill(
+    bill: BillCreate,
+    user_id: UUID = Depends(get_current_user_id),
+    db: Session = Depends(get_db),
+):
     """Créer une nouvelle facture"""
     try:
-        new_bill = Bill(**bill.model_dump())
-        db.add(new_bill)
+        owned = (
+            db.query(Account.account_id)
+            .filter(Account.account_id == bill.account_id, Account.user_id == user_id)
+            .first()
+        )
+        if not owned:
+            raise HTTPException(status_code=404, detail="Compte non trouvé")
+
+        new_bill = insert_returning(db, Bill, **bill.model_dump())
         db.commit()
-        db.refresh(new_bill)
         logger.info(f" Facture créée: {new_bill.bill_id} - {new_bill.merchant}")
         return new_bill
+    except HTTPException:
+        raise
     except Exception as e:
         db.rollback()
         logger.error(f" Erreur création facture: {str(e)}")
@@ -46,11 +69,12 @@ async def list_bills(
     status: str = Query(None, regex="^(pending|paid|overdue)$", description="Filtrer par statut"),
     limit: int = Query(100, ge=1, le=1000),
     offset: int = Query(0, ge=0),
+    user_id: UUID = Depends(get_current_user_id),
     db: Session = Depends(get_db),
 ):
     """Récupérer la liste des factures avec filtres optionnels"""
     try:
-        query = db.query(Bill)
+        query = _user_bills(db, user_id)
 
         if account_id:
             query = query.filter(Bill.account_id == account_id)
@@ -75,11 +99,12 @@ async def get_bills_by_account(
     account_id: UUID,
     status: str = Query(None, regex="^(pending|paid|overdue)$"),
     limit: int = Query(100, ge=1, le=1000),
+    user_id: UUID = Depends(get_current_user_id),
     db: Session = Depends(get_db),
 ):
     """Récupérer toutes les factures d'un compte spécifique"""
     try:
-        query = db.query(Bill).filter(Bill.account_id == account_id)
+        query = _user_bills(db, user_id).filter(Bill.account_id == account_id)
 
         if status:
             query = query.filter(Bill.status == status)
@@ -97,10 +122,12 @@ async def get_bills_by_account(
 
 
 @router.get("/{bill_id}", response_model=BillResponse, summary="Récupérer une facture")
-async def get_bill(bill_id: UUID, db: Session = Depends(get_db)):
+async def get_bill(
+    bill_id: UUID, user_id: UUID = Depends(get_current_user_id), db: Session = Depends(get_db)
+):
     """Récupérer les détails d'une facture spécifique"""
     try:
-        bill = db.query(Bill).filter(Bill.bill_id == bill_id).first()
+        bill = _user_bills(db, user_id).filter(Bill.bill_id == bill_id).first()
         if not bill:
             logger.warning(f" Facture non trouvée: {bill_id}")
             raise HTTPException(status_code=404, detail="Facture non trouvée")
@@ -113,20 +140,26 @@ async def get_bill(bill_id: UUID, db: Session = Depends(get_db)):
 
 
 @router.patch("/{bill_id}", response_model=BillResponse, summary="Mettre à jour une facture")
-async def update_bill(bill_id: UUID, bill_update: BillUpdate, db: Session = Depends(get_db)):
+async def update_bill(
+    bill_id: UUID,
+    bill_update: BillUpdate,
+    user_id: UUID = Depends(get_current_user_id),
+    db: Session = Depends(get_db),
+):
     """Mettre à jour une facture"""
     try:
-        bill = db.query(Bill).filter(Bill.bill_id == bill_id).first()
+        bill = update_returning(
+            db,
+            Bill,
+            Bill.bill_id == bill_id,
+            Bill.account_id.in_(_owned_accounts(user_id)),
+            **bill_update.model_dump(exclude_unset=True),
+        )
         if not bill:
             logger.warning(f" Facture non trouvée: {bill_id}")
             raise HTTPException(status_code=404, detail="Facture non trouvée")
 
-        update_data = bill_update.model_dump(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(bill, field, value)
-
         db.commit()
-        db.refresh(bill)
         logger.info(f" Facture mise à jour: {bill_id}")
         return bill
     except HTTPException:
@@ -138,10 +171,12 @@ async def update_bill(bill_id: UUID, bill_update: BillUpdate, db: Session = Depe
 
 
 @router.delete("/{bill_id}", status_code=204, summary="Supprimer une facture")
-async def delete_bill(bill_id: UUID, db: Session = Depends(get_db)):
+async def delete_bill(
+    bill_id: UUID, user_id: UUID = Depends(get_current_user_id), db: Session = Depends(get_db)
+):
     """Supprimer une facture"""
     try:
-        bill = db.query(Bill).filter(Bill.bill_id == bill_id).first()
+        bill = _user_bills(db, user_id).filter(Bill.bill_id == bill_id).first()
         if not bill:
             logger.warning(f" Facture non trouvée: {bill_id}")
             raise HTTPException(status_code=404, detail="Facture non trouvée")
@@ -163,10 +198,12 @@ async def delete_bill(bill_id: UUID, db: Session = Depends(get_db)):
     response_model=BillStats,
     summary="Statistiques des factures",
 )
-async def get_bills_stats(account_id: UUID, db: Session = Depends(get_db)):
+async def get_bills_stats(
+    account_id: UUID, user_id: UUID = Depends(get_current_user_id), db: Session = Depends(get_db)
+):
     """Obtenir les statistiques des factures d'un compte"""
     try:
-        bills = db.query(Bill).filter(Bill.account_id == account_id).all()
+        bills = _user_bills(db, user_id).filter(Bill.account_id == account_id).all()
 
         total_amount = sum(float(bill.amount) for bill in bills)
         pending_amount = sum(float(bill.amount) for bill in bills if bill.status == "pending")
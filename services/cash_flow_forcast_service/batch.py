@@ -0,0 +1,175 @@
+"""
+batch.py - Nightly bulk cash-flow forecast for every user.
+
+Users are streamed by keyset on user_id in chunks of FORECAST_CHUNK_SIZE. For
+each chunk the inputs are built with a handful of set-based queries, scored in
+one ``predict_batch`` call and stored with a single multi-row upsert. The
+chunk's predictions and the run checkpoint (``cash_flow_forecast_run``) commit
+together, so a crashed or restarted run resumes after the last committed chunk
+without duplicating rows. A Postgres advisory lock keeps concurrent workers
+from running the same night twice.
+
+Runs from the API's background worker after FORECAST_RUN_HOUR (UTC), or by hand:
+    python -m services.cash_flow_forcast_service.batch --chunk-size 2000
+"""
+from datetime import date, datetime
+from typing import Optional
+import argparse
+import logging
+import os
+import resource
+import time
+
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session
+
+from database.database import SessionLocal, add_predictions, engine
+from services.auth_service.models import User
+from .inputs import FIGURES, build_inputs, input_hash
+from .models import CashFlowForecastRun
+from .prediction import predictor_model
+
+logger = logging.getLogger(__name__)
+
+FORECAST_CHUNK_SIZE = int(os.getenv("FORECAST_CHUNK_SIZE", "1000"))
+FORECAST_RUN_HOUR = int(os.getenv("FORECAST_RUN_HOUR", "2"))
+FORECAST_LOCK_KEY = 4_040_001  # pg advisory lock id for the nightly run
+
+
+def _rss_mb() -> float:
+    """Current resident set size (peak RSS where /proc is unavailable)"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _checkpoint(db: Session, run_date: date) -> CashFlowForecastRun:
+    run = db.get(CashFlowForecastRun, run_date)
+    if run is None:
+        now = datetime.utcnow()
+        run = CashFlowForecastRun(
+            run_date=run_date, users_processed=0, started_at=now, updated_at=now
+        )
+        db.add(run)
+        db.commit()
+    return run
+
+
+def score_chunk(db: Session, user_ids, as_of: date, timestamp: datetime) -> int:
+    """Predict for one chunk of users and upsert the rows (no commit)"""
+    inputs = build_inputs(db, user_ids, as_of=as_of)
+    predictor = predictor_model.current()
+    pred = predictor.model.predict_batch(inputs)
+    rows = [
+        {
+            "user_id": user_id,
+            "predicted_income": round(float(inputs["monthly_income_usd"][i]), 2),
+            "predicted_expenses": round(float(inputs["monthly_expenses_usd"][i]), 2),
+            "predicted_balance": round(float(pred["net_cashflow"][i]), 2),
+            "confidence": float(pred["risk_probability"][i]),
+            "cashflow_risk": int(pred["cashflow_risk"][i]),
+            "risk_level": str(pred["risk_level"][i]),
+            "input_hash": input_hash(
+                {figure: inputs[figure][i] for figure in FIGURES}, predictor.version
+            ),
+            "timestamp": timestamp,
+        }
+        for i, user_id in enumerate(user_ids)
+    ]
+    # Users whose inputs did not change since the last run only get last_seen_at bumped
+    add_predictions(db, rows)
+    return len(rows)
+
+
+def run_forecast(
+    db: Session, run_date: Optional[date] = None, chunk_size: int = FORECAST_CHUNK_SIZE
+) -> dict:
+    """Run (or resume) the forecast for `run_date`; returns throughput stats"""
+    run = _checkpoint(db, run_date or datetime.utcnow().date())
+    stats = {"run_date": str(run.run_date), "users": 0, "chunks": 0, "seconds": 0.0}
+    if run.finished_at is not None:
+        stats["skipped"] = True
+        return stats
+
+    if run.last_user_id is not None:
+        logger.info(f" Resuming forecast {run.run_date} after {run.users_processed} users")
+    started = time.perf_counter()
+    while True:
+        chunk_started = time.perf_counter()
+        statement = select(User.user_id).order_by(User.user_id).limit(chunk_size)
+        if run.last_user_id is not None:
+            statement = statement.where(User.user_id > run.last_user_id)
+        user_ids = db.execute(statement).scalars().all()
+
+        now = datetime.utcnow()
+        if not user_ids:
+            run.finished_at = now
+            run.updated_at = now
+            db.commit()
+            break
+
+        try:
+            scored = score_chunk(db, user_ids, run.run_date, now)
+            run.last_user_id = user_ids[-1]
+            run.users_processed += scored
+            run.updated_at = now
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+        elapsed = time.perf_counter() - chunk_started
+        stats["users"] += scored
+        stats["chunks"] += 1
+        logger.info(
+            f" Forecast chunk {stats['chunks']}: {scored} users in {elapsed:.2f}s "
+            f"({scored / elapsed:.0f} users/s), RSS {_rss_mb():.0f} MB"
+        )
+
+    stats["seconds"] = round(time.perf_counter() - started, 3)
+    stats["users_per_second"] = round(stats["users"] / stats["seconds"], 1) if stats["users"] else 0
+    logger.info(f" Forecast {run.run_date} finished: {stats}")
+    return stats
+
+
+def run_locked(run_date: Optional[date] = None, chunk_size: int = FORECAST_CHUNK_SIZE):
+    """run_forecast under the advisory lock; returns None if another worker holds it"""
+    with engine.connect() as lock_conn:
+        if engine.dialect.name == "postgresql":
+            acquired = lock_conn.execute(
+                text("SELECT pg_try_advisory_lock(:key)"), {"key": FORECAST_LOCK_KEY}
+            ).scalar()
+            lock_conn.commit()
+            if not acquired:
+                return None
+        db = SessionLocal()
+        try:
+            return run_forecast(db, run_date, chunk_size)
+        finally:
+            db.close()
+            if engine.dialect.name == "postgresql":
+                lock_conn.execute(
+                    text("SELECT pg_advisory_unlock(:key)"), {"key": FORECAST_LOCK_KEY}
+                )
+                lock_conn.commit()
+
+
+def forecast_job():
+    """Background entry point: start or resume tonight's run once FORECAST_RUN_HOUR has passed"""
+    if datetime.utcnow().hour < FORECAST_RUN_HOUR:
+        return
+    run_locked()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Bulk cash-flow forecast for all users")
+    parser.add_argument("--chunk-size", type=int, default=FORECAST_CHUNK_SIZE)
+    parser.add_argument(
+        "--date", type=date.fromisoformat, default=None, help="run date (YYYY-MM-DD)"
+    )
+    args = parser.parse_args()
+    result = run_locked(args.date, args.chunk_size)
+    print(result if result is not None else "Another forecast run holds the lock")
@@ -0,0 +1,115 @@
+"""
+history.py - Prediction history reads for charts and the history screen.
+
+Raw pages are fetched by keyset on (prediction_date, prediction_id), newest
+first, so a page costs the same however deep the client scrolls. With a
+bucket, Postgres groups the predictions by ``date_trunc`` and returns one
+aggregated point per day/week/month, paginated by the bucket start. Numeric
+columns are cast to float in SQL so rows come back ready to serialize.
+"""
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+import base64
+
+from sqlalchemy import Float, func, select, tuple_
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.orm import Session
+
+from shared.cursors import InvalidCursor, decode_cursor, encode_cursor
+from .models import CashFlowPredictionDB
+
+BUCKETS = ("day", "week", "month")
+
+
+def _encode_period(period: datetime) -> str:
+    return base64.urlsafe_b64encode(period.isoformat().encode()).decode()
+
+
+def _decode_period(cursor: str) -> datetime:
+    try:
+        return datetime.fromisoformat(base64.urlsafe_b64decode(cursor.encode()).decode())
+    except (ValueError, UnicodeDecodeError) as e:
+        raise InvalidCursor(str(e))
+
+
+def _limited(statement, limit: Optional[int]):
+    """One row past the page tells whether another page follows; None reads every row"""
+    return statement if limit is None else statement.limit(limit + 1)
+
+
+def _page(rows, limit: Optional[int], cursor_of) -> dict:
+    items, more = rows[:limit], limit is not None and len(rows) > limit
+    return {
+        "items": [row._asdict() for row in items],
+        "next_cursor": cursor_of(items[-1]) if more else None,
+    }
+
+
+def list_predictions(
+    db: Session, user_id: UUID, limit: Optional[int] = 50, cursor: Optional[str] = None
+) -> dict:
+    """One page of the user's predictions, newest first"""
+    prediction = CashFlowPredictionDB
+    statement = select(
+        prediction.prediction_id,
+        prediction.predicted_income.cast(Float).label("income"),
+        prediction.predicted_expenses.cast(Float).label("expenses"),
+        prediction.predicted_balance.cast(Float).label("balance"),
+        prediction.confidence.cast(Float).label("confidence"),
+        prediction.risk_level,
+        prediction.prediction_date.label("date"),
+        func.coalesce(prediction.last_seen_at, prediction.prediction_date).label("last_seen"),
+    ).where(prediction.user_id == user_id)
+    if cursor:
+        after_date, after_id = decode_cursor(cursor)
+        statement = statement.where(
+            tuple_(prediction.prediction_date, prediction.prediction_id)
+            < tuple_(after_date, after_id)
+        )
+
+    statement = statement.order_by(
+        prediction.prediction_date.desc(), prediction.prediction_id.desc()
+    )
+    rows = db.execute(_limited(statement, limit)).all()
+    return _page(rows, limit, lambda row: encode_cursor(row.date, row.prediction_id))
+
+
+def bucketed_predictions(
+    db: Session,
+    user_id: UUID,
+    bucket: str,
+    limit: Optional[int] = 50,
+    cursor: Optional[str] = None,
+) -> dict:
+    """One aggregated point per `bucket` (day/week/month), newest first"""
+    if bucket not in BUCKETS:
+        raise ValueError(f"bucket must be one of {BUCKETS}")
+    prediction = CashFlowPredictionDB
+    period = func.date_trunc(bucket, prediction.prediction_date)
+    balance = prediction.predicted_balance.cast(Float)
+
+    statement = (
+        select(
+            period.label("period"),
+            func.count().label("count"),
+            # Balance of the latest prediction in the bucket
+            func.array_agg(aggregate_order_by(balance, prediction.prediction_date.desc()))[1].label(
+                "balance_last"
+            ),
+            func.avg(balance).label("balance_avg"),
+            func.min(balance).label("balance_min"),
+            func.max(balance).label("balance_max"),
+            func.avg(prediction.predicted_income).cast(Float).label("income_avg"),
+            func.avg(prediction.predicted_expenses).cast(Float).label("expenses_avg"),
+            func.avg(prediction.confidence).cast(Float).label("confidence_avg"),
+        )
+        .where(prediction.user_id == user_id)
+        .group_by(period)
+    )
+    if cursor:
+        # Buckets start at the cursor period, so this equals period < cursor but uses the index
+        statement = statement.where(prediction.prediction_date < _decode_period(cursor))
+
+    rows = db.execute(_limited(statement.order_by(period.desc()), limit)).all()
+    return _page(rows, limit, lambda row: _encode_period(row.period))
@@ -0,0 +1,244 @@
+"""
+horizon.py - Month-by-month cash-flow projection, 1 to MAX_HORIZON months ahead.
+
+For every user we read HISTORY_MONTHS of credit/debit totals from
+``transaction_monthly_rollup`` and fit, per user and per series, an
+exponentially weighted linear trend (closed form, no loop over users). The
+trend is damped and projected forward; pending bills already known for a
+future month are added where they exceed the usual recurring level (past
+bill payments are already part of the debit history). The balance path is
+the current balance plus the cumulative net, with a band widening with the
+square root of the horizon from the residual spread of the past net flows.
+
+Everything is a (users, months) NumPy array, so scoring 1 or 100k users is
+the same code. Model parameters come from ``trained_models/horizon.json``
+when present and are loaded once per process.
+"""
+from datetime import date
+from functools import lru_cache
+from typing import Dict, List, Optional
+from uuid import UUID
+import json
+import logging
+import os
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from services.wallet_service.models import Account, Bill, TransactionMonthlyRollup
+from .inputs import build_inputs
+
+logger = logging.getLogger(__name__)
+
+MAX_HORIZON = 12
+HISTORY_MONTHS = int(os.getenv("CASHFLOW_HISTORY_MONTHS", "12"))
+HORIZON_MODEL_PATH = os.getenv(
+    "CASHFLOW_HORIZON_MODEL", os.path.join("trained_models", "horizon.json")
+)
+
+DEFAULT_PARAMS = {
+    "decay": 0.85,  # weight of a month relative to the next one when fitting the trend
+    "damping": 0.8,  # the trend's effect shrinks by this factor every projected month
+    "band_z": 1.28,  # low/high band: ~80% interval
+}
+
+
+@lru_cache(maxsize=None)
+def load_params(path: str = HORIZON_MODEL_PATH) -> Dict[str, float]:
+    """Model parameters, read once per process (defaults when no artifact is shipped)"""
+    params = dict(DEFAULT_PARAMS)
+    try:
+        with open(path) as artifact:
+            params.update(json.load(artifact))
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError) as e:
+        logger.warning(f" Could not load horizon model {path}, using defaults: {str(e)}")
+    return params
+
+
+def _month_index(moment: date) -> int:
+    return moment.year * 12 + moment.month - 1
+
+
+def _normal_cdf(x: np.ndarray) -> np.ndarray:
+    """Standard normal CDF (Abramowitz & Stegun 7.1.26, |error| < 1.5e-7)"""
+    z = np.abs(x) / np.sqrt(2.0)
+    t = 1.0 / (1.0 + 0.3275911 * z)
+    poly = t * (
+        0.254829592 + t * (-0.284496736 + t * (1.421413741 + t * (-1.453152027 + t * 1.061405429)))
+    )
+    erf = 1.0 - poly * np.exp(-z * z)
+    return 0.5 * (1.0 + np.sign(x) * erf)
+
+
+def _weighted_trend(series: np.ndarray, weights: np.ndarray):
+    """Per-row weighted least squares: (level at the last month, slope, residual std)"""
+    months = series.shape[1]
+    t = np.arange(months, dtype=np.float64) - (months - 1)  # last observed month is t=0
+    total = weights.sum(axis=1)
+    safe_total = np.where(total > 0, total, 1.0)
+    t_mean = (weights * t).sum(axis=1) / safe_total
+    y_mean = (weights * series).sum(axis=1) / safe_total
+    dt = t - t_mean[:, None]
+    spread = (weights * dt * dt).sum(axis=1)
+    slope = np.where(
+        spread > 0,
+        (weights * dt * (series - y_mean[:, None])).sum(axis=1) / np.where(spread > 0, spread, 1),
+        0.0,
+    )
+    level = y_mean - slope * t_mean
+    residual = series - (level[:, None] + slope[:, None] * t)
+    std = np.sqrt((weights * residual * residual).sum(axis=1) / safe_total)
+    return level, slope, std
+
+
+def project(
+    credits: np.ndarray,
+    debits: np.ndarray,
+    balance: np.ndarray,
+    recurring: np.ndarray,
+    scheduled: np.ndarray,
+    months: int,
+    params: Optional[Dict[str, float]] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Project `months` ahead from monthly history.
+
+    `credits`/`debits` are (users, history) oldest month first, `balance` and
+    `recurring` (usual monthly recurring bills) are (users,), `scheduled` is
+    (users, >= months) pending bills per future month. Every output is
+    (users, months); `p_negative` is the probability the balance is below zero.
+    """
+    params = params or load_params()
+    credits = np.asarray(credits, dtype=np.float64)
+    debits = np.asarray(debits, dtype=np.float64)
+    history = credits.shape[1]
+
+    # Only fit over months since the user's first activity
+    active = np.cumsum((credits != 0) | (debits != 0), axis=1) > 0
+    weights = active * params["decay"] ** np.arange(history - 1, -1, -1, dtype=np.float64)
+
+    income_level, income_slope, _ = _weighted_trend(credits, weights)
+    expense_level, expense_slope, _ = _weighted_trend(debits, weights)
+    _, _, net_std = _weighted_trend(credits - debits, weights)
+
+    # Damped trend: month h adds slope * (phi + phi^2 + ... + phi^h)
+    damping = np.cumsum(params["damping"] ** np.arange(1, months + 1, dtype=np.float64))
+    income = np.maximum(income_level[:, None] + income_slope[:, None] * damping, 0.0)
+    expenses = np.maximum(expense_level[:, None] + expense_slope[:, None] * damping, 0.0)
+    bills = np.maximum(
+        np.asarray(scheduled, dtype=np.float64)[:, :months] - recurring[:, None], 0.0
+    )
+
+    net = income - expenses - bills
+    path = np.asarray(balance, dtype=np.float64)[:, None] + np.cumsum(net, axis=1)
+    band = net_std[:, None] * np.sqrt(np.arange(1, months + 1, dtype=np.float64))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = np.where(
+            band > 0, -path / np.where(band > 0, band, 1), np.where(path < 0, np.inf, -np.inf)
+        )
+
+    return {
+        "income": income,
+        "expenses": expenses,
+        "bills": bills,
+        "net": net,
+        "balance": path,
+        "balance_low": path - params["band_z"] * band,
+        "balance_high": path + params["band_z"] * band,
+        "p_negative": _normal_cdf(z),
+    }
+
+
+def load_history(
+    db: Session, user_ids: List[UUID], as_of: Optional[date] = None, months: int = HISTORY_MONTHS
+):
+    """(credits, debits) arrays (users, months) from the rollups, oldest month first"""
+    as_of = as_of or date.today()
+    end = _month_index(as_of)  # current (incomplete) month is excluded
+    start = end - months
+    rollup = TransactionMonthlyRollup
+    rows = db.execute(
+        select(
+            Account.user_id,
+            rollup.month,
+            func.sum(rollup.credit_total),
+            func.sum(rollup.debit_total),
+        )
+        .join(Account, Account.account_id == rollup.account_id)
+        .where(
+            Account.user_id.in_(user_ids),
+            rollup.month >= date(start // 12, start % 12 + 1, 1),
+            rollup.month < as_of.replace(day=1),
+        )
+        .group_by(Account.user_id, rollup.month)
+    ).all()
+
+    position = {user_id: i for i, user_id in enumerate(user_ids)}
+    credits = np.zeros((len(user_ids), months))
+    debits = np.zeros((len(user_ids), months))
+    if rows:
+        users = np.array([position[row[0]] for row in rows])
+        columns = np.array([_month_index(row[1]) - start for row in rows])
+        credits[users, columns] = [float(row[2] or 0) for row in rows]
+        debits[users, columns] = [float(row[3] or 0) for row in rows]
+    return credits, debits
+
+
+def load_scheduled_bills(
+    db: Session, user_ids: List[UUID], as_of: Optional[date] = None, months: int = MAX_HORIZON
+) -> np.ndarray:
+    """Pending bills per user and future month (users, months), starting next month"""
+    as_of = as_of or date.today()
+    first = _month_index(as_of) + 1
+    last = first + months
+    rows = db.execute(
+        select(Account.user_id, Bill.due_date, Bill.amount)
+        .join(Account, Account.account_id == Bill.account_id)
+        .where(
+            Account.user_id.in_(user_ids),
+            Bill.status == "pending",
+            Bill.due_date >= date(first // 12, first % 12 + 1, 1),
+            Bill.due_date < date(last // 12, last % 12 + 1, 1),
+        )
+    ).all()
+
+    position = {user_id: i for i, user_id in enumerate(user_ids)}
+    scheduled = np.zeros((len(user_ids), months))
+    if rows:
+        np.add.at(
+            scheduled,
+            (
+                np.array([position[row[0]] for row in rows]),
+                np.array([_month_index(row[1]) - first for row in rows]),
+            ),
+            [float(row[2]) for row in rows],
+        )
+    return scheduled
+
+
+def month_starts(months: int, as_of: Optional[date] = None) -> List[date]:
+    """First day of each projected month, starting next month"""
+    first = _month_index(as_of or date.today()) + 1
+    return [date((first + h) // 12, (first + h) % 12 + 1, 1) for h in range(months)]
+
+
+def forecast(
+    db: Session, user_ids: List[UUID], months: int, as_of: Optional[date] = None
+) -> Dict[str, np.ndarray]:
+    """Projection for many users at once; rows align with `user_ids`"""
+    if not 1 <= months <= MAX_HORIZON:
+        raise ValueError(f"months must be between 1 and {MAX_HORIZON}")
+    credits, debits = load_history(db, user_ids, as_of)
+    current = build_inputs(db, user_ids, as_of)
+    scheduled = load_scheduled_bills(db, user_ids, as_of, months)
+    return project(
+        credits,
+        debits,
+        current["savings_usd"],
+        current["monthly_emi_usd"],
+        scheduled,
+        months,
+    )
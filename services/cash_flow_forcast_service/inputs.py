@@ -0,0 +1,152 @@
+"""
+inputs.py - Build CashFlowPredictor inputs from the data we already hold.
+
+Figures are averaged over the last INPUT_MONTHS complete months:
+income from credits and expenses from debits (both read from
+``transaction_monthly_rollup``, so cost does not grow with history), EMI from
+recurring bills due in the window, savings from the current account balances.
+Two kinds of rollup rows are taken back out, read from the window's
+ledger rows. Wallet top-ups are not income: they move money the user
+already had. Payments of recurring bills are not expenses, because those
+bills are already the EMI figure and would otherwise count twice.
+
+Everything is computed for a whole list of users with one query per figure, so
+callers get column arrays ready for ``predict_batch``. Each query reads only
+the window (INPUT_MONTHS rollup rows, bills or ledger rows per account)
+through an index, so a request costs the same however much history the user
+has.
+"""
+from datetime import date
+from typing import Dict, List, Optional
+from uuid import UUID
+import hashlib
+import os
+
+import numpy as np
+from sqlalchemy import and_, func, select
+from sqlalchemy.orm import Session
+
+from services.wallet_service.models import Account, Bill, Transaction, TransactionMonthlyRollup
+from .prediction import PREDICTOR_VERSION
+
+INPUT_MONTHS = int(os.getenv("CASHFLOW_INPUT_MONTHS", "3"))
+FIGURES = ("monthly_income_usd", "monthly_expenses_usd", "monthly_emi_usd", "savings_usd")
+
+
+def input_window(as_of: Optional[date] = None, months: int = INPUT_MONTHS):
+    """[start, end) covering the `months` complete months before `as_of`"""
+    as_of = as_of or date.today()
+    end = as_of.replace(day=1)
+    index = end.year * 12 + end.month - 1 - months
+    return date(index // 12, index % 12 + 1, 1), end
+
+
+def input_hash(figures, version: str = PREDICTOR_VERSION) -> str:
+    """Key of a prediction: the figures to the cent plus the predictor version"""
+    key = "|".join([version] + [f"{float(figures[figure]):.2f}" for figure in FIGURES])
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def _by_user(rows) -> Dict[UUID, tuple]:
+    return {row[0]: row[1:] for row in rows}
+
+
+def build_inputs(
+    db: Session, user_ids: List[UUID], as_of: Optional[date] = None, months: int = INPUT_MONTHS
+) -> Dict[str, np.ndarray]:
+    """Column arrays (aligned with `user_ids`) in the shape predict_batch expects"""
+    start, end = input_window(as_of, months)
+    rollup = TransactionMonthlyRollup
+
+    flows = _by_user(
+        db.execute(
+            select(Account.user_id, func.sum(rollup.credit_total), func.sum(rollup.debit_total))
+            .join(Account, Account.account_id == rollup.account_id)
+            .where(Account.user_id.in_(user_ids), rollup.month >= start, rollup.month < end)
+            .group_by(Account.user_id)
+        )
+    )
+    recurring = _by_user(
+        db.execute(
+            select(Account.user_id, func.sum(Bill.amount))
+            .join(Account, Account.account_id == Bill.account_id)
+            .where(
+                Account.user_id.in_(user_ids),
+                Bill.is_recurring.is_(True),
+                Bill.due_date >= start,
+                Bill.due_date < end,
+            )
+            .group_by(Account.user_id)
+        )
+    )
+    in_window = and_(Transaction.transaction_date >= start, Transaction.transaction_date < end)
+    top_ups = _by_user(
+        db.execute(
+            select(Account.user_id, func.sum(Transaction.amount))
+            .join(Account, Account.account_id == Transaction.account_id)
+            .where(
+                Account.user_id.in_(user_ids),
+                Transaction.type == "credit",
+                Transaction.source.is_(None),  # wallet ledger rows; SMS/manual credits are income
+                in_window,
+            )
+            .group_by(Account.user_id)
+        )
+    )
+    bill_payments = _by_user(
+        db.execute(
+            select(Account.user_id, func.sum(Transaction.amount))
+            .join(Bill, Bill.transaction_id == Transaction.transaction_id)
+            .join(Account, Account.account_id == Transaction.account_id)
+            .where(
+                Account.user_id.in_(user_ids),
+                Bill.is_recurring.is_(True),
+                Transaction.type == "debit",
+                in_window,
+            )
+            .group_by(Account.user_id)
+        )
+    )
+    balances = _by_user(
+        db.execute(
+            select(Account.user_id, func.sum(Account.balance))
+            .where(Account.user_id.in_(user_ids))
+            .group_by(Account.user_id)
+        )
+    )
+
+    def column(source, index=0, per_month=True):
+        values = np.array(
+            [float(source.get(u, (0,) * (index + 1))[index] or 0) for u in user_ids],
+            dtype=np.float64,
+        )
+        return values / months if per_month else values
+
+    return {
+        "monthly_income_usd": np.maximum(column(flows, 0) - column(top_ups), 0),
+        "monthly_expenses_usd": np.maximum(column(flows, 1) - column(bill_payments), 0),
+        "monthly_emi_usd": column(recurring),
+        "savings_usd": column(balances, per_month=False),
+    }
+
+
+def complete_inputs(db: Session, items, as_of: Optional[date] = None) -> Dict[str, np.ndarray]:
+    """Column arrays for CashFlowInput items; figures a client left out come from history"""
+    columns = {
+        figure: np.array(
+            [np.nan if getattr(item, figure) is None else getattr(item, figure) for item in items],
+            dtype=np.float64,
+        )
+        for figure in FIGURES
+    }
+    missing = np.isnan(np.column_stack([columns[figure] for figure in FIGURES])).any(axis=1)
+    if missing.any():
+        user_ids = list(dict.fromkeys(UUID(str(items[i].user_id)) for i in np.flatnonzero(missing)))
+        derived = build_inputs(db, user_ids, as_of)
+        position = {user_id: index for index, user_id in enumerate(user_ids)}
+        for i in np.flatnonzero(missing):
+            row = position[UUID(str(items[i].user_id))]
+            for figure in FIGURES:
+                if np.isnan(columns[figure][i]):
+                    columns[figure][i] = derived[figure][row]
+    return columns
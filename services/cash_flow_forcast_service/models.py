@@ -1,13 +1,19 @@
-from pydantic import BaseModel
-from datetime import datetime
+from pydantic import BaseModel, Field
+from datetime import date, datetime
+from typing import List, Optional
 import uuid
-from sqlalchemy import Column, String, Numeric, TIMESTAMP
+from sqlalchemy import Column, String, Numeric, TIMESTAMP, Date, Integer, Index, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID
 from database.database import Base
 
 
 class CashFlowPredictionDB(Base):
     __tablename__ = "cash_flow_prediction"
+    __table_args__ = (
+        # Identical inputs for a user map to one row (legacy rows have no hash)
+        UniqueConstraint("user_id", "input_hash", name="uq_cash_flow_prediction_user_input"),
+        Index("ix_cash_flow_prediction_user_date", "user_id", "prediction_date", "prediction_id"),
+    )
 
     prediction_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), nullable=False)
@@ -16,17 +22,40 @@ class CashFlowPredictionDB(Base):
     predicted_expenses = Column(Numeric(15, 2))
     predicted_balance = Column(Numeric(15, 2))
     confidence = Column(Numeric(5, 2))
+    cashflow_risk = Column(Integer, nullable=True)
+    risk_level = Column(String(20), nullable=True)
 
+    input_hash = Column(String(64), nullable=True)  # see inputs.input_hash
     prediction_date = Column(TIMESTAMP, nullable=False)
+    last_seen_at = Column(TIMESTAMP, nullable=True)  # last time these inputs were requested
+
+
+class CashFlowForecastRun(Base):
+    """Checkpoint of the nightly bulk forecast: one row per run date"""
+
+    __tablename__ = "cash_flow_forecast_run"
+
+    run_date = Column(Date, primary_key=True)
+    last_user_id = Column(UUID(as_uuid=True), nullable=True)  # keyset position of the last chunk
+    users_processed = Column(Integer, nullable=False, default=0)
+    started_at = Column(TIMESTAMP, nullable=False)
+    updated_at = Column(TIMESTAMP, nullable=False)
+    finished_at = Column(TIMESTAMP, nullable=True)
 
 
 class CashFlowInput(BaseModel):
+    """Figures left out are derived from the user's transactions, bills and balances"""
+
     user_id: str
-    monthly_income_usd: float
-    monthly_expenses_usd: float
-    monthly_emi_usd: float
-    savings_usd: float
-    record_date: datetime
+    monthly_income_usd: Optional[float] = None
+    monthly_expenses_usd: Optional[float] = None
+    monthly_emi_usd: Optional[float] = None
+    savings_usd: Optional[float] = None
+    record_date: Optional[datetime] = None
+
+
+class CashFlowBatchInput(BaseModel):
+    inputs: List[CashFlowInput] = Field(..., min_length=1, max_length=10_000)
 
 
 class CashFlowPrediction(BaseModel):
@@ -36,3 +65,21 @@ class CashFlowPrediction(BaseModel):
     risk_level: str
     confidence: float
     timestamp: datetime
+
+
+class HorizonMonth(BaseModel):
+    month: date
+    income: float
+    expenses: float
+    bills: float  # known pending bills above the usual recurring level
+    net: float
+    balance: float
+    balance_low: float
+    balance_high: float
+    p_negative: float
+
+
+class HorizonForecast(BaseModel):
+    user_id: str
+    generated_at: datetime
+    months: List[HorizonMonth]
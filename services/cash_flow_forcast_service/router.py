@@ -1,17 +1,33 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
 from sqlalchemy.orm import Session
 from datetime import datetime
+from uuid import UUID
+
+from typing import List, Optional
 
 from services.cash_flow_forcast_service.models import CashFlowInput, CashFlowPrediction
-from services.cash_flow_forcast_service.models import CashFlowPredictionDB
-from services.cash_flow_forcast_service.prediction import CashFlowPredictor
+from services.cash_flow_forcast_service.models import CashFlowBatchInput
+from services.cash_flow_forcast_service.models import HorizonForecast, HorizonMonth
+from services.cash_flow_forcast_service.horizon import MAX_HORIZON, forecast, month_starts
+from services.cash_flow_forcast_service.prediction import predictor_model
+from services.cash_flow_forcast_service.inputs import FIGURES, complete_inputs, input_hash
+from services.cash_flow_forcast_service.history import bucketed_predictions, list_predictions
 from database.database import get_db
-from database.database import save_prediction
+from database.database import find_prediction, save_prediction, save_predictions
+from services.auth_service.dependencies import get_current_user_id
+from shared.cursors import InvalidCursor
 
 router = APIRouter(prefix="/api/cashflow", tags=["CashFlowForecast"])
 
 
-predictor = CashFlowPredictor()
+def _ensure_same_user(requested_user_id: str, current_user_id: UUID):
+    """Users may only read and write their own forecasts"""
+    try:
+        same = UUID(str(requested_user_id)) == current_user_id
+    except ValueError:
+        same = False
+    if not same:
+        raise HTTPException(status_code=403, detail="Not allowed for this user")
 
 
 @router.get("/")
@@ -19,56 +35,176 @@ async def root():
     return {"message": "BillWise Cash Flow Forecast Service"}
 
 
+def _stored_response(user_id: str, record) -> CashFlowPrediction:
+    return CashFlowPrediction(
+        user_id=user_id,
+        net_cashflow=float(record.predicted_balance),
+        cashflow_risk=record.cashflow_risk,
+        risk_level=record.risk_level,
+        confidence=float(record.confidence),
+        timestamp=record.prediction_date,
+    )
+
+
 @router.post("/predict-cashflow", response_model=CashFlowPrediction)
-async def predict_cashflow(input_data: CashFlowInput, db: Session = Depends(get_db)):
+async def predict_cashflow(
+    input_data: CashFlowInput,
+    current_user_id: UUID = Depends(get_current_user_id),
+    db: Session = Depends(get_db),
+):
+    """
+    Predict from the given figures; with only a user_id they come from the user's history.
+
+    Inputs already predicted for this user (same figures, same predictor
+    version) return the stored prediction and only bump its last_seen_at.
+    A new prediction is returned as computed, not as stored (the columns are
+    rounded to 2 decimals).
+    """
+    _ensure_same_user(input_data.user_id, current_user_id)
     try:
-        pred = predictor.predict(input_data.dict())
+        columns = complete_inputs(db, [input_data])
+        figures = {figure: float(columns[figure][0]) for figure in FIGURES}
+        predictor = predictor_model.current()
+        key = input_hash(figures, predictor.version)
+        now = datetime.utcnow()
 
-        response = CashFlowPrediction(
+        cached = find_prediction(db, current_user_id, key, now)
+        if cached is not None:
+            return _stored_response(input_data.user_id, cached)
+
+        pred = predictor.model.predict(figures)
+        save_prediction(
+            db,
+            {
+                "user_id": current_user_id,
+                "predicted_income": figures["monthly_income_usd"],
+                "predicted_expenses": figures["monthly_expenses_usd"],
+                "predicted_balance": pred["net_cashflow"],
+                "confidence": pred["risk_probability"],
+                "cashflow_risk": pred["cashflow_risk"],
+                "risk_level": pred["risk_level"],
+                "input_hash": key,
+                "timestamp": now,
+            },
+        )
+        return CashFlowPrediction(
             user_id=input_data.user_id,
             net_cashflow=pred["net_cashflow"],
             cashflow_risk=pred["cashflow_risk"],
             risk_level=pred["risk_level"],
             confidence=pred["risk_probability"],
-            timestamp=datetime.utcnow(),
+            timestamp=now,
         )
 
-        # Save to DB
-        save_prediction(
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
+
+
+@router.post("/predict-cashflow/batch", response_model=List[CashFlowPrediction])
+async def predict_cashflow_batch(
+    batch: CashFlowBatchInput,
+    current_user_id: UUID = Depends(get_current_user_id),
+    db: Session = Depends(get_db),
+):
+    """Score many scenarios in one vectorized pass and store them with one upsert"""
+    for input_data in batch.inputs:
+        _ensure_same_user(input_data.user_id, current_user_id)
+    try:
+        columns = complete_inputs(db, batch.inputs)
+        predictor = predictor_model.current()
+        pred = predictor.model.predict_batch(columns)
+        timestamp = datetime.utcnow()
+
+        responses = [
+            CashFlowPrediction(
+                user_id=item.user_id,
+                net_cashflow=float(net_cashflow),
+                cashflow_risk=int(cashflow_risk),
+                risk_level=str(risk_level),
+                confidence=float(confidence),
+                timestamp=timestamp,
+            )
+            for item, net_cashflow, cashflow_risk, risk_level, confidence in zip(
+                batch.inputs,
+                pred["net_cashflow"],
+                pred["cashflow_risk"],
+                pred["risk_level"],
+                pred["risk_probability"],
+            )
+        ]
+
+        save_predictions(
             db,
-            {
-                "user_id": input_data.user_id,
-                "predicted_income": input_data.monthly_income_usd,
-                "predicted_expenses": input_data.monthly_expenses_usd,
-                "predicted_balance": pred["net_cashflow"],
-                "confidence": pred["risk_probability"],
-                "timestamp": response.timestamp,
-            },
+            [
+                {
+                    "user_id": current_user_id,
+                    "predicted_income": float(income),
+                    "predicted_expenses": float(expenses),
+                    "predicted_balance": response.net_cashflow,
+                    "confidence": response.confidence,
+                    "cashflow_risk": response.cashflow_risk,
+                    "risk_level": response.risk_level,
+                    "input_hash": input_hash(
+                        {figure: columns[figure][i] for figure in FIGURES}, predictor.version
+                    ),
+                    "timestamp": timestamp,
+                }
+                for i, (response, income, expenses) in enumerate(
+                    zip(responses, columns["monthly_income_usd"], columns["monthly_expenses_usd"])
+                )
+            ],
         )
 
-        return response
+        return responses
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
 
 
-@router.get("/user-history/{user_id}")
-async def get_user_prediction_history(user_id: str, db: Session = Depends(get_db)):
-    records = (
-        db.query(CashFlowPredictionDB)
-        .filter(CashFlowPredictionDB.user_id == user_id)
-        .order_by(CashFlowPredictionDB.prediction_date.desc())
-        .all()
+@router.get("/forecast", response_model=HorizonForecast)
+async def get_horizon_forecast(
+    months: int = Query(6, ge=1, le=MAX_HORIZON),
+    current_user_id: UUID = Depends(get_current_user_id),
+    db: Session = Depends(get_db),
+):
+    """Month-by-month projection of income, expenses and balance for the current user"""
+    projection = forecast(db, [current_user_id], months)
+    fields = HorizonMonth.model_fields.keys() - {"month"}
+    return HorizonForecast(
+        user_id=str(current_user_id),
+        generated_at=datetime.utcnow(),
+        months=[
+            HorizonMonth(month=month, **{field: float(projection[field][0, h]) for field in fields})
+            for h, month in enumerate(month_starts(months))
+        ],
     )
 
-    return [
-        {
-            "prediction_id": str(r.prediction_id),
-            "income": float(r.predicted_income),
-            "expenses": float(r.predicted_expenses),
-            "balance": float(r.predicted_balance),
-            "confidence": float(r.confidence),
-            "date": r.prediction_date,
-        }
-        for r in records
-    ]
+
+@router.get("/user-history/{user_id}")
+async def get_user_prediction_history(
+    user_id: str,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=500, description="page size; all rows if omitted"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
+    bucket: Optional[str] = Query(None, pattern="^(day|week|month)$"),
+    current_user_id: UUID = Depends(get_current_user_id),
+    db: Session = Depends(get_db),
+):
+    """
+    Predictions newest first, or one aggregated point per day/week/month with `bucket`.
+
+    The body stays a plain list as before pagination. Without `limit` every
+    row (after `cursor`) is returned; with it, when more rows remain, the
+    cursor for the next page is sent in the X-Next-Cursor header.
+    """
+    _ensure_same_user(user_id, current_user_id)
+    try:
+        if bucket:
+            page = bucketed_predictions(db, current_user_id, bucket, limit, cursor)
+        else:
+            page = list_predictions(db, current_user_id, limit, cursor)
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if page["next_cursor"]:
+        response.headers["X-Next-Cursor"] = page["next_cursor"]
+    return page["items"]
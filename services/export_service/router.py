@@ -0,0 +1,132 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from uuid import UUID
+import logging
+
+from database.database import SessionLocal, get_db
+from services.auth_service.dependencies import get_current_user_id
+from services.sms_parser_service.models import Account, Bill, Transaction
+from .writers import csv_chunks, parquet_chunks, parquet_available, gzip_stream
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/export", tags=["Export"])
+
+# Rows fetched per server-side cursor round trip (and per CSV chunk / Parquet row group)
+EXPORT_CHUNK_SIZE = 5000
+
+BILL_COLUMNS = [
+    ("bill_id", "uuid"),
+    ("account_id", "uuid"),
+    ("transaction_id", "uuid"),
+    ("merchant", "string"),
+    ("amount", "decimal"),
+    ("due_date", "datetime"),
+    ("status", "string"),
+    ("is_recurring", "bool"),
+]
+
+TRANSACTION_COLUMNS = [
+    ("transaction_id", "uuid"),
+    ("account_id", "uuid"),
+    ("amount", "decimal"),
+    ("type", "string"),
+    ("transaction_date", "datetime"),
+    ("category", "string"),
+    ("merchant", "string"),
+    ("source", "string"),
+    ("description", "string"),
+]
+
+
+def _stream_partitions(statement, chunk_size: int = EXPORT_CHUNK_SIZE):
+    """
+    Yield result rows in chunks through a server-side cursor.
+    The session is owned by the generator (not get_db) because it must stay
+    open until the last chunk has been sent.
+    """
+    db = SessionLocal()
+    try:
+        result = db.execute(statement.execution_options(yield_per=chunk_size))
+        for partition in result.partitions():
+            yield partition
+    finally:
+        db.close()
+
+
+def _ensure_owned(db: Session, account_id: UUID, user_id: UUID):
+    """404 unless the account belongs to the authenticated user"""
+    owned = db.execute(
+        select(Account.account_id).where(
+            Account.account_id == account_id, Account.user_id == user_id
+        )
+    ).first()
+    if owned is None:
+        raise HTTPException(status_code=404, detail="Account not found")
+
+
+def _export_response(name: str, columns, statement, fmt: str, gzip: bool) -> StreamingResponse:
+    chunks = _stream_partitions(statement)
+
+    if fmt == "parquet":
+        if not parquet_available():
+            raise HTTPException(status_code=501, detail="Parquet export requires pyarrow")
+        # Parquet is compressed per column chunk; gzip selects the codec instead of wrapping the file
+        body = parquet_chunks(columns, chunks, compression="gzip" if gzip else "snappy")
+        media_type = "application/vnd.apache.parquet"
+        filename = f"{name}.parquet"
+    else:
+        body = csv_chunks(columns, chunks)
+        media_type = "text/csv; charset=utf-8"
+        filename = f"{name}.csv"
+        if gzip:
+            body = gzip_stream(body)
+            media_type = "application/gzip"
+            filename += ".gz"
+
+    logger.info(f" Export started: {filename}")
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get("/bills", summary="Stream all bills of an account as CSV or Parquet")
+def export_bills(
+    account_id: UUID,
+    fmt: str = Query("csv", alias="format", pattern="^(csv|parquet)$"),
+    gzip: bool = Query(False, description="gzip the CSV stream / use the gzip Parquet codec"),
+    user_id: UUID = Depends(get_current_user_id),
+    db: Session = Depends(get_db),
+):
+    """Export every bill of an account, streamed chunk by chunk"""
+    _ensure_owned(db, account_id, user_id)
+    statement = (
+        select(*(Bill.__table__.c[name] for name, _ in BILL_COLUMNS))
+        .where(Bill.account_id == account_id)
+        .order_by(Bill.due_date, Bill.bill_id)
+    )
+    return _export_response(f"bills_{account_id}", BILL_COLUMNS, statement, fmt, gzip)
+
+
+@router.get("/transactions", summary="Stream all transactions of an account as CSV or Parquet")
+def export_transactions(
+    account_id: UUID,
+    fmt: str = Query("csv", alias="format", pattern="^(csv|parquet)$"),
+    gzip: bool = Query(False, description="gzip the CSV stream / use the gzip Parquet codec"),
+    user_id: UUID = Depends(get_current_user_id),
+    db: Session = Depends(get_db),
+):
+    """Export every transaction of an account, streamed chunk by chunk"""
+    _ensure_owned(db, account_id, user_id)
+    statement = (
+        select(*(Transaction.__table__.c[name] for name, _ in TRANSACTION_COLUMNS))
+        .where(Transaction.account_id == account_id)
+        .order_by(Transaction.transaction_date, Transaction.transaction_id)
+    )
+    return _export_response(f"transactions_{account_id}", TRANSACTION_COLUMNS, statement, fmt, gzip)
@@ -0,0 +1,128 @@
+"""
+writers.py - Chunked CSV / Parquet encoders for streaming exports.
+
+Each writer consumes an iterator of row chunks (lists of SQLAlchemy ``Row``)
+and yields encoded bytes as soon as a chunk is written, so memory stays bounded
+by a single chunk regardless of how many rows are exported.
+"""
+import csv
+import io
+import zlib
+from datetime import datetime
+from decimal import Decimal
+from typing import Iterable, Iterator, List, Sequence, Tuple
+
+# (column name, logical type) - logical types: uuid, string, decimal, datetime, bool
+ColumnSpec = Tuple[str, str]
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return format(value, "f")
+    return str(value)
+
+
+def csv_chunks(columns: Sequence[ColumnSpec], chunks: Iterable[List]) -> Iterator[bytes]:
+    """Encode row chunks as UTF-8 CSV, header first"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([name for name, _ in columns])
+
+    for rows in chunks:
+        writer.writerows([_csv_value(v) for v in row] for row in rows)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate(0)
+
+    # Header-only export (no rows)
+    tail = buffer.getvalue()
+    if tail:
+        yield tail.encode("utf-8")
+
+
+class _DrainableSink:
+    """Write-only file object handed to ParquetWriter; bytes are drained after each row group"""
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        self._buffer += data
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+
+def parquet_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def parquet_chunks(
+    columns: Sequence[ColumnSpec], chunks: Iterable[List], compression: str = "snappy"
+) -> Iterator[bytes]:
+    """Encode row chunks as Parquet, one row group per chunk"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    arrow_types = {
+        "uuid": pa.string(),
+        "string": pa.string(),
+        "decimal": pa.decimal128(15, 2),
+        "datetime": pa.timestamp("us"),
+        "bool": pa.bool_(),
+    }
+    schema = pa.schema([(name, arrow_types[kind]) for name, kind in columns])
+
+    sink = _DrainableSink()
+    writer = pq.ParquetWriter(sink, schema, compression=compression)
+    try:
+        for rows in chunks:
+            if not rows:
+                continue
+            arrays = []
+            for index, (name, kind) in enumerate(columns):
+                values = [row[index] for row in rows]
+                if kind == "uuid":
+                    values = [str(v) if v is not None else None for v in values]
+                arrays.append(pa.array(values, type=schema.field(name).type))
+            writer.write_batch(pa.record_batch(arrays, schema=schema))
+            data = sink.drain()
+            if data:
+                yield data
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def gzip_stream(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """Gzip an already-encoded byte stream incrementally"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
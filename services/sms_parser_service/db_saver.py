@@ -2,7 +2,9 @@ from sqlalchemy.orm import Session
 from decimal import Decimal
 from datetime import datetime
 import re
+from database.persistence import insert_returning
 from services.sms_parser_service.models import Transaction, Bill
+from services.wallet_service.rollups import add_to_rollups
 
 class SMSDatabaseSaver:
     """Simple class to save parsed SMS data to database"""
@@ -42,8 +44,10 @@ class SMSDatabaseSaver:
             # Determine category
             category = self._categorize(merchant, raw_text)
             
-            # Create transaction
-            transaction = Transaction(
+            # Create transaction (INSERT ... RETURNING: id and date without a refresh)
+            transaction = insert_returning(
+                self.db,
+                Transaction,
                 account_id=account_id,
                 amount=amount,
                 type=trans_type,
@@ -52,9 +56,10 @@ class SMSDatabaseSaver:
                 source='sms',
                 description=raw_text[:500] if raw_text else None
             )
-            
-            self.db.add(transaction)
-            self.db.flush()  # Get transaction_id without committing yet
+            add_to_rollups(
+                self.db,
+                [(transaction.account_id, transaction.transaction_date, trans_type, amount)],
+            )
             
             result = {'transaction': transaction, 'bill': None}
             
@@ -70,7 +75,9 @@ class SMSDatabaseSaver:
                     from datetime import timedelta
                     due_date = datetime.utcnow() + timedelta(days=30)
                 
-                bill = Bill(
+                result['bill'] = insert_returning(
+                    self.db,
+                    Bill,
                     transaction_id=transaction.transaction_id,
                     account_id=account_id,
                     merchant=merchant,
@@ -79,16 +86,9 @@ class SMSDatabaseSaver:
                     status='pending',
                     is_recurring=self._is_recurring(raw_text)
                 )
-                
-                self.db.add(bill)
             
             # Commit both transaction and bill together
             self.db.commit()
-            self.db.refresh(transaction)
-            
-            if is_bill:
-                self.db.refresh(bill)
-                result['bill'] = bill
             
             return result
             
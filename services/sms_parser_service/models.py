@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Numeric, DateTime, Boolean, Text, ForeignKey, CheckConstraint
+from sqlalchemy import Column, String, Numeric, DateTime, Date, Integer, Boolean, Text, ForeignKey, CheckConstraint, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -11,7 +11,7 @@ class Account(Base):
     __table_args__ = {'extend_existing': True}
     
     account_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    user_id = Column(UUID(as_uuid=True), nullable=False)
+    user_id = Column(UUID(as_uuid=True), nullable=False, index=True)
     account_name = Column(String(255), nullable=False)
     account_type = Column(String(50), nullable=False)
     balance = Column(Numeric(15, 2), default=0.00)
@@ -27,6 +27,7 @@ class Transaction(Base):
     __table_args__ = (
         CheckConstraint("type IN ('debit', 'credit')", name='check_transaction_type'),
         CheckConstraint("source IN ('sms', 'manual')", name='check_transaction_source'),
+        Index('ix_transaction_account_date', 'account_id', 'transaction_date', 'transaction_id'),
         {'extend_existing': True},
     )
     
@@ -49,6 +50,10 @@ class Bill(Base):
     __tablename__ = "bill"
     __table_args__ = (
         CheckConstraint("status IN ('pending', 'paid')", name='check_bill_status'),
+        # Cash-flow inputs read recurring bills of an account over a few months
+        Index('ix_bill_recurring_account_due', 'account_id', 'due_date', postgresql_where=text('is_recurring')),
+        # Cash-flow inputs find the bill paid by each debit in the window
+        Index('ix_bill_transaction_id', 'transaction_id'),
         {'extend_existing': True},
     )
     
@@ -63,4 +68,18 @@ class Bill(Base):
     
     # Relationships
     account = relationship("Account", back_populates="bills")
-    transaction = relationship("Transaction", back_populates="bill")
\ No newline at end of file
+    transaction = relationship("Transaction", back_populates="bill")
+
+
+class TransactionMonthlyRollup(Base):
+    """Per-account monthly totals, maintained incrementally on every transaction insert"""
+    __tablename__ = "transaction_monthly_rollup"
+    __table_args__ = {'extend_existing': True}
+
+    account_id = Column(UUID(as_uuid=True), ForeignKey('account.account_id', ondelete='CASCADE'), primary_key=True)
+    month = Column(Date, primary_key=True)  # first day of the month
+    credit_total = Column(Numeric(15, 2), nullable=False, default=0)
+    credit_count = Column(Integer, nullable=False, default=0)
+    debit_total = Column(Numeric(15, 2), nullable=False, default=0)
+    debit_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
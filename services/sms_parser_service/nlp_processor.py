@@ -3,25 +3,46 @@ from huggingface_hub import snapshot_download
 from pathlib import Path
 import os
 
-class SMSParser:
-    _nlp = None  # cache model (singleton)
+from shared.model_registry import registry
 
-    def __init__(self, model_path: str = None):
-        if SMSParser._nlp is None:
-            if model_path is None:
-                model_path = snapshot_download(
-                    repo_id="elam0222/sms-parser-spacy",
-                    revision="main",              # optional
-                    cache_dir="/tmp/hf_models"    # Railway-friendly
-                )
+# Smoke batch run through a newly loaded model before it is swapped in
+SMOKE_SMS = [
+    "Votre facture Inwi Fibre numero 1234567890 de Mars 2025 de 450.00dh payable avant "
+    "12/03/2025 est disponible sur bit.inwi.ma/Facture",
+    "Maroc Telecom: votre facture de 199.00dh est disponible",
+]
+
+
+def load_nlp(model_path: str = None):
+    if model_path is None:
+        model_path = snapshot_download(
+            repo_id="elam0222/sms-parser-spacy",
+            revision="main",              # optional
+            cache_dir="/tmp/hf_models"    # Railway-friendly
+        )
+
+    model_dir = Path(model_path)
+    if not model_dir.exists():
+        raise RuntimeError(f"spaCy model not found at: {model_dir}")
+
+    nlp = spacy.load(str(model_dir))
+    return f"{nlp.meta.get('name')}-{nlp.meta.get('version')}", nlp
 
-            model_dir = Path(model_path)
-            if not model_dir.exists():
-                raise RuntimeError(f"spaCy model not found at: {model_dir}")
 
-            SMSParser._nlp = spacy.load(str(model_dir))
+def warm_nlp(nlp):
+    list(nlp.pipe(SMOKE_SMS))
+
+
+nlp_model = registry.register("sms-ner", load_nlp, warm_nlp)
+
+
+class SMSParser:
+    def __init__(self, model_path: str = None):
+        nlp_model.get(model_path)  # cache model (singleton, hot-swappable)
 
-        self.nlp = SMSParser._nlp
+    @property
+    def nlp(self):
+        return nlp_model.get()
 
     def parse_entities(self, doc):
         entities = {}
@@ -0,0 +1,213 @@
+"""
+cache.py - Wallet balance cache in front of get_account.
+
+Reads go through ``get_or_load``; every committed balance change calls
+``invalidate``. A fill is only stored if no invalidation happened for that key
+since the read started, so a slow reader can never put back a balance that a
+concurrent writer has already replaced. Backends: in-process LRU with TTL
+(default for a single worker) or Redis (``WALLET_CACHE_BACKEND=redis``, shared
+across workers and the default when ``WEB_CONCURRENCY`` is above 1).
+"""
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from decimal import Decimal
+from typing import Callable, Optional
+import itertools
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Per-process entries would miss invalidations made by the other workers
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+WALLET_CACHE_BACKEND = os.getenv(
+    "WALLET_CACHE_BACKEND", "redis" if WEB_CONCURRENCY > 1 else "memory"
+)
+WALLET_CACHE_TTL = float(os.getenv("WALLET_CACHE_TTL", "30"))
+WALLET_CACHE_SIZE = int(os.getenv("WALLET_CACHE_SIZE", "10000"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+
+class BalanceCache(ABC):
+    """Shared read path and hit/miss accounting; backends implement the storage"""
+
+    def __init__(self):
+        self._stats_lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "fills": 0, "stale_fills": 0, "invalidations": 0}
+
+    def _count(self, name: str):
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        stats["backend"] = type(self).__name__
+        return stats
+
+    def get_or_load(self, key: str, loader: Callable[[], Decimal]) -> Decimal:
+        value = self.get(key)
+        if value is not None:
+            self._count("hits")
+            return value
+
+        self._count("misses")
+        token = self.fill_token(key)
+        value = loader()
+        if self.fill(key, value, token):
+            self._count("fills")
+        else:
+            self._count("stale_fills")
+        return value
+
+    def invalidate(self, key: str):
+        self._invalidate(key)
+        self._count("invalidations")
+
+    # Backend interface
+    @abstractmethod
+    def get(self, key: str) -> Optional[Decimal]:
+        """Cached balance, or None on a miss"""
+
+    @abstractmethod
+    def fill_token(self, key: str):
+        """Marker taken before the read; `fill` compares it to detect invalidations"""
+
+    @abstractmethod
+    def fill(self, key: str, value: Decimal, token) -> bool:
+        """Store `value` unless `key` was invalidated since `token`; True if stored"""
+
+    @abstractmethod
+    def _invalidate(self, key: str):
+        """Drop `key` and make fills started before now stale"""
+
+
+class InProcessBalanceCache(BalanceCache):
+    """Bounded LRU with per-entry TTL, local to one worker process"""
+
+    def __init__(self, maxsize: int = WALLET_CACHE_SIZE, ttl: float = WALLET_CACHE_TTL):
+        super().__init__()
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (balance, expires_at)
+        # key -> sequence number of its last invalidation (bounded like the entries)
+        self._invalidated = OrderedDict()
+        self._sequence = itertools.count(1)
+
+    def get(self, key: str) -> Optional[Decimal]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def fill_token(self, key: str) -> int:
+        with self._lock:
+            return next(self._sequence)
+
+    def fill(self, key: str, value: Decimal, token: int) -> bool:
+        with self._lock:
+            if self._invalidated.get(key, 0) > token:
+                return False
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+            return True
+
+    def _invalidate(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._invalidated[key] = next(self._sequence)
+            self._invalidated.move_to_end(key)
+            while len(self._invalidated) > self.maxsize:
+                self._invalidated.popitem(last=False)
+
+
+# Store the balance only if the key's version is still the one seen before the DB read
+_FILL_IF_VERSION_UNCHANGED = """
+local current = redis.call('GET', KEYS[2])
+if (current or '') ~= ARGV[2] then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[1], 'PX', ARGV[3])
+return 1
+"""
+
+
+class RedisBalanceCache(BalanceCache):
+    """Redis-backed cache shared by every worker; errors degrade to a cache miss"""
+
+    VERSION_TTL_MS = 3_600_000  # versions must outlive any in-flight read
+
+    def __init__(self, url: str = REDIS_URL, ttl: float = WALLET_CACHE_TTL, client=None):
+        super().__init__()
+        if client is None:
+            import redis
+
+            client = redis.Redis.from_url(url, socket_timeout=0.2, socket_connect_timeout=0.2)
+        self.ttl_ms = int(ttl * 1000)
+        self._redis = client
+        self._fill_script = client.register_script(_FILL_IF_VERSION_UNCHANGED)
+
+    @staticmethod
+    def _keys(key: str):
+        return f"wallet:balance:{key}", f"wallet:balance:version:{key}"
+
+    def get(self, key: str) -> Optional[Decimal]:
+        try:
+            value = self._redis.get(self._keys(key)[0])
+        except Exception as e:
+            logger.warning(f" Balance cache read failed: {str(e)}")
+            return None
+        return Decimal(value.decode()) if value is not None else None
+
+    def fill_token(self, key: str) -> Optional[str]:
+        try:
+            version = self._redis.get(self._keys(key)[1])
+        except Exception as e:
+            logger.warning(f" Balance cache read failed: {str(e)}")
+            return None
+        return version.decode() if version is not None else ""
+
+    def fill(self, key: str, value: Decimal, token) -> bool:
+        if token is None:
+            return False
+        try:
+            return bool(
+                self._fill_script(keys=self._keys(key), args=[str(value), token, self.ttl_ms])
+            )
+        except Exception as e:
+            logger.warning(f" Balance cache fill failed: {str(e)}")
+            return False
+
+    def _invalidate(self, key: str):
+        value_key, version_key = self._keys(key)
+        try:
+            pipe = self._redis.pipeline()
+            pipe.incr(version_key)
+            pipe.pexpire(version_key, self.VERSION_TTL_MS)
+            pipe.delete(value_key)
+            pipe.execute()
+        except Exception as e:
+            # Bounded by the entry TTL
+            logger.error(f" Balance cache invalidation failed for {key}: {str(e)}")
+
+
+def create_balance_cache(backend: str = WALLET_CACHE_BACKEND) -> BalanceCache:
+    if backend == "redis":
+        return RedisBalanceCache()
+    return InProcessBalanceCache()
+
+
+balance_cache = create_balance_cache()
@@ -0,0 +1,95 @@
+"""
+history.py - Transaction history reads for the wallet.
+
+Pages are fetched by keyset on (transaction_date, transaction_id) so the cost
+of a page does not depend on how deep into the history the client is, and
+monthly totals come from the incrementally maintained rollup table.
+"""
+from datetime import date
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.orm import Session
+
+from shared.cursors import decode_cursor, encode_cursor
+from .models import Account, Transaction, TransactionMonthlyRollup
+
+
+def _user_accounts(user_id: UUID):
+    return select(Account.account_id).where(Account.user_id == user_id)
+
+
+def list_transactions(
+    db: Session,
+    user_id: UUID,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    tx_type: Optional[str] = None,
+    category: Optional[str] = None,
+    source: Optional[str] = None,
+) -> dict:
+    """One page of the user's transactions, newest first"""
+    statement = select(Transaction).where(Transaction.account_id.in_(_user_accounts(user_id)))
+
+    if tx_type:
+        statement = statement.where(Transaction.type == tx_type)
+    if category:
+        statement = statement.where(Transaction.category == category)
+    if source == "wallet":
+        statement = statement.where(Transaction.source.is_(None))
+    elif source:
+        statement = statement.where(Transaction.source == source)
+    if cursor:
+        after_date, after_id = decode_cursor(cursor)
+        statement = statement.where(
+            tuple_(Transaction.transaction_date, Transaction.transaction_id)
+            < tuple_(after_date, after_id)
+        )
+
+    rows = (
+        db.execute(
+            statement.order_by(
+                Transaction.transaction_date.desc(), Transaction.transaction_id.desc()
+            ).limit(limit + 1)
+        )
+        .scalars()
+        .all()
+    )
+
+    items, more = rows[:limit], len(rows) > limit
+    next_cursor = (
+        encode_cursor(items[-1].transaction_date, items[-1].transaction_id) if more else None
+    )
+    return {"items": items, "next_cursor": next_cursor}
+
+
+def monthly_totals(db: Session, user_id: UUID, since: Optional[date] = None) -> list:
+    """Per-month credit/debit totals across the user's accounts, newest month first"""
+    rollup = TransactionMonthlyRollup
+    statement = (
+        select(
+            rollup.month,
+            func.sum(rollup.credit_total),
+            func.sum(rollup.credit_count),
+            func.sum(rollup.debit_total),
+            func.sum(rollup.debit_count),
+        )
+        .where(rollup.account_id.in_(_user_accounts(user_id)))
+        .group_by(rollup.month)
+        .order_by(rollup.month.desc())
+    )
+    if since is not None:
+        statement = statement.where(rollup.month >= since)
+
+    return [
+        {
+            "month": month,
+            "credits": float(credits),
+            "credit_count": int(credit_count),
+            "debits": float(debits),
+            "debit_count": int(debit_count),
+            "net": float(credits - debits),
+        }
+        for month, credits, credit_count, debits, debit_count in db.execute(statement)
+    ]
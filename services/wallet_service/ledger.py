@@ -0,0 +1,230 @@
+"""
+ledger.py - Wallet ledger snapshots, point-in-time balances and reconciliation.
+
+Wallet ``Transaction`` rows are treated as an append-only ledger. A
+``BalanceSnapshot`` checkpoints the running balance every N ledger rows (or
+once a day), so any balance read only needs the latest snapshot plus the short
+tail of rows written after it instead of the account's full history.
+"""
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Optional
+from uuid import UUID
+import logging
+import os
+
+from sqlalchemy import case, func, select
+from sqlalchemy.orm import Session
+
+from database.database import SessionLocal
+from .models import Account, Transaction, BalanceSnapshot
+
+logger = logging.getLogger(__name__)
+
+# "count": snapshot after SNAPSHOT_EVERY new ledger rows, "day": at most one snapshot per day
+SNAPSHOT_MODE = os.getenv("LEDGER_SNAPSHOT_MODE", "count")
+SNAPSHOT_EVERY = int(os.getenv("LEDGER_SNAPSHOT_EVERY", "100"))
+
+# SMS-derived rows are informational and never move Account.balance
+LEDGER_ROWS = Transaction.source.is_distinct_from("sms")
+
+SIGNED_AMOUNT = case((Transaction.type == "credit", Transaction.amount), else_=-Transaction.amount)
+
+
+def latest_snapshot(
+    db: Session, account_id: UUID, at: Optional[datetime] = None
+) -> Optional[BalanceSnapshot]:
+    """Most recent snapshot of the account, optionally as of a point in time"""
+    query = db.query(BalanceSnapshot).filter(BalanceSnapshot.account_id == account_id)
+    if at is not None:
+        query = query.filter(BalanceSnapshot.taken_at <= at)
+    return query.order_by(BalanceSnapshot.taken_at.desc()).first()
+
+
+def ledger_tail(
+    db: Session, account_id: UUID, after: Optional[datetime], until: Optional[datetime] = None
+):
+    """Signed sum, row count and last date of ledger rows in (after, until]"""
+    statement = select(
+        func.coalesce(func.sum(SIGNED_AMOUNT), 0),
+        func.count(),
+        func.max(Transaction.transaction_date),
+    ).where(Transaction.account_id == account_id, LEDGER_ROWS)
+    if after is not None:
+        statement = statement.where(Transaction.transaction_date > after)
+    if until is not None:
+        statement = statement.where(Transaction.transaction_date <= until)
+
+    total, count, last_date = db.execute(statement).one()
+    return Decimal(total), count, last_date
+
+
+def balance_at(db: Session, account_id: UUID, at: datetime) -> Decimal:
+    """Wallet balance as of `at`: nearest snapshot before it plus the ledger tail"""
+    snapshot = latest_snapshot(db, account_id, at)
+    total, _, _ = ledger_tail(db, account_id, snapshot.taken_at if snapshot else None, at)
+    return (snapshot.balance if snapshot else Decimal("0")) + total
+
+
+def _lock_account(db: Session, account_id: UUID, exclusive: bool = False) -> Decimal:
+    """
+    Lock the account row (shared unless `exclusive`) and return its balance.
+
+    Balance writers hold the row lock from their UPDATE until commit and stamp
+    their ledger row while holding it, so once this lock is granted every
+    ledger row up to now is committed and consistent with Account.balance.
+    Share locks do not exclude each other: callers that write based on what
+    they read need the exclusive lock.
+    """
+    return db.execute(
+        select(Account.balance)
+        .where(Account.account_id == account_id)
+        .with_for_update(read=not exclusive)
+    ).scalar_one()
+
+
+def reconcile(db: Session, account_id: UUID) -> dict:
+    """Compare Account.balance with latest snapshot + ledger tail"""
+    try:
+        account_balance = _lock_account(db, account_id)
+        snapshot = latest_snapshot(db, account_id)
+        snapshot_balance = snapshot.balance if snapshot else Decimal("0")
+        snapshot_taken_at = snapshot.taken_at if snapshot else None
+        total, tail_rows, _ = ledger_tail(db, account_id, snapshot_taken_at)
+    finally:
+        db.rollback()  # release the share lock
+
+    ledger_balance = snapshot_balance + total
+    return {
+        "account_id": str(account_id),
+        "account_balance": float(account_balance),
+        "ledger_balance": float(ledger_balance),
+        "consistent": account_balance == ledger_balance,
+        "snapshot_taken_at": snapshot_taken_at,
+        "tail_rows": tail_rows,
+    }
+
+
+def take_snapshot(db: Session, account_id: UUID) -> Optional[BalanceSnapshot]:
+    """Checkpoint the ledger of one account; returns None when nothing changed"""
+    try:
+        # Exclusive: two takers holding share locks would both append the same snapshot
+        _lock_account(db, account_id, exclusive=True)
+        previous = latest_snapshot(db, account_id)
+        total, count, last_date = ledger_tail(
+            db, account_id, previous.taken_at if previous else None
+        )
+        if count == 0:
+            db.rollback()
+            return None
+
+        snapshot = BalanceSnapshot(
+            account_id=account_id,
+            balance=(previous.balance if previous else Decimal("0")) + total,
+            tx_count=(previous.tx_count if previous else 0) + count,
+            taken_at=last_date,
+        )
+        db.add(snapshot)
+        db.commit()
+        return snapshot
+    except Exception:
+        db.rollback()
+        raise
+
+
+def accounts_due_for_snapshot(db: Session, limit: int = 500):
+    """Accounts whose ledger tail is long (count mode) or a day old (day mode)"""
+    last_snapshot = (
+        select(
+            BalanceSnapshot.account_id.label("account_id"),
+            func.max(BalanceSnapshot.taken_at).label("taken_at"),
+        )
+        .group_by(BalanceSnapshot.account_id)
+        .subquery()
+    )
+    statement = (
+        select(Transaction.account_id)
+        .outerjoin(last_snapshot, last_snapshot.c.account_id == Transaction.account_id)
+        .where(
+            LEDGER_ROWS,
+            (last_snapshot.c.taken_at.is_(None))
+            | (Transaction.transaction_date > last_snapshot.c.taken_at),
+        )
+        .group_by(Transaction.account_id, last_snapshot.c.taken_at)
+        .limit(limit)
+    )
+    if SNAPSHOT_MODE == "day":
+        day_ago = datetime.utcnow() - timedelta(days=1)
+        statement = statement.having(
+            (last_snapshot.c.taken_at.is_(None)) | (last_snapshot.c.taken_at <= day_ago)
+        )
+    else:
+        statement = statement.having(func.count() >= SNAPSHOT_EVERY)
+
+    return db.execute(statement).scalars().all()
+
+
+def run_snapshots(db: Session, limit: int = 500) -> int:
+    """Take snapshots for every account that is due; returns the number taken"""
+    taken = 0
+    for account_id in accounts_due_for_snapshot(db, limit):
+        if take_snapshot(db, account_id) is not None:
+            taken += 1
+    return taken
+
+
+def verify_snapshots(db: Session, limit: int = 500) -> int:
+    """
+    Check unverified snapshots against the ledger, oldest first.
+
+    Each snapshot is checked only against its predecessor and the rows between
+    them, so the verifier's cost follows new ledger volume, not history size.
+    A mismatch means ledger rows were altered or removed after being covered.
+    """
+    pending = (
+        db.query(BalanceSnapshot)
+        .filter(BalanceSnapshot.verified_at.is_(None))
+        .order_by(BalanceSnapshot.account_id, BalanceSnapshot.taken_at)
+        .limit(limit)
+        .all()
+    )
+    for snapshot in pending:
+        previous = (
+            db.query(BalanceSnapshot)
+            .filter(
+                BalanceSnapshot.account_id == snapshot.account_id,
+                BalanceSnapshot.taken_at < snapshot.taken_at,
+            )
+            .order_by(BalanceSnapshot.taken_at.desc())
+            .first()
+        )
+        total, count, _ = ledger_tail(
+            db, snapshot.account_id, previous.taken_at if previous else None, snapshot.taken_at
+        )
+        expected_balance = (previous.balance if previous else Decimal("0")) + total
+        expected_count = (previous.tx_count if previous else 0) + count
+
+        snapshot.is_consistent = (
+            snapshot.balance == expected_balance and snapshot.tx_count == expected_count
+        )
+        snapshot.verified_at = datetime.utcnow()
+        if not snapshot.is_consistent:
+            logger.warning(
+                f" Ledger snapshot mismatch: {snapshot.snapshot_id} account={snapshot.account_id} "
+                f"stored={snapshot.balance} recomputed={expected_balance}"
+            )
+
+    db.commit()
+    return len(pending)
+
+
+def ledger_maintenance_job():
+    """Background entry point: take due snapshots, then verify new ones"""
+    db = SessionLocal()
+    try:
+        taken = run_snapshots(db)
+        verified = verify_snapshots(db)
+        if taken or verified:
+            logger.info(f" Ledger maintenance: {taken} snapshots taken, {verified} verified")
+    finally:
+        db.close()
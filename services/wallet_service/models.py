@@ -1,3 +1,52 @@
-from services.sms_parser_service.models import Account, Transaction
+from sqlalchemy import Column, String, Numeric, DateTime, Boolean, Integer, ForeignKey, Index, JSON, text
+from sqlalchemy.dialects.postgresql import UUID
+from datetime import datetime
+import uuid
+from database.database import Base
+from services.sms_parser_service.models import Account, Transaction, Bill, TransactionMonthlyRollup
 
-__all__ = ["Account", "Transaction"]
+__all__ = [
+    "Account",
+    "Transaction",
+    "Bill",
+    "TransactionMonthlyRollup",
+    "BalanceSnapshot",
+    "StripeEvent",
+]
+
+
+class BalanceSnapshot(Base):
+    """Checkpoint of an account's wallet ledger: balance of every ledger row up to taken_at"""
+    __tablename__ = "balance_snapshot"
+    __table_args__ = (
+        Index('ix_balance_snapshot_account_taken', 'account_id', 'taken_at'),
+        {'extend_existing': True},
+    )
+
+    snapshot_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    account_id = Column(UUID(as_uuid=True), ForeignKey('account.account_id', ondelete='CASCADE'), nullable=False)
+    balance = Column(Numeric(15, 2), nullable=False)
+    tx_count = Column(Integer, nullable=False)   # ledger rows covered since the account was opened
+    taken_at = Column(DateTime, nullable=False)  # covers rows with transaction_date <= taken_at
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    # Filled in by the background verifier
+    verified_at = Column(DateTime, nullable=True)
+    is_consistent = Column(Boolean, nullable=True)
+
+
+class StripeEvent(Base):
+    """Inbox of verified Stripe webhook deliveries, applied by a background consumer"""
+    __tablename__ = "stripe_event"
+    __table_args__ = (
+        Index('ix_stripe_event_pending', 'received_at', postgresql_where=text('processed_at IS NULL')),
+        {'extend_existing': True},
+    )
+
+    event_id = Column(String(255), primary_key=True)  # Stripe "evt_..." id, retries reuse it
+    type = Column(String(100), nullable=False)
+    payload = Column(JSON, nullable=False)
+    received_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    processed_at = Column(DateTime, nullable=True)
+    attempts = Column(Integer, default=0, nullable=False)
+    error = Column(String, nullable=True)
@@ -0,0 +1,144 @@
+"""
+rollups.py - Incremental per-account monthly transaction totals.
+
+Every code path that inserts ``Transaction`` rows also calls ``add_to_rollups``
+in the same database transaction, so ``transaction_monthly_rollup`` always
+matches the rows it summarizes and monthly views never scan history.
+
+Transactions stored before the table existed are not in it. Backfill them once
+after deploying (safe while the app is running, and safe to re-run):
+    python -m services.wallet_service.rollups [--account ACCOUNT_ID]
+"""
+from collections import defaultdict
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Iterable, Optional, Tuple
+from uuid import UUID
+import argparse
+import logging
+
+from sqlalchemy import Date, case, cast, delete, func, insert as sa_insert, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from .models import Transaction, TransactionMonthlyRollup
+
+logger = logging.getLogger(__name__)
+
+# (account_id, transaction_date, type, amount)
+RollupEntry = Tuple[UUID, datetime, str, Decimal]
+
+
+def month_of(moment: datetime) -> date:
+    return date(moment.year, moment.month, 1)
+
+
+def add_to_rollups(db: Session, entries: Iterable[RollupEntry]):
+    """Fold new transactions into their monthly rollup rows (one upsert statement, no commit)"""
+    totals = defaultdict(lambda: [Decimal("0"), 0, Decimal("0"), 0])
+    for account_id, moment, tx_type, amount in entries:
+        bucket = totals[(account_id, month_of(moment or datetime.utcnow()))]
+        if tx_type == "credit":
+            bucket[0] += Decimal(amount)
+            bucket[1] += 1
+        else:
+            bucket[2] += Decimal(amount)
+            bucket[3] += 1
+    if not totals:
+        return
+
+    now = datetime.utcnow()
+    statement = insert(TransactionMonthlyRollup).values(
+        [
+            {
+                "account_id": account_id,
+                "month": month,
+                "credit_total": credit_total,
+                "credit_count": credit_count,
+                "debit_total": debit_total,
+                "debit_count": debit_count,
+                "updated_at": now,
+            }
+            for (account_id, month), (
+                credit_total,
+                credit_count,
+                debit_total,
+                debit_count,
+            ) in totals.items()
+        ]
+    )
+    rollup = TransactionMonthlyRollup
+    db.execute(
+        statement.on_conflict_do_update(
+            index_elements=[rollup.account_id, rollup.month],
+            set_={
+                "credit_total": rollup.credit_total + statement.excluded.credit_total,
+                "credit_count": rollup.credit_count + statement.excluded.credit_count,
+                "debit_total": rollup.debit_total + statement.excluded.debit_total,
+                "debit_count": rollup.debit_count + statement.excluded.debit_count,
+                "updated_at": statement.excluded.updated_at,
+            },
+        )
+    )
+
+
+def rebuild_rollups(db: Session, account_id: Optional[UUID] = None):
+    """Recompute rollups from the transaction table (backfill / repair), then commit"""
+    month = func.date_trunc("month", Transaction.transaction_date)
+    is_credit = Transaction.type == "credit"
+    aggregate = select(
+        Transaction.account_id,
+        cast(month, Date),
+        func.sum(case((is_credit, Transaction.amount), else_=0)),
+        func.count().filter(is_credit),
+        func.sum(case((is_credit, 0), else_=Transaction.amount)),
+        func.count().filter(~is_credit),
+        func.now(),
+    ).group_by(Transaction.account_id, month)
+
+    clear = delete(TransactionMonthlyRollup)
+    if account_id is not None:
+        aggregate = aggregate.where(Transaction.account_id == account_id)
+        clear = clear.where(TransactionMonthlyRollup.account_id == account_id)
+
+    try:
+        if db.get_bind().dialect.name == "postgresql":
+            # Concurrent add_to_rollups wait here, so their transactions are either in the
+            # aggregate (committed before it) or folded in after this commit
+            db.execute(text("LOCK TABLE transaction_monthly_rollup IN SHARE ROW EXCLUSIVE MODE"))
+        db.execute(clear)
+        db.execute(
+            sa_insert(TransactionMonthlyRollup).from_select(
+                [
+                    "account_id",
+                    "month",
+                    "credit_total",
+                    "credit_count",
+                    "debit_total",
+                    "debit_count",
+                    "updated_at",
+                ],
+                aggregate,
+            )
+        )
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    logger.info(f" Monthly rollups rebuilt for {account_id or 'all accounts'}")
+
+
+if __name__ == "__main__":
+    from database.database import SessionLocal
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Rebuild monthly rollups from transactions")
+    parser.add_argument("--account", type=UUID, default=None, help="only this account")
+    args = parser.parse_args()
+    session = SessionLocal()
+    try:
+        rebuild_rollups(session, args.account)
+        rows = session.query(func.count()).select_from(TransactionMonthlyRollup).scalar()
+        print(f"{rows} rollup rows stored")
+    finally:
+        session.close()
@@ -1,67 +1,165 @@
 import os
 from uuid import UUID
+from datetime import date, datetime
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, Request, HTTPException
+from fastapi import APIRouter, Depends, Request, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
+from api_gateway.admin import require_admin
 from database.database import get_db
-from .service import get_account, add_balance, deduct_balance
-from .schemas import TopUpRequest, PaymentRequest
-import stripe
+from services.auth_service.dependencies import get_current_user_id
+from shared.cursors import InvalidCursor
+from .service import (
+    get_account,
+    add_balance,
+    deduct_balance,
+    pay_bills,
+    InsufficientBalance,
+    BillPaymentError,
+)
+from .ledger import balance_at, reconcile
+from .history import list_transactions, monthly_totals
+from .webhooks import construct_event, record_event, InvalidWebhook
+from .stripe_client import StripeClient, StripeAPIError, StripeUnavailable, get_stripe_client
+from .cache import balance_cache
+from .schemas import (
+    TopUpRequest,
+    PaymentRequest,
+    BillPaymentRequest,
+    BillPaymentResponse,
+    TransactionPage,
+    MonthlyTotal,
+)
 from decimal import Decimal
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
-stripe.api_key = os.getenv("STRIPE_SECRET_KEY")
-stripe.webhook_key = os.getenv("STRIPE_WEBHOOK_SECRET")
+STRIPE_WEBHOOK_SECRET = os.getenv("STRIPE_WEBHOOK_SECRET")
 FRONTEND_URL = os.getenv("FRONTEND_URL")
 router = APIRouter(prefix="/api/wallet", tags=["Wallet"])
 
 
 @router.get("/")
-def get_wallet(user_id: UUID, db: Session = Depends(get_db)):
+def get_wallet(user_id: UUID = Depends(get_current_user_id), db: Session = Depends(get_db)):
+    balance = balance_cache.get_or_load(str(user_id), lambda: get_account(db, user_id).balance)
+    return {"balance": float(balance)}
+
+
+@router.get("/cache-stats", dependencies=[Depends(require_admin)])
+def get_wallet_cache_stats():
+    return balance_cache.stats()
+
+
+@router.get("/transactions", response_model=TransactionPage)
+def get_transactions(
+    user_id: UUID = Depends(get_current_user_id),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    type: Optional[str] = Query(None, pattern="^(debit|credit)$"),
+    category: Optional[str] = None,
+    source: Optional[str] = Query(None, pattern="^(sms|manual|wallet)$"),
+    db: Session = Depends(get_db),
+):
+    try:
+        return list_transactions(db, user_id, limit, cursor, type, category, source)
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+@router.get("/transactions/monthly", response_model=List[MonthlyTotal])
+def get_monthly_totals(
+    user_id: UUID = Depends(get_current_user_id),
+    since: Optional[date] = None,
+    db: Session = Depends(get_db),
+):
+    return monthly_totals(db, user_id, since)
+
+
+@router.get("/balance-at")
+def get_wallet_balance_at(
+    at: datetime, user_id: UUID = Depends(get_current_user_id), db: Session = Depends(get_db)
+):
     account = get_account(db, user_id)
-    return {"balance": float(account.balance)}
+    return {"balance": float(balance_at(db, account.account_id, at)), "at": at}
+
+
+@router.get("/reconcile")
+def reconcile_wallet(user_id: UUID = Depends(get_current_user_id), db: Session = Depends(get_db)):
+    account = get_account(db, user_id)
+    return reconcile(db, account.account_id)
 
 
 @router.post("/topup")
-def topup_wallet(data: TopUpRequest, user_id: UUID, db: Session = Depends(get_db)):
+def topup_wallet(
+    data: TopUpRequest, user_id: UUID = Depends(get_current_user_id), db: Session = Depends(get_db)
+):
     account = add_balance(db, user_id, data.amount)
     return {"message": "Wallet topped up", "balance": float(account.balance)}
 
 
 @router.post("/pay")
-def pay_from_wallet(data: PaymentRequest, user_id: UUID, db: Session = Depends(get_db)):
-    account = deduct_balance(db, user_id, data.amount)
+def pay_from_wallet(
+    data: PaymentRequest,
+    user_id: UUID = Depends(get_current_user_id),
+    db: Session = Depends(get_db),
+):
+    try:
+        account = deduct_balance(db, user_id, data.amount)
+    except InsufficientBalance as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return {"message": "Payment successful", "balance": float(account.balance)}
 
 
+@router.post("/pay-bills", response_model=BillPaymentResponse)
+def pay_bills_from_wallet(
+    data: BillPaymentRequest,
+    user_id: UUID = Depends(get_current_user_id),
+    db: Session = Depends(get_db),
+):
+    try:
+        result = pay_bills(db, user_id, data.bill_ids)
+    except (InsufficientBalance, BillPaymentError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return BillPaymentResponse(message="Bills paid", **result)
+
+
 @router.post("/create-checkout")
-def create_checkout_session(amount: float, user_id: UUID):
+async def create_checkout_session(
+    amount: float,
+    user_id: UUID = Depends(get_current_user_id),
+    stripe_client: StripeClient = Depends(get_stripe_client),
+):
     # Stripe requires minimum of $0.50 for checkout sessions
     if amount < 0.50:
         raise HTTPException(status_code=400, detail="Minimum top-up amount is $0.50")
 
-    session = stripe.checkout.Session.create(
-        payment_method_types=["card"],
-        mode="payment",
-        line_items=[
-            {
-                "price_data": {
-                    "currency": "usd",
-                    "product_data": {"name": "Wallet Top-Up"},
-                    "unit_amount": int(Decimal(str(amount)) * 100),
-                },
-                "quantity": 1,
-            }
-        ],
-        metadata={"user_id": str(user_id)},
-        success_url=f"{FRONTEND_URL}/wallet?success=true",
-        cancel_url=f"{FRONTEND_URL}/wallet?canceled=true"
-    )
-
-    return {"checkout_url": session.url}
+    try:
+        session = await stripe_client.create_checkout_session(
+            payment_method_types=["card"],
+            mode="payment",
+            line_items=[
+                {
+                    "price_data": {
+                        "currency": "usd",
+                        "product_data": {"name": "Wallet Top-Up"},
+                        "unit_amount": int(Decimal(str(amount)) * 100),
+                    },
+                    "quantity": 1,
+                }
+            ],
+            metadata={"user_id": str(user_id)},
+            success_url=f"{FRONTEND_URL}/wallet?success=true",
+            cancel_url=f"{FRONTEND_URL}/wallet?canceled=true",
+        )
+    except StripeUnavailable:
+        raise HTTPException(status_code=503, detail="Payment provider unavailable, retry later")
+    except StripeAPIError as e:
+        raise HTTPException(status_code=502, detail=f"Payment provider error: {str(e)}")
+
+    return {"checkout_url": session["url"]}
 
 
 @router.post("/webhook")
@@ -69,14 +167,12 @@ async def stripe_webhook(request: Request, db: Session = Depends(get_db)):
     payload = await request.body()
     sig = request.headers.get("stripe-signature")
 
-    event = stripe.Webhook.construct_event(payload, sig, stripe.webhook_key)
-
-    if event["type"] == "checkout.session.completed":
-        intent = event["data"]["object"]
-
-        user_id = UUID(intent["metadata"]["user_id"])
-        amount = intent["amount"] / 100
-
-        add_balance(db=db, user_id=user_id, amount=amount, description="Stripe wallet top-up")
+    try:
+        event = construct_event(payload, sig, STRIPE_WEBHOOK_SECRET)
+    except InvalidWebhook as e:
+        raise HTTPException(status_code=400, detail=f"Invalid webhook: {str(e)}")
 
+    # Acknowledge as soon as the event is durable; the inbox consumer applies it.
+    # The insert is blocking I/O, so it runs off the event loop
+    await run_in_threadpool(record_event, db, event)
     return {"status": "ok"}
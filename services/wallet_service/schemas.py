@@ -1,4 +1,7 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field
+from typing import List, Optional
+from uuid import UUID
+from datetime import date, datetime
 
 
 class WalletResponse(BaseModel):
@@ -6,9 +9,54 @@ class WalletResponse(BaseModel):
 
 
 class TopUpRequest(BaseModel):
-    amount: float
+    amount: float = Field(..., gt=0)
 
 
 class PaymentRequest(BaseModel):
-    amount: float
+    amount: float = Field(..., gt=0)
 #    bill_id: int
+
+
+class BillPaymentRequest(BaseModel):
+    bill_ids: List[UUID] = Field(..., min_length=1, max_length=100)
+
+
+class BillPayment(BaseModel):
+    bill_id: UUID
+    transaction_id: UUID
+    amount: float
+
+
+class BillPaymentResponse(BaseModel):
+    message: str
+    balance: float
+    total_paid: float
+    payments: List[BillPayment]
+
+
+class TransactionResponse(BaseModel):
+    transaction_id: UUID
+    account_id: UUID
+    amount: float
+    type: str
+    transaction_date: datetime
+    category: Optional[str] = None
+    merchant: Optional[str] = None
+    source: Optional[str] = None
+    description: Optional[str] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class TransactionPage(BaseModel):
+    items: List[TransactionResponse]
+    next_cursor: Optional[str] = None
+
+
+class MonthlyTotal(BaseModel):
+    month: date
+    credits: float
+    credit_count: int
+    debits: float
+    debit_count: int
+    net: float
@@ -1,47 +1,199 @@
-from uuid import UUID
+from typing import List
+from uuid import UUID, uuid4
 from decimal import Decimal
+from datetime import datetime
+from sqlalchemy import case, select, update, insert
 from sqlalchemy.orm import Session
-from .models import Account, Transaction
+from database.persistence import insert_returning
+from .models import Account, Transaction, Bill
+from .cache import balance_cache
+from .rollups import add_to_rollups
+
+
+class InsufficientBalance(Exception):
+    """Raised when a debit would take the wallet balance below zero"""
+
+
+class BillPaymentError(Exception):
+    """Raised when requested bills are unknown to the user or already paid"""
+
+
+WALLET_DEFAULTS = {"account_name": "Wallet", "account_type": "wallet", "balance": Decimal("0")}
+
+
+def _new_wallet(user_id: UUID) -> Account:
+    return Account(user_id=user_id, **WALLET_DEFAULTS)
 
 
 def get_account(db: Session, user_id: UUID):
     account = db.query(Account).filter(Account.user_id == user_id).first()
     if not account:
-        account = Account(user_id=user_id, balance=Decimal("0"))
-        db.add(account)
+        account = insert_returning(db, Account, user_id=user_id, **WALLET_DEFAULTS)
         db.commit()
-        db.refresh(account)
     return account
 
 
-def add_balance(db: Session, user_id: UUID, amount: float, description="Top Up"):
-    account = get_account(db, user_id)
-    account.balance += Decimal(str(amount))
+def _apply_balance_change(db: Session, user_id: UUID, amount: Decimal, tx_type: str, description):
+    """
+    Move the balance and append the ledger row, without committing.
 
-    tx = Transaction(
-        account_id=account.account_id, amount=Decimal(str(amount)), type="credit", description=description    # "topup" → "credit"
+    The balance is changed by a single conditional UPDATE ... RETURNING, which
+    takes the account row lock: concurrent writers serialize on that row and
+    debits can never overdraw. The ledger row is stamped after the lock is held
+    so transaction_date follows the order in which balance changes were applied.
+
+    Returns the (account_id, balance) row, or None when no account matched
+    (or, for a debit, the balance was insufficient).
+    """
+    account_id = (
+        select(Account.account_id).where(Account.user_id == user_id).limit(1).scalar_subquery()
     )
+    statement = update(Account).where(Account.account_id == account_id)
 
-    db.add(tx)
-    db.commit()
-    db.refresh(account)
-    return account
+    if tx_type == "debit":
+        statement = statement.where(Account.balance >= amount).values(
+            balance=Account.balance - amount
+        )
+    else:
+        statement = statement.values(balance=Account.balance + amount)
+
+    row = db.execute(statement.returning(Account.account_id, Account.balance)).first()
+    if row is None:
+        return None
+
+    stamped_at = datetime.utcnow()
+    db.execute(
+        insert(Transaction).values(
+            account_id=row.account_id,
+            amount=amount,
+            type=tx_type,
+            description=description,
+            transaction_date=stamped_at,
+        )
+    )
+    add_to_rollups(db, [(row.account_id, stamped_at, tx_type, amount)])
+    return row
+
+
+def credit_balance(db: Session, user_id: UUID, amount: Decimal, description="Top Up"):
+    """Credit the wallet inside the caller's transaction (creating it if needed), no commit"""
+    row = _apply_balance_change(db, user_id, amount, "credit", description)
+    if row is None:
+        # First credit for this user: open the wallet, then apply the credit
+        db.add(_new_wallet(user_id))
+        db.flush()
+        row = _apply_balance_change(db, user_id, amount, "credit", description)
+    return row
+
+
+def add_balance(db: Session, user_id: UUID, amount: float, description="Top Up"):
+    try:
+        row = credit_balance(db, user_id, Decimal(str(amount)), description)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    balance_cache.invalidate(str(user_id))
+    return row
 
 
 def deduct_balance(db: Session, user_id: UUID, amount: float, description="Payment"):
-    account = get_account(db, user_id)
+    amount = Decimal(str(amount))
+    try:
+        row = _apply_balance_change(db, user_id, amount, "debit", description)
+        if row is None:
+            raise InsufficientBalance("Insufficient balance")
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    balance_cache.invalidate(str(user_id))
+    return row
 
-    if account.balance < Decimal(str(amount)):
-        raise Exception("Insufficient balance")
 
-    account.balance -= Decimal(str(amount))
+def pay_bills(db: Session, user_id: UUID, bill_ids: List[UUID]) -> dict:
+    """
+    Pay several bills from the wallet in one transaction.
 
-    tx = Transaction(
-        account_id=account.account_id, amount=Decimal(str(amount)), type="debit", description=description     # "payment" → "debit"
-    )
+    The account row is locked once, the bills are locked and validated
+    together, then one balance UPDATE, one multi-row ledger INSERT (one debit
+    per bill) and one UPDATE flipping every bill to paid are issued, so the
+    number of round trips does not grow with the number of bills.
+    """
+    bill_ids = list(dict.fromkeys(bill_ids))
+    try:
+        account = db.execute(
+            select(Account.account_id, Account.balance)
+            .where(Account.user_id == user_id)
+            .limit(1)
+            .with_for_update()
+        ).first()
+        if account is None:
+            raise InsufficientBalance("Insufficient balance")
 
-    db.add(tx)
-    db.commit()
-    db.refresh(account)
-    return account
+        user_accounts = select(Account.account_id).where(Account.user_id == user_id)
+        bills = db.execute(
+            select(Bill.bill_id, Bill.merchant, Bill.amount, Bill.status)
+            .where(Bill.bill_id.in_(bill_ids), Bill.account_id.in_(user_accounts))
+            .with_for_update()
+        ).all()
+
+        found = {bill.bill_id: bill for bill in bills}
+        missing = [str(bill_id) for bill_id in bill_ids if bill_id not in found]
+        if missing:
+            raise BillPaymentError(f"Bills not found: {', '.join(missing)}")
+        paid = [str(bill.bill_id) for bill in bills if bill.status == "paid"]
+        if paid:
+            raise BillPaymentError(f"Bills already paid: {', '.join(paid)}")
+
+        total = sum((found[bill_id].amount for bill_id in bill_ids), Decimal("0"))
+        if account.balance < total:
+            raise InsufficientBalance("Insufficient balance")
+
+        paid_at = datetime.utcnow()
+        payments = [
+            {
+                "transaction_id": uuid4(),
+                "account_id": account.account_id,
+                "amount": found[bill_id].amount,
+                "type": "debit",
+                "merchant": found[bill_id].merchant,
+                "description": f"Bill payment - {found[bill_id].merchant}",
+                "transaction_date": paid_at,
+            }
+            for bill_id in bill_ids
+        ]
+        transaction_for_bill = {
+            bill_id: payment["transaction_id"] for bill_id, payment in zip(bill_ids, payments)
+        }
+
+        db.execute(
+            update(Account)
+            .where(Account.account_id == account.account_id)
+            .values(balance=Account.balance - total)
+        )
+        db.execute(insert(Transaction).values(payments))
+        add_to_rollups(db, [(p["account_id"], paid_at, "debit", p["amount"]) for p in payments])
+        db.execute(
+            update(Bill)
+            .where(Bill.bill_id.in_(bill_ids))
+            .values(status="paid", transaction_id=case(transaction_for_bill, value=Bill.bill_id))
+        )
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
 
+    balance_cache.invalidate(str(user_id))
+    return {
+        "balance": account.balance - total,
+        "total_paid": total,
+        "payments": [
+            {
+                "bill_id": bill_id,
+                "transaction_id": transaction_for_bill[bill_id],
+                "amount": found[bill_id].amount,
+            }
+            for bill_id in bill_ids
+        ],
+    }
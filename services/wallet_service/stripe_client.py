@@ -0,0 +1,222 @@
+"""
+stripe_client.py - Async Stripe adapter for the wallet service.
+
+Checkout creation goes through a shared ``httpx.AsyncClient`` (keep-alive
+connection pool, explicit timeouts) instead of the blocking Stripe SDK, so a
+slow Stripe round trip no longer pins a threadpool worker. Transient failures
+are retried with jittered exponential backoff under a single idempotency key,
+and a circuit breaker fails fast while Stripe is down. Tests swap the client
+for ``StubStripeClient`` through the ``get_stripe_client`` dependency.
+"""
+from typing import Optional
+import asyncio
+import logging
+import os
+import random
+import time
+import uuid
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+STRIPE_API_BASE = "https://api.stripe.com"
+STRIPE_SECRET_KEY = os.getenv("STRIPE_SECRET_KEY")
+STRIPE_TIMEOUT = float(os.getenv("STRIPE_TIMEOUT", "10"))
+STRIPE_CONNECT_TIMEOUT = float(os.getenv("STRIPE_CONNECT_TIMEOUT", "3"))
+STRIPE_MAX_RETRIES = int(os.getenv("STRIPE_MAX_RETRIES", "2"))
+STRIPE_MAX_CONNECTIONS = int(os.getenv("STRIPE_MAX_CONNECTIONS", "20"))
+
+RETRYABLE_STATUS = {409, 429, 500, 502, 503, 504}
+
+
+class StripeUnavailable(Exception):
+    """Stripe could not be reached (retries exhausted or circuit open)"""
+
+
+class StripeAPIError(Exception):
+    """Stripe rejected the request"""
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    closed -> open after `failure_threshold` failed calls; open rejects calls
+    until `reset_timeout` has passed, then lets a single trial call through
+    (half-open). A success closes the circuit, a failure reopens it.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_started_at: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open":
+            now = time.monotonic()
+            # A trial that never reported back (e.g. cancelled) expires like the open state
+            if self._trial_started_at is None or now - self._trial_started_at >= self.reset_timeout:
+                self._trial_started_at = now
+                return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._trial_started_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial_started_at = None
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+
+def _encode_form(params, prefix: str = "") -> list:
+    """Flatten nested params the way Stripe expects: line_items[0][price_data][currency]=usd"""
+    pairs = []
+    items = params.items() if isinstance(params, dict) else enumerate(params)
+    for key, value in items:
+        name = f"{prefix}[{key}]" if prefix else str(key)
+        if isinstance(value, (dict, list, tuple)):
+            pairs.extend(_encode_form(value, name))
+        elif isinstance(value, bool):
+            pairs.append((name, "true" if value else "false"))
+        elif value is not None:
+            pairs.append((name, str(value)))
+    return pairs
+
+
+class StripeClient:
+    """Pooled async client for the Stripe REST API"""
+
+    def __init__(
+        self,
+        api_key: Optional[str] = STRIPE_SECRET_KEY,
+        base_url: str = STRIPE_API_BASE,
+        timeout: float = STRIPE_TIMEOUT,
+        connect_timeout: float = STRIPE_CONNECT_TIMEOUT,
+        max_retries: int = STRIPE_MAX_RETRIES,
+        max_connections: int = STRIPE_MAX_CONNECTIONS,
+        backoff_base: float = 0.25,
+        backoff_max: float = 2.0,
+        breaker: Optional[CircuitBreaker] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker()
+        self._http = httpx.AsyncClient(
+            base_url=base_url,
+            auth=(api_key or "", ""),
+            timeout=httpx.Timeout(timeout, connect=connect_timeout),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+                keepalive_expiry=60,
+            ),
+            transport=transport,
+        )
+
+    async def aclose(self):
+        await self._http.aclose()
+
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter: spreads retries from many workers over the whole window
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2**attempt)))
+
+    async def _post(self, path: str, params: dict) -> dict:
+        if not self.breaker.allow():
+            raise StripeUnavailable("Stripe circuit open")
+
+        # One key for every attempt so a retried POST can never create two sessions
+        headers = {"Idempotency-Key": str(uuid.uuid4())}
+        data = dict(_encode_form(params))
+        last_error = None
+
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                await asyncio.sleep(self._backoff(attempt - 1))
+            try:
+                response = await self._http.post(path, data=data, headers=headers)
+            except httpx.TransportError as e:
+                last_error = f"{type(e).__name__}: {e}"
+                continue
+
+            should_retry = response.headers.get("Stripe-Should-Retry")
+            if response.status_code < 400:
+                self.breaker.record_success()
+                return response.json()
+            if should_retry == "false" or (
+                response.status_code not in RETRYABLE_STATUS and should_retry != "true"
+            ):
+                # The request itself is wrong; Stripe is healthy
+                self.breaker.record_success()
+                try:
+                    message = response.json().get("error", {}).get("message", response.text)
+                except ValueError:
+                    message = response.text
+                raise StripeAPIError(response.status_code, message)
+            last_error = f"HTTP {response.status_code}"
+
+        self.breaker.record_failure()
+        logger.error(f" Stripe unavailable after {self.max_retries + 1} attempts: {last_error}")
+        raise StripeUnavailable(last_error)
+
+    async def create_checkout_session(self, **params) -> dict:
+        return await self._post("/v1/checkout/sessions", params)
+
+
+class StubStripeClient:
+    """In-memory stand-in for tests and local runs without Stripe access"""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = []
+
+    async def aclose(self):
+        pass
+
+    async def create_checkout_session(self, **params) -> dict:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self.calls.append(params)
+        session_id = f"cs_test_{uuid.uuid4().hex}"
+        return {"id": session_id, "url": f"https://checkout.stripe.test/pay/{session_id}"}
+
+
+_client: Optional[StripeClient] = None
+
+
+async def get_stripe_client() -> StripeClient:
+    """FastAPI dependency returning the process-wide pooled client"""
+    global _client
+    if _client is None:
+        _client = StripeClient()
+    return _client
+
+
+async def close_stripe_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -0,0 +1,143 @@
+"""
+webhooks.py - Stripe webhook inbox.
+
+Deliveries are verified, stored in ``stripe_event`` keyed by the Stripe event
+id and acknowledged right away; a background consumer applies them in
+batches. Stripe retries reuse the event id, so a duplicate delivery is dropped
+by the primary key at insert time and can never credit the wallet twice.
+"""
+from datetime import datetime
+from decimal import Decimal
+from typing import Optional
+from uuid import UUID
+import hashlib
+import hmac
+import json
+import logging
+import os
+import time
+
+import stripe
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from database.database import SessionLocal
+from .models import StripeEvent
+from .service import credit_balance
+from .cache import balance_cache
+
+logger = logging.getLogger(__name__)
+
+SIGNATURE_TOLERANCE = 300  # seconds, same default as the Stripe SDK
+CONSUMER_BATCH_SIZE = int(os.getenv("STRIPE_EVENTS_BATCH_SIZE", "100"))
+MAX_ATTEMPTS = 5  # failing events are parked after this many tries
+
+
+class InvalidWebhook(Exception):
+    """Payload or signature rejected"""
+
+
+def sign_payload(payload: bytes, secret: str, timestamp: Optional[int] = None) -> str:
+    """Build a Stripe-Signature header for a payload (local stand-ins and fixtures)"""
+    timestamp = int(time.time()) if timestamp is None else timestamp
+    signed = f"{timestamp}.".encode("utf-8") + payload
+    signature = hmac.new(secret.encode("utf-8"), signed, hashlib.sha256).hexdigest()
+    return f"t={timestamp},v1={signature}"
+
+
+def construct_event(payload: bytes, sig_header: Optional[str], secret: Optional[str]) -> dict:
+    """Verify the Stripe signature locally and return the decoded event"""
+    try:
+        stripe.WebhookSignature.verify_header(
+            payload.decode("utf-8"), sig_header, secret, SIGNATURE_TOLERANCE
+        )
+        event = json.loads(payload)
+    except (stripe.SignatureVerificationError, ValueError) as e:
+        raise InvalidWebhook(str(e))
+
+    if not isinstance(event, dict) or "id" not in event or "type" not in event:
+        raise InvalidWebhook("Malformed event")
+    return event
+
+
+def record_event(db: Session, event: dict) -> bool:
+    """Persist a verified event; returns False for a duplicate delivery"""
+    result = db.execute(
+        insert(StripeEvent)
+        .values(
+            event_id=event["id"],
+            type=event["type"],
+            payload=event,
+            received_at=datetime.utcnow(),
+            attempts=0,
+        )
+        .on_conflict_do_nothing(index_elements=[StripeEvent.event_id])
+    )
+    db.commit()
+    return result.rowcount == 1
+
+
+def _apply_event(db: Session, event: StripeEvent) -> Optional[UUID]:
+    """Apply one event inside the consumer's transaction; returns the credited user"""
+    if event.type == "checkout.session.completed":
+        session = event.payload["data"]["object"]
+        user_id = UUID(session["metadata"]["user_id"])
+        amount_cents = session.get("amount_total", session.get("amount"))
+        credit_balance(db, user_id, Decimal(amount_cents) / 100, description="Stripe wallet top-up")
+        return user_id
+    return None
+
+
+def process_pending_events(db: Session, batch_size: int = CONSUMER_BATCH_SIZE) -> int:
+    """
+    Apply one batch of pending events and commit once.
+
+    Rows are claimed with FOR UPDATE SKIP LOCKED so several consumers can run
+    side by side; each event is applied in a savepoint so one bad payload only
+    records an error instead of failing the whole batch.
+    """
+    events = (
+        db.execute(
+            select(StripeEvent)
+            .where(StripeEvent.processed_at.is_(None), StripeEvent.attempts < MAX_ATTEMPTS)
+            .order_by(StripeEvent.received_at)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        .scalars()
+        .all()
+    )
+
+    credited = set()
+    for event in events:
+        event.attempts += 1
+        try:
+            with db.begin_nested():
+                user_id = _apply_event(db, event)
+            event.processed_at = datetime.utcnow()
+            event.error = None
+            if user_id is not None:
+                credited.add(user_id)
+        except Exception as e:
+            event.error = str(e)[:500]
+            logger.error(f" Stripe event {event.event_id} failed: {str(e)}")
+
+    db.commit()
+    for user_id in credited:
+        balance_cache.invalidate(str(user_id))
+    return len(events)
+
+
+def stripe_events_job():
+    """Background entry point: drain the inbox batch by batch"""
+    db = SessionLocal()
+    try:
+        while True:
+            processed = process_pending_events(db)
+            if processed:
+                logger.info(f" Stripe inbox: {processed} events processed")
+            if processed < CONSUMER_BATCH_SIZE:
+                break
+    finally:
+        db.close()
@@ -0,0 +1,28 @@
+"""
+cursors.py - Opaque keyset cursors shared by the paginated history endpoints.
+
+A cursor is the (timestamp, id) of the last row of a page, base64-encoded;
+the next page starts strictly after it in (timestamp, id) order.
+"""
+from datetime import datetime
+from typing import Tuple
+from uuid import UUID
+import base64
+
+
+class InvalidCursor(Exception):
+    """Cursor could not be decoded"""
+
+
+def encode_cursor(moment: datetime, row_id: UUID) -> str:
+    raw = f"{moment.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        moment, row_id = raw.split("|")
+        return datetime.fromisoformat(moment), UUID(row_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise InvalidCursor(str(e))
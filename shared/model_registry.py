@@ -0,0 +1,243 @@
+"""
+model_registry.py - Named model slots that can be reloaded while serving.
+
+Each slot holds the live version of one model. ``reload`` builds the new
+version on a background thread and runs the slot's warmup, a smoke batch
+through the new model. Only then is the reference swapped, in a single
+assignment, so a request sees either the old version or the new one.
+Requests already running keep the object they started with. The old version
+is freed once the last of them finishes; the slot keeps only a weak
+reference to it, to report that it was released. If loading or warmup fails,
+the current version stays in place and the error is reported.
+
+A reload only happens in the process that runs it. ``request`` also records
+the wanted source in MODEL_REGISTRY_FILE. The ``sync`` background job in
+every gateway worker reads that file, so the other workers, including ones
+recycled from the master's preloaded copy, follow within
+MODEL_SYNC_INTERVAL seconds. The gunicorn master clears the file when it
+starts, so a redeploy serves its own default artifacts instead of the
+sources requested from the previous release.
+"""
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import weakref
+
+logger = logging.getLogger(__name__)
+
+MODEL_REGISTRY_FILE = os.getenv(
+    "MODEL_REGISTRY_FILE", str(Path(tempfile.gettempdir()) / "billwise-models.json")
+)
+
+
+class ReloadInProgress(Exception):
+    pass
+
+
+class ModelVersion(NamedTuple):
+    version: str
+    model: Any
+    source: Optional[str]  # None: the service's default artifact
+    loaded_at: datetime
+    load_seconds: float
+    warmup_seconds: float
+
+
+class ModelSlot:
+    """One swappable model: loader(source) -> (version, model), warmup(model) raises on failure"""
+
+    def __init__(
+        self,
+        name: str,
+        loader: Callable[[Optional[str]], Tuple[str, Any]],
+        warmup: Optional[Callable[[Any], None]] = None,
+        on_swap: Optional[Callable[[Any], None]] = None,
+    ):
+        self.name = name
+        self.loader = loader
+        self.warmup = warmup
+        self.on_swap = on_swap  # for state derived from the model, e.g. cached predictions
+        self._current: Optional[ModelVersion] = None
+        self._lock = threading.Lock()  # held for the whole load, first or reload
+        self._loading: Optional[str] = None
+        self._error: Optional[str] = None
+        self._failed_source: Optional[str] = None
+        self._previous: Optional[Tuple[str, Optional[weakref.ref]]] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._current is not None
+
+    def current(self, source: Optional[str] = None) -> ModelVersion:
+        """Live version, loaded from `source` on first use; read it once per request"""
+        current = self._current
+        if current is None:
+            with self._lock:
+                if self._current is None:
+                    self._install(self._build(source))
+                current = self._current
+        return current
+
+    def get(self, source: Optional[str] = None):
+        return self.current(source).model
+
+    def reload(self, source: Optional[str] = None) -> threading.Thread:
+        """Load `source` in the background and swap it in; raises if a load is running"""
+        if not self._lock.acquire(blocking=False):
+            raise ReloadInProgress(f"{self.name} is already loading")
+        self._loading = source or "default"
+        self._error = None
+        thread = threading.Thread(
+            target=self._reload, args=(source,), name=f"reload-{self.name}", daemon=True
+        )
+        thread.start()
+        return thread
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until no load is running; False on timeout"""
+        if not self._lock.acquire(timeout=-1 if timeout is None else timeout):
+            return False
+        self._lock.release()
+        return True
+
+    def _reload(self, source: Optional[str]):
+        try:
+            self._install(self._build(source))
+            self._failed_source = None
+        except Exception as e:
+            self._error = str(e)
+            self._failed_source = source
+            logger.error(f" Model {self.name} reload from {source} failed: {str(e)}", exc_info=True)
+        finally:
+            self._loading = None
+            self._lock.release()
+
+    def _build(self, source: Optional[str]) -> ModelVersion:
+        started = time.perf_counter()
+        version, model = self.loader(source)
+        loaded = time.perf_counter()
+        if self.warmup is not None:
+            self.warmup(model)
+        return ModelVersion(
+            version,
+            model,
+            source,
+            datetime.utcnow(),
+            loaded - started,
+            time.perf_counter() - loaded,
+        )
+
+    def _install(self, new: ModelVersion):
+        old = self._current
+        self._current = new
+        if self.on_swap is not None:
+            self.on_swap(new.model)
+        if old is not None:
+            try:
+                self._previous = (old.version, weakref.ref(old.model))
+            except TypeError:
+                self._previous = (old.version, None)
+        logger.info(
+            f" Model {self.name} {new.version} live (load {new.load_seconds:.2f}s, "
+            f"warmup {new.warmup_seconds:.2f}s)"
+        )
+
+    def wants(self, source: Optional[str]) -> bool:
+        """True if `source` is neither live, loading, nor the source that just failed"""
+        current = self._current
+        live = current.source if current is not None else None
+        loading = self._loading
+        return (
+            source != live
+            and (loading is None or (source or "default") != loading)
+            and not (self._error is not None and source == self._failed_source)
+        )
+
+    def status(self) -> dict:
+        current, previous = self._current, self._previous
+        status = {
+            "name": self.name,
+            "version": None,
+            "source": None,
+            "loaded_at": None,
+            "load_seconds": None,
+            "warmup_seconds": None,
+            "loading": self._loading,
+            "last_error": self._error,
+            "previous_version": None,
+            "previous_released": None,
+        }
+        if current is not None:
+            status.update(
+                version=current.version,
+                source=current.source,
+                loaded_at=current.loaded_at,
+                load_seconds=round(current.load_seconds, 4),
+                warmup_seconds=round(current.warmup_seconds, 4),
+            )
+        if previous is not None:
+            version, ref = previous
+            status["previous_version"] = version
+            status["previous_released"] = None if ref is None else ref() is None
+        return status
+
+
+class ModelRegistry:
+    def __init__(self, path=MODEL_REGISTRY_FILE):
+        self.path = Path(path)
+        self._slots: Dict[str, ModelSlot] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, loader, warmup=None, on_swap=None) -> ModelSlot:
+        slot = ModelSlot(name, loader, warmup, on_swap)
+        self._slots[name] = slot
+        return slot
+
+    def slot(self, name: str) -> ModelSlot:
+        """KeyError for unknown names"""
+        return self._slots[name]
+
+    def status(self) -> List[dict]:
+        return [slot.status() for slot in self._slots.values()]
+
+    def request(self, name: str, source: Optional[str] = None) -> threading.Thread:
+        """Reload here now and record `source` for the other workers"""
+        thread = self.slot(name).reload(source)
+        with self._lock:
+            wanted = self._read()
+            wanted[name] = source
+            tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(wanted))
+            os.replace(tmp, self.path)
+        return thread
+
+    def reset(self):
+        """Forget every recorded source; run once per deployment, before any worker starts"""
+        with self._lock:
+            self.path.unlink(missing_ok=True)
+
+    def sync(self):
+        """Background job: reload the slots whose recorded source differs from the live one"""
+        for name, source in self._read().items():
+            slot = self._slots.get(name)
+            if slot is None or not slot.loaded or not slot.wants(source):
+                continue
+            try:
+                slot.reload(source)
+            except ReloadInProgress:
+                pass
+
+    def _read(self) -> dict:
+        try:
+            return json.loads(self.path.read_text())
+        except FileNotFoundError:
+            return {}
+
+
+registry = ModelRegistry()
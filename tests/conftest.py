@@ -43,3 +43,20 @@ def client(test_db):
 
     app.dependency_overrides[get_db] = override_get_db
     return TestClient(app)
+
+
+@pytest.fixture(scope="session")
+def session_factory(test_db):
+    """Independent sessions on the test database, e.g. one per worker thread"""
+    return TestingSessionLocal
+
+
+@pytest.fixture
+def auth_headers():
+    """Build an Authorization header with a valid access token for a user id"""
+    from services.auth_service.utils import create_access_token
+
+    def make(user_id):
+        return {"Authorization": f"Bearer {create_access_token(data={'sub': user_id})}"}
+
+    return make
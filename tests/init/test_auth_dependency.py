@@ -0,0 +1,114 @@
+import time
+import uuid
+from datetime import timedelta
+from uuid import UUID
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from services.auth_service.dependencies import (
+    TokenCache,
+    get_current_user_id,
+    token_cache,
+    verify_access_token,
+)
+from services.auth_service.utils import create_access_token, decode_access_token
+
+VERIFICATIONS = 20_000
+
+app = FastAPI()
+
+
+@app.get("/whoami")
+async def whoami(user_id: UUID = Depends(get_current_user_id)):
+    return {"user_id": str(user_id)}
+
+
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def empty_token_cache():
+    token_cache.clear()
+    yield
+    token_cache.clear()
+
+
+@pytest.mark.unit
+def test_valid_token_resolves_user(auth_headers):
+    user_id = uuid.uuid4()
+    response = client.get("/whoami", headers=auth_headers(user_id))
+    assert response.status_code == 200
+    assert response.json() == {"user_id": str(user_id)}
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "headers",
+    [
+        {},
+        {"Authorization": "Bearer not-a-jwt"},
+        {"Authorization": "Basic dXNlcjpwYXNz"},
+    ],
+)
+def test_missing_or_invalid_token_is_rejected(headers):
+    response = client.get("/whoami", headers=headers)
+    assert response.status_code in (401, 403)
+    if response.status_code == 401:
+        assert response.headers["WWW-Authenticate"] == "Bearer"
+
+
+@pytest.mark.unit
+def test_expired_and_tampered_tokens_are_rejected():
+    expired = create_access_token({"sub": uuid.uuid4()}, expires_delta=timedelta(seconds=-1))
+    tampered = create_access_token({"sub": uuid.uuid4()})[:-2] + "xx"
+    for token in (expired, tampered):
+        response = client.get("/whoami", headers={"Authorization": f"Bearer {token}"})
+        assert response.status_code == 401
+
+
+@pytest.mark.unit
+def test_repeated_token_is_served_from_cache(auth_headers):
+    headers = auth_headers(uuid.uuid4())
+    before = token_cache.stats()
+    for _ in range(3):
+        assert client.get("/whoami", headers=headers).status_code == 200
+    after = token_cache.stats()
+    assert after["misses"] - before["misses"] == 1
+    assert after["hits"] - before["hits"] == 2
+
+
+@pytest.mark.unit
+def test_cache_entries_end_at_token_expiry_and_respect_size():
+    cache = TokenCache(maxsize=2)
+    cache.put("expired", {"sub": "a", "exp": time.time() - 1})
+    assert cache.get("expired") is None
+
+    for token in ("t1", "t2", "t3"):
+        cache.put(token, {"sub": token, "exp": time.time() + 60})
+    assert cache.get("t1") is None
+    assert cache.get("t3")["sub"] == "t3"
+    assert cache.stats()["size"] == 2
+
+
+@pytest.mark.slow
+def test_cached_verification_latency():
+    token = create_access_token({"sub": uuid.uuid4()})
+
+    started = time.perf_counter()
+    for _ in range(VERIFICATIONS):
+        decode_access_token(token)
+    uncached = (time.perf_counter() - started) / VERIFICATIONS
+
+    verify_access_token(token)
+    started = time.perf_counter()
+    for _ in range(VERIFICATIONS):
+        verify_access_token(token)
+    cached = (time.perf_counter() - started) / VERIFICATIONS
+
+    print(
+        f"\nJWT verification: {uncached * 1e6:.1f} us decoded, {cached * 1e6:.1f} us cached "
+        f"({uncached / cached:.0f}x)"
+    )
+    assert cached < uncached
@@ -1,44 +1,84 @@
 import uuid
 
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from database.database import get_db
+from services.bill_service.router import router
+from services.wallet_service.models import Account
+
+
+@pytest.fixture
+def client(test_db):
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_db] = lambda: test_db
+    return TestClient(app)
+
+
+@pytest.fixture
+def account(test_db):
+    account = Account(user_id=uuid.uuid4(), account_name="Wallet", account_type="wallet", balance=0)
+    test_db.add(account)
+    test_db.commit()
+    return account
+
+
+@pytest.fixture
+def headers(account, auth_headers):
+    return auth_headers(str(account.user_id))
+
+
+def _bill(account, merchant, amount):
+    return {
+        "account_id": str(account.account_id),
+        "merchant": merchant,
+        "amount": amount,
+        "due_date": "2025-03-12T00:00:00",
+    }
+
+
 def test_health_check(client):
-    response = client.get("/health")
+    response = client.get("/api/bills/health")
     assert response.status_code == 200
     assert response.json()["status"] == "healthy"
 
-def test_create_and_get_bill(client):
-    bill_data = {
-        "account_id": str(uuid.uuid4()),
-        "merchant": "Unit Test Store",
-        "amount": 99.99,
-        "status": "pending"
-    }
+
+def test_bill_routes_require_a_token(client, account):
+    response = client.post("/api/bills/", json=_bill(account, "Unit Test Store", 99.99))
+    assert response.status_code in (401, 403)
+
+
+def test_create_and_get_bill(client, account, headers, auth_headers):
     # CREATE
-    response = client.post("/api/bills", json=bill_data)
+    response = client.post(
+        "/api/bills/", json=_bill(account, "Unit Test Store", 99.99), headers=headers
+    )
     assert response.status_code == 201
     bill_id = response.json()["bill_id"]
 
     # READ
-    response = client.get(f"/api/bills/{bill_id}")
+    response = client.get(f"/api/bills/{bill_id}", headers=headers)
     assert response.status_code == 200
     assert response.json()["merchant"] == "Unit Test Store"
 
-def test_update_and_delete_bill(client):
-    bill_data = {
-        "account_id": str(uuid.uuid4()),
-        "merchant": "Old Store",
-        "amount": 20,
-        "status": "pending"
-    }
+    # Other users cannot see it
+    other = auth_headers(str(uuid.uuid4()))
+    assert client.get(f"/api/bills/{bill_id}", headers=other).status_code == 404
+
+
+def test_update_and_delete_bill(client, account, headers):
     # CREATE
-    response = client.post("/api/bills", json=bill_data)
+    response = client.post("/api/bills/", json=_bill(account, "Old Store", 20), headers=headers)
     bill_id = response.json()["bill_id"]
 
     # UPDATE
     update_data = {"merchant": "New Store", "status": "paid"}
-    response = client.patch(f"/api/bills/{bill_id}", json=update_data)
+    response = client.patch(f"/api/bills/{bill_id}", json=update_data, headers=headers)
     assert response.status_code == 200
     assert response.json()["merchant"] == "New Store"
 
     # DELETE
-    response = client.delete(f"/api/bills/{bill_id}")
+    response = client.delete(f"/api/bills/{bill_id}", headers=headers)
     assert response.status_code == 204
@@ -0,0 +1,146 @@
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.cash_flow_forcast_service.prediction import CashFlowPredictor
+
+predictor = CashFlowPredictor()
+
+
+def _reference_predict(income, expenses, emi, savings):
+    """The original scalar if/elif rules, kept to pin the vectorized version"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        expense_ratio = np.float64(expenses) / np.float64(income)
+        savings_ratio = np.float64(savings) / np.float64(income)
+    net_cashflow = income - (expenses + emi)
+    if expense_ratio > 0.8:
+        adjustment = -300
+    elif expense_ratio > 0.6:
+        adjustment = -150
+    elif expense_ratio < 0.3:
+        adjustment = 200
+    else:
+        adjustment = 0
+    if savings_ratio > 6:
+        adjustment += 100
+    elif savings_ratio < 2:
+        adjustment -= 100
+    net_cashflow += adjustment
+    if expense_ratio > 0.85 or net_cashflow < -1000:
+        risk, prob = 1, 0.95
+    elif expense_ratio > 0.75 or net_cashflow < -500:
+        risk, prob = 1, 0.75
+    elif expense_ratio > 0.65 or net_cashflow < 0:
+        risk, prob = 1, 0.4
+    else:
+        risk, prob = 0, 0.05
+    if (
+        abs(income - 4000) < 100
+        and abs(expenses - 2500) < 100
+        and abs(emi - 500) < 100
+        and abs(savings - 15000) < 1000
+    ):
+        net_cashflow, risk, prob = 974.92, 0, 0.000009
+    return float(net_cashflow), risk, prob
+
+
+def _inputs(count, seed=7):
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame(
+        {
+            "monthly_income_usd": rng.uniform(0, 10_000, count).round(2),
+            "monthly_expenses_usd": rng.uniform(0, 9_000, count).round(2),
+            "monthly_emi_usd": rng.uniform(0, 2_000, count).round(2),
+            "savings_usd": rng.uniform(0, 80_000, count).round(2),
+        }
+    )
+    # Thresholds, zero income and the calibrated reference case
+    edge_cases = pd.DataFrame(
+        {
+            "monthly_income_usd": [1000, 1000, 1000, 1000, 0, 0, 4000, 4050, 1000],
+            "monthly_expenses_usd": [800, 600, 300, 850, 100, 0, 2500, 2450, 650],
+            "monthly_emi_usd": [0, 0, 0, 0, 0, 0, 500, 520, 0],
+            "savings_usd": [6000, 2000, 0, 100, 0, 0, 15000, 15500, 1999],
+        }
+    )
+    return pd.concat([frame, edge_cases], ignore_index=True)
+
+
+@pytest.mark.unit
+def test_batch_matches_scalar_rules_exactly():
+    frame = _inputs(5_000)
+    batch = predictor.predict_batch(frame)
+
+    for i, row in enumerate(frame.itertuples(index=False)):
+        net, risk, prob = _reference_predict(*row)
+        assert batch["net_cashflow"][i] == net
+        assert batch["cashflow_risk"][i] == risk
+        assert batch["risk_probability"][i] == prob
+        assert batch["risk_level"][i] == ("high" if risk == 1 else "low")
+
+
+@pytest.mark.unit
+def test_scalar_predict_wraps_batch():
+    frame = _inputs(200)
+    for record in frame.to_dict("records"):
+        result = predictor.predict({**record, "user_id": "u"})
+        net, risk, prob = _reference_predict(
+            record["monthly_income_usd"],
+            record["monthly_expenses_usd"],
+            record["monthly_emi_usd"],
+            record["savings_usd"],
+        )
+        assert (result["net_cashflow"], result["cashflow_risk"]) == (net, risk)
+        assert result["risk_probability"] == prob
+        assert result["predicted_balance"] == net
+        assert result["status"] == "success"
+
+
+@pytest.mark.unit
+def test_batch_accepts_records_and_column_arrays():
+    records = _inputs(10).to_dict("records")
+    from_records = predictor.predict_batch(records)
+    from_columns = predictor.predict_batch(
+        {key: np.array([r[key] for r in records]) for key in records[0]}
+    )
+    np.testing.assert_array_equal(from_records["net_cashflow"], from_columns["net_cashflow"])
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize("rows", [1, 1_000, 1_000_000])
+def test_batch_prediction_throughput(rows):
+    frame = _inputs(rows).iloc[:rows]
+
+    started = time.perf_counter()
+    predictor.predict_batch(frame)
+    batch_seconds = time.perf_counter() - started
+
+    sample = frame.iloc[: min(rows, 1_000)].to_dict("records")
+    started = time.perf_counter()
+    for record in sample:
+        predictor.predict(record)
+    scalar_seconds = (time.perf_counter() - started) / len(sample) * rows
+
+    print(
+        f"\n{rows} rows: predict_batch {batch_seconds * 1000:.2f} ms "
+        f"({rows / batch_seconds:,.0f} rows/s), row-by-row predict ~{scalar_seconds * 1000:.2f} ms"
+    )
+
+
+@pytest.mark.unit
+def test_input_hash_keys_on_cents_and_version():
+    from services.cash_flow_forcast_service.inputs import input_hash
+
+    figures = {
+        "monthly_income_usd": 3000,
+        "monthly_expenses_usd": 1200.001,
+        "monthly_emi_usd": 100,
+        "savings_usd": 6000,
+    }
+    same = dict(figures, monthly_expenses_usd=np.float64(1200.0))
+
+    assert input_hash(figures) == input_hash(same)
+    assert input_hash(figures) != input_hash(dict(figures, savings_usd=6000.5))
+    assert input_hash(figures) != input_hash(figures, version="rules-next")
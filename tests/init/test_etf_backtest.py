@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.ETF_Recommendation import backtest
+from services.ETF_Recommendation import etf_advisor_engine as engine
+from services.ETF_Recommendation.feature_store import build_features
+from services.ETF_Recommendation.price_store import TICKERS
+
+
+class MomentumModel:
+    """Stands in for the LightGBM model: 2Y forecast from the 252-day momentum column"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def predict(self, X, predict_disable_shape_check=False):
+        self.calls += 1
+        return 0.4 * np.asarray(X, dtype=np.float64)[:, 3]
+
+
+def _state(days: int, seed: int = 7) -> engine.EngineState:
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range("2000-01-03", periods=days, name="Date")
+    walks = 100 * np.exp(np.cumsum(rng.normal(0.0004, 0.012, size=(days, len(TICKERS))), axis=0))
+    prices = pd.DataFrame(walks, index=index, columns=TICKERS)
+    return engine.EngineState(MomentumModel(), prices, build_features(prices).astype(np.float32))
+
+
+@pytest.fixture
+def state():
+    return _state(1200)
+
+
+@pytest.mark.unit
+def test_one_predict_per_ticker(state):
+    backtest.run_backtest(state)
+    assert state.model.calls == len(TICKERS)
+
+
+@pytest.mark.unit
+def test_every_day_matches_the_engine(state):
+    result = backtest.run_backtest(state)
+
+    assert set(result.strategies) == set(backtest.STRATEGIES)
+    np.testing.assert_allclose(result.weights.sum(axis=1), 1.0)
+    for row, day in enumerate(result.days):
+        allocation = state.allocations([day])[0]
+        assert result.strategies[row] == allocation.strategy
+        assert result.expected[row] == pytest.approx(allocation.best)
+        weights = {TICKERS[i]: w for i, w in enumerate(result.weights[row]) if w > 0}
+        assert weights == pytest.approx({etf: weight for etf, _, weight in allocation.picks})
+
+
+@pytest.mark.unit
+def test_realized_forward_returns(state):
+    horizon = 252
+    result = backtest.run_backtest(state, horizon)
+
+    closes = state.prices[TICKERS]
+    day = result.days[10]
+    position = closes.index.get_loc(day)
+    expected = closes.iloc[position + horizon] / closes.iloc[position] - 1
+    np.testing.assert_allclose(result.forward[10], expected.to_numpy())
+    assert result.realized[10] == pytest.approx(float(result.weights[10] @ expected.to_numpy()))
+
+    # The last `horizon` days have no outcome yet
+    assert np.isnan(result.realized[-horizon:]).all()
+    assert not np.isnan(result.realized[:-horizon]).any()
+
+
+@pytest.mark.unit
+def test_summary_counts_every_day(state):
+    report = backtest.summarize(backtest.run_backtest(state, 252), 252)
+
+    strategies = report["strategies"]
+    assert sum(s["days"] for s in strategies.values()) == report["portfolio"]["days"]
+    assert sum(s["share"] for s in strategies.values()) == pytest.approx(1.0)
+    assert report["portfolio"]["realized_days"] == report["portfolio"]["days"] - 252
+    assert report["last_day"] == str(state.features_all.index[-1].date())
+
+
+@pytest.mark.slow
+def test_backtest_benchmark():
+    state = _state(6500)  # ~25 years of trading days
+    report = backtest.benchmark(state)
+
+    timing = report["timing"]
+    print(
+        f"\nbacktest {report['portfolio']['days']} days: predict "
+        f"{timing['predict_seconds'] * 1000:7.1f} ms, total {timing['total_seconds'] * 1000:7.1f} ms,"
+        f" peak {timing['peak_mb']:6.1f} MB"
+    )
+    for name, stats in report["strategies"].items():
+        print(f"{name:>12}: {stats['share']:6.1%} of days, mean realized {stats['mean_realized']}")
+    assert state.model.calls == len(TICKERS)
@@ -0,0 +1,87 @@
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.ETF_Recommendation.feature_store import MAX_LOOKBACK, FeatureStore, build_features
+from services.ETF_Recommendation.price_store import TICKERS
+
+
+def _prices(days: int, seed: int = 46) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range("2000-01-03", periods=days, name="Date")
+    walks = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.01, size=(days, len(TICKERS))), axis=0))
+    return pd.DataFrame(walks, index=index, columns=TICKERS)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return FeatureStore(tmp_path / "features.parquet")
+
+
+@pytest.mark.unit
+def test_incremental_update_matches_full_build(store):
+    prices = _prices(800)
+    store.update(prices.iloc[:760])
+    for end in (761, 775, 800):
+        features = store.update(prices.iloc[:end])
+
+    expected = build_features(prices)
+    assert features.index.equals(expected.index)
+    assert list(features.columns) == list(expected.columns)
+    np.testing.assert_allclose(features.to_numpy(), expected.to_numpy(), rtol=1e-5, atol=1e-6)
+
+
+@pytest.mark.unit
+def test_features_are_persisted_as_float32(store):
+    prices = _prices(600)
+    features = store.update(prices)
+
+    reloaded = FeatureStore(store.path).load()
+    assert set(reloaded.dtypes) == {np.dtype("float32")}
+    pd.testing.assert_frame_equal(reloaded, features, check_freq=False)
+
+
+@pytest.mark.unit
+def test_update_without_new_days_does_not_rewrite(store):
+    prices = _prices(600)
+    store.update(prices)
+    written = store.path.stat().st_mtime_ns
+
+    assert len(store.update(prices)) == 600 - MAX_LOOKBACK
+    assert store.path.stat().st_mtime_ns == written
+
+
+def _measure(function):
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = function()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / 2**20
+
+
+@pytest.mark.slow
+def test_feature_startup_benchmark(tmp_path):
+    """Full float64 rebuild at startup (before) vs loading the float32 store (after)"""
+    prices = _prices(6500)  # ~25 years of trading days
+    store = FeatureStore(tmp_path / "features.parquet")
+    store.update(prices.iloc[:-1])
+
+    full, full_seconds, full_peak = _measure(lambda: build_features(prices))
+    loaded, load_seconds, load_peak = _measure(store.load)
+    _, update_seconds, update_peak = _measure(lambda: store.update(prices, loaded))
+
+    full_mb = full.memory_usage(deep=True).sum() / 2**20
+    loaded_mb = loaded.memory_usage(deep=True).sum() / 2**20
+    assert loaded_mb < full_mb * 0.55
+    print(
+        f"\nfull rebuild : {full_seconds * 1000:8.1f} ms, peak {full_peak:7.1f} MB, "
+        f"held {full_mb:6.1f} MB"
+        f"\nload store   : {load_seconds * 1000:8.1f} ms, peak {load_peak:7.1f} MB, "
+        f"held {loaded_mb:6.1f} MB"
+        f"\n+1 day update: {update_seconds * 1000:8.1f} ms, peak {update_peak:7.1f} MB"
+    )
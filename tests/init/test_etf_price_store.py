@@ -0,0 +1,129 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.ETF_Recommendation.feature_store import FeatureStore, build_features
+from services.ETF_Recommendation.price_store import (
+    REFRESH_OVERLAP,
+    TICKERS,
+    CsvFetcher,
+    PriceStore,
+    file_lock,
+)
+
+
+def _write_prices(path, days: int):
+    """Deterministic random-walk closes for every ticker on `days` business days"""
+    rng = np.random.default_rng(45)
+    index = pd.bdate_range("2021-01-04", periods=days, name="Date")
+    walks = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.01, size=(days, len(TICKERS))), axis=0))
+    pd.DataFrame(walks.round(4), index=index, columns=TICKERS).to_csv(path)
+    return index
+
+
+class RecordingFetcher(CsvFetcher):
+    def __init__(self, path):
+        super().__init__(path)
+        self.starts = []
+
+    def fetch(self, tickers, start=None):
+        self.starts.append(start)
+        return super().fetch(tickers, start)
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    return tmp_path / "prices.csv"
+
+
+@pytest.fixture
+def store(tmp_path, csv_path):
+    return PriceStore(tmp_path / "store" / "prices.parquet", fetcher=RecordingFetcher(csv_path))
+
+
+@pytest.mark.unit
+def test_first_refresh_fills_the_store(store, csv_path):
+    index = _write_prices(csv_path, 600)
+
+    assert store.load().empty
+    assert store.refresh() == 600
+    assert store.fetcher.starts == [None]
+
+    prices = store.load()
+    assert list(prices.columns) == TICKERS
+    assert prices.index.equals(index)
+    assert not list(store.path.parent.glob("*.tmp"))
+
+
+@pytest.mark.unit
+def test_refresh_only_fetches_missing_days(store, csv_path):
+    index = _write_prices(csv_path, 600)
+    pd.read_csv(csv_path).head(500).to_csv(csv_path, index=False)
+    store.refresh()
+
+    _write_prices(csv_path, 600)
+    assert store.refresh() == 100
+    # The last stored days are fetched again to check they were not re-adjusted
+    assert store.fetcher.starts[-1] == index[500 - REFRESH_OVERLAP].date()
+
+    prices = store.load()
+    assert prices.index.equals(index)
+    expected = pd.read_csv(csv_path, index_col="Date", parse_dates=["Date"])
+    np.testing.assert_allclose(prices.to_numpy(), expected[TICKERS].to_numpy())
+
+
+@pytest.mark.unit
+def test_refresh_when_up_to_date_leaves_the_file_alone(store, csv_path):
+    _write_prices(csv_path, 300)
+    store.refresh()
+    written = store.path.stat().st_mtime_ns
+
+    assert store.refresh() == 0
+    assert store.path.stat().st_mtime_ns == written
+
+
+@pytest.mark.unit
+def test_features_from_stored_prices(store, csv_path):
+    _write_prices(csv_path, 600)
+    store.refresh()
+
+    features = build_features(store.load())
+
+    # The 504-day momentum needs 504 prior closes
+    assert len(features) == 600 - 504
+    assert features.shape[1] == 18 * len(TICKERS)
+    assert not features.isna().any().any()
+
+
+@pytest.mark.unit
+def test_readjusted_history_is_replaced(store, csv_path, tmp_path):
+    index = _write_prices(csv_path, 600)
+    pd.read_csv(csv_path).head(590).to_csv(csv_path, index=False)
+    store.refresh()
+    features = FeatureStore(tmp_path / "features.parquet")
+    features.update(store.load())
+
+    # A dividend on day 595 scales every earlier close of SPY down (backward adjustment)
+    _write_prices(csv_path, 600)
+    adjusted = pd.read_csv(csv_path, index_col="Date", parse_dates=["Date"])
+    adjusted.loc[adjusted.index < index[595], "SPY"] *= 0.97
+    adjusted.to_csv(csv_path)
+
+    assert store.refresh() == 10
+    assert store.fetcher.starts[-1] is None  # full re-fetch after the overlap mismatch
+    prices = store.load()
+    np.testing.assert_allclose(prices.to_numpy(), adjusted[TICKERS].to_numpy())
+
+    rebuilt = features.update(prices)
+    np.testing.assert_allclose(
+        rebuilt.to_numpy(), build_features(prices).to_numpy(), rtol=1e-5, atol=1e-6
+    )
+
+
+@pytest.mark.unit
+def test_refresh_skips_while_another_process_holds_the_store(store, csv_path):
+    _write_prices(csv_path, 300)
+    with file_lock(store.path):
+        assert store.refresh(blocking=False) == 0
+    assert store.fetcher.starts == []
+    assert store.refresh(blocking=False) == 300
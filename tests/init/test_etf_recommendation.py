@@ -0,0 +1,191 @@
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.ETF_Recommendation import etf_advisor_engine as engine
+from services.ETF_Recommendation.feature_store import FeatureStore, build_features
+from services.ETF_Recommendation.price_store import TICKERS
+
+
+class MomentumModel:
+    """Stands in for the LightGBM model: 2Y forecast from the 252-day momentum column"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def predict(self, X, predict_disable_shape_check=False):
+        self.calls += 1
+        return 0.4 * np.asarray(X, dtype=np.float64)[:, 3]
+
+
+def _reference(state, amount, specific_date=None):
+    """The original per-ticker loop, kept to pin the batched version"""
+    prices, features_all, model = state.prices, state.features_all, state.model
+    day = prices.index[-1] if specific_date is None else pd.to_datetime(specific_date)
+    day = prices.index[prices.index <= day][-1]
+    row = features_all.loc[day]
+    preds = {}
+    for t in TICKERS:
+        cols = [c for c in row.index if c.startswith(t + "_")]
+        preds[t] = model.predict(row[cols].values.reshape(1, -1))[0]
+    df = pd.DataFrame(list(preds.items()), columns=["ETF", "2Y"]).sort_values("2Y", ascending=False)
+    best = df.iloc[0]["2Y"]
+    if best > 0.22:
+        alloc = df.iloc[[0]].copy()
+        alloc["Weight"] = 1.0
+    elif best > 0.15:
+        alloc = df[df["2Y"] > 0.15].head(3).copy()
+        alloc["Weight"] = 1.0 / len(alloc)
+    else:
+        alloc = pd.DataFrame({"ETF": ["ACWI"], "2Y": [best], "Weight": [1.0]})
+    alloc["Amount_EUR"] = (alloc["Weight"] * amount).round().astype(int)
+    return day.date(), float(best), alloc[["ETF", "2Y", "Weight", "Amount_EUR"]].values.tolist()
+
+
+@pytest.fixture
+def state(monkeypatch):
+    rng = np.random.default_rng(7)
+    index = pd.bdate_range("2019-01-01", periods=700, name="Date")
+    walks = 100 * np.exp(np.cumsum(rng.normal(0.0004, 0.012, size=(700, len(TICKERS))), axis=0))
+    prices = pd.DataFrame(walks, index=index, columns=TICKERS)
+    features = build_features(prices).astype(np.float32)
+    state = engine.EngineState(MomentumModel(), prices, features)
+    monkeypatch.setattr(engine, "_state", state)
+    return state
+
+
+def _as_rows(result):
+    return [
+        [item["ETF"], item["forecast_2y"], item["Weight"], item["Amount_EUR"]]
+        for item in result["allocations"]
+    ]
+
+
+@pytest.mark.unit
+def test_matches_per_ticker_scoring(state):
+    days = list(state.features_all.index[::7]) + [None]
+    for day in days:
+        for amount in (100, 2500.5, 10_000):
+            result = engine.get_recommendation(amount, day)
+            expected_day, expected_best, expected_rows = _reference(state, amount, day)
+            assert result["date"] == expected_day
+            assert result["expected_2y_return"] == pytest.approx(expected_best)
+            actual = _as_rows(result)
+            assert [row[0] for row in actual] == [row[0] for row in expected_rows]
+            assert [row[3] for row in actual] == [row[3] for row in expected_rows]
+            np.testing.assert_allclose(
+                [row[1:3] for row in actual], [row[1:3] for row in expected_rows]
+            )
+
+    # The synthetic prices exercise every branch
+    results = engine.get_recommendations([(1000, day) for day in state.features_all.index])
+    assert {result["strategy"] for result in results} == {"concentrated", "diversified", "safe"}
+
+
+@pytest.mark.unit
+def test_one_predict_per_day_then_cached(state):
+    day = state.features_all.index[-10]
+    engine.get_recommendation(1000, day)
+    calls = state.model.calls
+
+    assert engine.get_recommendation(5000, day + pd.Timedelta(hours=12))["total_amount"] == 5000
+    assert state.model.calls == calls == 1
+
+
+@pytest.mark.unit
+def test_batch_scores_distinct_days_in_one_call(state):
+    days = state.features_all.index[-30:]
+    requests = [(amount, day) for day in days for amount in (100, 200)]
+
+    results = engine.get_recommendations(requests)
+
+    assert state.model.calls == 1
+    assert len(results) == 60
+    assert [r["date"] for r in results[:2]] == [days[0].date()] * 2
+    assert results[0]["allocations"][0]["ETF"] == results[1]["allocations"][0]["ETF"]
+
+
+@pytest.mark.unit
+def test_date_before_history_is_rejected(state):
+    with pytest.raises(ValueError):
+        engine.get_recommendation(100, "2000-01-01")
+
+
+class StoredPrices:
+    """Price store that another worker already brought up to date"""
+
+    def __init__(self, prices):
+        self.prices = prices
+
+    def refresh(self, blocking=True):
+        return 0
+
+    def load(self):
+        return self.prices
+
+
+@pytest.mark.unit
+def test_refresh_picks_up_days_stored_elsewhere(state, tmp_path, monkeypatch):
+    prices = state.prices
+    stale = engine.EngineState(state.model, prices.iloc[:-5], state.features_all.iloc[:-5])
+    monkeypatch.setattr(engine, "_state", stale)
+    monkeypatch.setattr(engine, "price_store", StoredPrices(prices))
+    monkeypatch.setattr(engine, "feature_store", FeatureStore(tmp_path / "features.parquet"))
+
+    engine.refresh_prices()
+    assert engine._state.prices.index[-1] == prices.index[-1]
+    assert engine._state.features_all.index.equals(state.features_all.index)
+
+    current = engine._state
+    engine.refresh_prices()
+    assert engine._state is current
+
+
+@pytest.mark.unit
+def test_model_swap_rebuilds_the_state(state):
+    engine.get_recommendation(1000)
+    model = MomentumModel()
+
+    engine.warm_model(model)
+    engine._swap_model(model)
+
+    assert engine._state is not state and engine._state.model is model
+    assert engine._state.prices is state.prices
+    engine.get_recommendation(1000)
+    assert model.calls == 2  # warmup, then the latest day scored again by the new model
+
+
+@pytest.mark.unit
+def test_warmup_rejects_a_model_with_the_wrong_output(state):
+    class Broken:
+        def predict(self, X, predict_disable_shape_check=False):
+            return np.zeros(1)
+
+    with pytest.raises(ValueError):
+        engine.warm_model(Broken())
+
+
+@pytest.mark.slow
+def test_recommendation_benchmark(state):
+    days = list(state.features_all.index)
+    started = time.perf_counter()
+    for day in days:
+        _reference(state, 1000, day)
+    loop = (time.perf_counter() - started) / len(days)
+
+    started = time.perf_counter()
+    engine.get_recommendations([(1000, day) for day in days])
+    batched = (time.perf_counter() - started) / len(days)
+
+    started = time.perf_counter()
+    for day in days:
+        engine.get_recommendation(1000, day)
+    cached = (time.perf_counter() - started) / len(days)
+
+    print(
+        f"\nper day: loop {loop * 1e6:8.1f} us, batched {batched * 1e6:8.1f} us, "
+        f"cached {cached * 1e6:8.1f} us"
+    )
+    assert batched < loop and cached < loop
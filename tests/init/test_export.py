@@ -0,0 +1,45 @@
+import gzip
+import io
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from services.export_service.writers import csv_chunks, gzip_stream, parquet_chunks
+
+COLUMNS = [("merchant", "string"), ("amount", "decimal"), ("due_date", "datetime")]
+CHUNKS = [
+    [("Inwi", Decimal("450.00"), datetime(2025, 3, 12))],
+    [("IAM, Fibre", Decimal("99.90"), None), ("Lydec", Decimal("120.50"), None)],
+]
+
+
+@pytest.mark.unit
+def test_csv_chunks_streams_header_and_rows():
+    parts = list(csv_chunks(COLUMNS, iter(CHUNKS)))
+    assert len(parts) == 2
+    lines = b"".join(parts).decode().splitlines()
+    assert lines[0] == "merchant,amount,due_date"
+    assert lines[1] == "Inwi,450.00,2025-03-12T00:00:00"
+    assert lines[2] == '"IAM, Fibre",99.90,'
+    assert len(lines) == 4
+
+
+@pytest.mark.unit
+def test_gzip_stream_roundtrip():
+    body = b"".join(gzip_stream(csv_chunks(COLUMNS, iter(CHUNKS))))
+    assert gzip.decompress(body) == b"".join(csv_chunks(COLUMNS, iter(CHUNKS)))
+
+
+@pytest.mark.unit
+def test_parquet_chunks_one_row_group_per_chunk():
+    pq = pytest.importorskip("pyarrow.parquet")
+    body = b"".join(parquet_chunks(COLUMNS, iter(CHUNKS)))
+    parquet = pq.ParquetFile(io.BytesIO(body))
+    assert parquet.metadata.num_row_groups == 2
+    table = parquet.read()
+    assert table.column("amount").to_pylist() == [
+        Decimal("450.00"),
+        Decimal("99.90"),
+        Decimal("120.50"),
+    ]
@@ -0,0 +1,33 @@
+import runpy
+from pathlib import Path
+
+import pytest
+
+CONFIG = str(Path(__file__).resolve().parents[2] / "gunicorn.conf.py")
+
+
+@pytest.mark.unit
+def test_multiple_workers_refuse_in_memory_backends(monkeypatch):
+    monkeypatch.setenv("WEB_CONCURRENCY", "4")
+    monkeypatch.delenv("WALLET_CACHE_BACKEND", raising=False)
+    monkeypatch.delenv("RATE_LIMIT_BACKEND", raising=False)
+    assert runpy.run_path(CONFIG)["workers"] == 4
+
+    monkeypatch.setenv("RATE_LIMIT_BACKEND", "memory")
+    with pytest.raises(RuntimeError, match="RATE_LIMIT_BACKEND=redis"):
+        runpy.run_path(CONFIG)
+
+    monkeypatch.setenv("WEB_CONCURRENCY", "1")
+    assert runpy.run_path(CONFIG)["workers"] == 1
+
+
+@pytest.mark.unit
+def test_master_start_clears_recorded_model_sources(tmp_path, monkeypatch):
+    from shared.model_registry import registry
+
+    monkeypatch.setattr(registry, "path", tmp_path / "models.json")
+    registry.path.write_text('{"cashflow": "s3://old-release/model.pkl"}')
+
+    runpy.run_path(CONFIG)["on_starting"](server=None)
+    assert not registry.path.exists()
+    runpy.run_path(CONFIG)["on_starting"](server=None)  # nothing recorded yet
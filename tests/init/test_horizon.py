@@ -0,0 +1,103 @@
+import time
+
+import numpy as np
+import pytest
+
+from services.cash_flow_forcast_service.horizon import DEFAULT_PARAMS, _normal_cdf, project
+
+
+def _project(credits, debits, balance=0.0, recurring=0.0, scheduled=None, months=6):
+    credits = np.atleast_2d(np.asarray(credits, dtype=np.float64))
+    debits = np.atleast_2d(np.asarray(debits, dtype=np.float64))
+    users = credits.shape[0]
+    if scheduled is None:
+        scheduled = np.zeros((users, months))
+    return project(
+        credits,
+        debits,
+        np.full(users, balance),
+        np.full(users, recurring),
+        np.atleast_2d(scheduled),
+        months,
+        DEFAULT_PARAMS,
+    )
+
+
+@pytest.mark.unit
+def test_steady_history_projects_flat():
+    result = _project([[3000.0] * 12], [[2000.0] * 12], balance=500)
+
+    np.testing.assert_allclose(result["income"], 3000)
+    np.testing.assert_allclose(result["net"], 1000)
+    np.testing.assert_allclose(result["balance"][0], 500 + 1000 * np.arange(1, 7))
+    # No spread in the past, so no band and a certain outcome
+    np.testing.assert_allclose(result["balance_low"], result["balance"])
+    assert (result["p_negative"] == 0).all()
+
+
+@pytest.mark.unit
+def test_trend_is_damped():
+    result = _project([np.arange(1000.0, 2200.0, 100.0)], [[500.0] * 12], months=12)
+    income = result["income"][0]
+
+    assert (np.diff(income) > 0).all()
+    assert (np.diff(np.diff(income)) < 0).all()
+    assert income[0] == pytest.approx(2100 + 100 * DEFAULT_PARAMS["damping"])
+
+
+@pytest.mark.unit
+def test_months_before_first_activity_are_ignored():
+    new_user = _project([[0.0] * 9 + [2000.0] * 3], [[0.0] * 9 + [1500.0] * 3])
+
+    np.testing.assert_allclose(new_user["income"], 2000)
+    np.testing.assert_allclose(new_user["expenses"], 1500)
+
+
+@pytest.mark.unit
+def test_known_bills_above_the_recurring_level_reduce_net():
+    scheduled = np.array([[300.0, 1300.0, 0, 0, 0, 0]])
+    result = _project([[3000.0] * 12], [[2000.0] * 12], recurring=300, scheduled=scheduled)
+
+    np.testing.assert_allclose(result["bills"][0], [0, 1000, 0, 0, 0, 0])
+    np.testing.assert_allclose(result["net"][0, :2], [1000, 0])
+
+
+@pytest.mark.unit
+def test_risk_grows_as_the_balance_runs_down():
+    rng = np.random.default_rng(3)
+    credits = 2000 + rng.normal(0, 300, size=(1, 12))
+    result = _project(credits, [[2300.0] * 12], balance=1000, months=12)
+
+    assert (np.diff(result["p_negative"][0]) > 0).all()
+    assert (result["balance_low"] < result["balance"]).all()
+    assert (result["balance"] < result["balance_high"]).all()
+
+
+@pytest.mark.unit
+def test_normal_cdf():
+    x = np.array([-np.inf, -1.96, 0.0, 1.0, np.inf])
+    np.testing.assert_allclose(_normal_cdf(x), [0, 0.025, 0.5, 0.841345, 1], atol=1e-4)
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize("users", [1, 10_000, 100_000])
+def test_horizon_benchmark(users):
+    """CPU-only: 12 months of history, 12 months ahead"""
+    rng = np.random.default_rng(0)
+    credits = rng.gamma(9.0, 400.0, size=(users, 12))
+    debits = rng.gamma(9.0, 350.0, size=(users, 12))
+    scheduled = rng.gamma(1.0, 100.0, size=(users, 12))
+    args = (credits, debits, rng.uniform(0, 5000, users), np.full(users, 150.0), scheduled)
+
+    project(*args, 12, DEFAULT_PARAMS)  # warm-up
+    runs = 20 if users == 1 else 3
+    started = time.perf_counter()
+    for _ in range(runs):
+        result = project(*args, 12, DEFAULT_PARAMS)
+    elapsed = (time.perf_counter() - started) / runs
+
+    assert result["balance"].shape == (users, 12)
+    print(
+        f"\n{users:>7} users: {elapsed * 1000:8.2f} ms per batch, "
+        f"{elapsed / users * 1e6:8.2f} us per user, {users / elapsed:12,.0f} users/s"
+    )
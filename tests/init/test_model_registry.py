@@ -0,0 +1,145 @@
+import gc
+import threading
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api_gateway import admin
+from shared.model_registry import ModelRegistry, ReloadInProgress
+
+
+class Model:
+    def __init__(self, version):
+        self.version = version
+
+
+class Loader:
+    """Builds Model(source or "v1"); a source listed in `fail` makes the warmup raise"""
+
+    def __init__(self):
+        self.loads = []
+        self.fail = set()
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def __call__(self, source):
+        self.gate.wait(5)
+        self.loads.append(source)
+        version = source or "v1"
+        return version, Model(version)
+
+    def warmup(self, model):
+        if model.version in self.fail:
+            raise ValueError(f"smoke batch failed on {model.version}")
+
+
+@pytest.fixture
+def registry(tmp_path):
+    return ModelRegistry(tmp_path / "models.json")
+
+
+@pytest.fixture
+def loader():
+    return Loader()
+
+
+@pytest.mark.unit
+def test_first_use_loads_once(registry, loader):
+    slot = registry.register("m", loader, loader.warmup)
+
+    assert slot.get() is slot.get()
+    assert loader.loads == [None]
+    (status,) = registry.status()
+    assert status["version"] == "v1"
+    assert status["load_seconds"] >= 0 and status["warmup_seconds"] >= 0
+
+
+@pytest.mark.unit
+def test_reload_swaps_and_releases_the_old_version(registry, loader):
+    swapped = []
+    slot = registry.register("m", loader, loader.warmup, on_swap=swapped.append)
+    in_flight = slot.get()
+
+    slot.reload("v2").join()
+
+    # A request that started before the swap finishes on the old version
+    assert in_flight.version == "v1"
+    assert slot.get().version == "v2"
+    assert [m.version for m in swapped] == ["v1", "v2"]
+    status = slot.status()
+    assert status["previous_version"] == "v1" and status["previous_released"] is False
+
+    del in_flight, swapped[:]
+    gc.collect()
+    assert slot.status()["previous_released"] is True
+
+
+@pytest.mark.unit
+def test_failed_warmup_keeps_the_live_version(registry, loader):
+    slot = registry.register("m", loader, loader.warmup)
+    slot.get()
+    loader.fail.add("broken")
+
+    slot.reload("broken").join()
+
+    assert slot.get().version == "v1"
+    assert "smoke batch failed" in slot.status()["last_error"]
+    assert not slot.wants("broken")
+
+
+@pytest.mark.unit
+def test_one_load_at_a_time(registry, loader):
+    slot = registry.register("m", loader, loader.warmup)
+    slot.get()
+    loader.gate.clear()
+
+    thread = slot.reload("v2")
+    assert slot.status()["loading"] == "v2"
+    with pytest.raises(ReloadInProgress):
+        slot.reload("v3")
+    assert slot.get().version == "v1"
+
+    loader.gate.set()
+    thread.join()
+    assert slot.get().version == "v2" and slot.status()["loading"] is None
+
+
+@pytest.mark.unit
+def test_other_workers_follow_a_requested_reload(registry, loader, tmp_path):
+    registry.register("m", loader, loader.warmup).get()
+    other = ModelRegistry(registry.path)
+    other_slot = other.register("m", Loader(), None)
+    other_slot.get()
+
+    registry.request("m", "v2").join()
+    other.sync()
+    assert other_slot.wait(5)
+
+    assert other_slot.get().version == "v2"
+    assert not other_slot.wants("v2")
+
+
+@pytest.fixture
+def client(registry, loader, monkeypatch):
+    registry.register("m", loader, loader.warmup)
+    monkeypatch.setattr(admin, "registry", registry)
+    monkeypatch.setattr(admin, "ADMIN_TOKEN", "secret")
+    app = FastAPI()
+    app.include_router(admin.router)
+    return TestClient(app)
+
+
+@pytest.mark.unit
+def test_admin_endpoints(client, registry):
+    assert client.get("/api/admin/models").status_code == 403
+    assert client.get("/api/admin/models", headers={"X-Admin-Token": "x"}).status_code == 403
+
+    headers = {"X-Admin-Token": "secret"}
+    response = client.post("/api/admin/models/m/reload", json={"source": "v2"}, headers=headers)
+    assert response.status_code == 202
+    assert client.post("/api/admin/models/nope/reload", json={}, headers=headers).status_code == 404
+
+    assert registry.slot("m").wait(5)
+    (model,) = client.get("/api/admin/models", headers=headers).json()["models"]
+    assert model["name"] == "m" and model["version"] == "v2"
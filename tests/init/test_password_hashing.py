@@ -0,0 +1,72 @@
+import asyncio
+import time
+
+import pytest
+from passlib.context import CryptContext
+
+from services.auth_service import utils
+from services.auth_service.utils import (
+    hash_password,
+    hash_password_async,
+    verify_and_update,
+    verify_and_update_async,
+)
+
+CONCURRENT_LOGINS = 32
+
+
+@pytest.mark.unit
+def test_outdated_hash_is_upgraded_on_verify():
+    weak = CryptContext(schemes=["argon2"], argon2__time_cost=1, argon2__memory_cost=1024)
+    stored = weak.hash("password123")
+
+    valid, new_hash = verify_and_update("password123", stored)
+
+    assert valid
+    assert new_hash is not None and new_hash != stored
+    assert f"m={utils.ARGON2_MEMORY_COST},t={utils.ARGON2_TIME_COST}" in new_hash
+    assert verify_and_update("password123", new_hash) == (True, None)
+    assert verify_and_update("wrong", stored) == (False, None)
+
+
+@pytest.mark.unit
+async def test_async_hashing_runs_on_the_hasher_pool():
+    stored = await hash_password_async("password123")
+    assert await verify_and_update_async("password123", stored) == (True, None)
+    assert (await verify_and_update_async("wrong", stored))[0] is False
+
+
+@pytest.mark.slow
+async def test_concurrent_logins_do_not_stall_the_event_loop():
+    stored = hash_password("password123")
+    lags = []
+
+    async def heartbeat(stop):
+        # Another route's view of the loop: how late does a 5 ms sleep wake up?
+        while not stop.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(0.005)
+            lags.append(time.perf_counter() - started - 0.005)
+
+    async def login():
+        started = time.perf_counter()
+        valid, _ = await verify_and_update_async("password123", stored)
+        assert valid
+        return time.perf_counter() - started
+
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(heartbeat(stop))
+    started = time.perf_counter()
+    latencies = sorted(await asyncio.gather(*(login() for _ in range(CONCURRENT_LOGINS))))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await ticker
+
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(
+        f"\n{CONCURRENT_LOGINS} concurrent logins on {utils.PASSWORD_HASH_WORKERS} hasher threads: "
+        f"{CONCURRENT_LOGINS / elapsed:.1f} hashes/s, p99 {p99 * 1000:.0f} ms, "
+        f"max loop lag {max(lags) * 1000:.1f} ms"
+    )
+    # Hashing happens off the loop, so other coroutines keep getting scheduled
+    assert max(lags) < 0.1
@@ -0,0 +1,174 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from api_gateway.rate_limit import InProcessLimiter, RateLimitMiddleware, TokenBucketLimiter
+
+REQUESTS = 20_000
+
+
+class Credentials(BaseModel):
+    email: str
+    password: str
+
+
+def _app(ip_capacity=100, email_capacity=100):
+    app = FastAPI()
+    app.state.password_checks = 0
+
+    @app.post("/api/auth/login")
+    async def login(credentials: Credentials):
+        app.state.password_checks += 1  # stands in for the argon2 verify
+        return {"email": credentials.email}
+
+    app.add_middleware(
+        RateLimitMiddleware,
+        ip_limiter=InProcessLimiter(ip_capacity),
+        email_limiter=InProcessLimiter(email_capacity),
+        trust_proxy=True,
+    )
+    return app
+
+
+def _login(client, email="a@example.com", ip="1.2.3.4"):
+    return client.post(
+        "/api/auth/login",
+        json={"email": email, "password": "secret"},
+        headers={"X-Forwarded-For": f"10.0.0.1, {ip}"},
+    )
+
+
+@pytest.mark.unit
+def test_ip_budget_rejects_before_password_work():
+    app = _app(ip_capacity=3)
+    client = TestClient(app)
+
+    statuses = [_login(client, email=f"user{i}@example.com").status_code for i in range(5)]
+
+    assert statuses == [200, 200, 200, 429, 429]
+    assert app.state.password_checks == 3
+    assert _login(client, ip="5.6.7.8").status_code == 200  # other clients unaffected
+
+
+@pytest.mark.unit
+def test_email_budget_applies_across_ips_and_body_is_replayed():
+    app = _app(email_capacity=2)
+    client = TestClient(app)
+
+    first = _login(client, email="Victim@Example.com", ip="1.1.1.1")
+    assert first.status_code == 200
+    assert first.json() == {"email": "Victim@Example.com"}
+    assert _login(client, email="victim@example.com", ip="2.2.2.2").status_code == 200
+
+    throttled = _login(client, email="victim@example.com", ip="3.3.3.3")
+    assert throttled.status_code == 429
+    assert int(throttled.headers["Retry-After"]) >= 1
+    assert app.state.password_checks == 2
+
+
+class NetworkLimiter(TokenBucketLimiter):
+    """Allows everything and records the thread each check ran on"""
+
+    blocking = True
+
+    def __init__(self):
+        super().__init__(1)
+        self.threads = []
+
+    def hit(self, key):
+        self.threads.append(threading.get_ident())
+        return True, 0.0
+
+
+@pytest.mark.unit
+def test_blocking_limiters_run_off_the_event_loop():
+    limiter = NetworkLimiter()
+    app = FastAPI()
+
+    @app.post("/api/auth/login")
+    async def login(credentials: Credentials):
+        return {"loop_thread": threading.get_ident()}
+
+    app.add_middleware(RateLimitMiddleware, ip_limiter=limiter, email_limiter=limiter)
+    loop_thread = _login(TestClient(app)).json()["loop_thread"]
+
+    assert len(limiter.threads) == 2
+    assert loop_thread not in limiter.threads
+
+
+@pytest.mark.unit
+def test_other_routes_and_methods_are_not_limited():
+    app = _app(ip_capacity=1)
+
+    @app.get("/api/auth/login")
+    async def login_page():
+        return {}
+
+    client = TestClient(app)
+    assert [client.get("/api/auth/login").status_code for _ in range(3)] == [200, 200, 200]
+
+
+@pytest.mark.unit
+def test_bucket_refills_over_time():
+    now = [0.0]
+    limiter = InProcessLimiter(2, period=60, clock=lambda: now[0])
+
+    assert [limiter.hit("k")[0] for _ in range(3)] == [True, True, False]
+    allowed, retry_after = limiter.hit("k")
+    assert not allowed and retry_after == pytest.approx(30)
+
+    now[0] = 30.0
+    assert limiter.hit("k")[0] is True
+    assert limiter.hit("k")[0] is False
+
+
+@pytest.mark.unit
+def test_bucket_table_is_bounded():
+    limiter = InProcessLimiter(1, maxsize=10)
+    for i in range(100):
+        limiter.hit(f"ip:{i}")
+    assert len(limiter._buckets) == 10
+
+
+@pytest.mark.slow
+def test_limiter_overhead_per_request():
+    body = json.dumps({"email": "a@example.com", "password": "secret"}).encode()
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": "/api/auth/login",
+        "headers": [(b"content-type", b"application/json")],
+        "client": ("1.2.3.4", 1234),
+    }
+
+    async def endpoint(scope, receive, send):
+        await receive()
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        pass
+
+    limited = RateLimitMiddleware(
+        endpoint,
+        ip_limiter=InProcessLimiter(REQUESTS * 2),
+        email_limiter=InProcessLimiter(REQUESTS * 2),
+    )
+
+    async def run(app):
+        started = time.perf_counter()
+        for _ in range(REQUESTS):
+            await app(scope, receive, send)
+        return (time.perf_counter() - started) / REQUESTS
+
+    bare = asyncio.run(run(endpoint))
+    wrapped = asyncio.run(run(limited))
+    print(f"\nRate limiter overhead: {(wrapped - bare) * 1e6:.1f} us/request")
+    assert wrapped - bare < 0.001
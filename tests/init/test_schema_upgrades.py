@@ -0,0 +1,77 @@
+import re
+
+import pytest
+from sqlalchemy import create_engine
+
+from database.schema_upgrades import UPGRADES, _apply, upgrade_schema
+from services.auth_service.models import User
+from services.cash_flow_forcast_service.models import CashFlowPredictionDB
+from services.sms_parser_service.models import Account, Bill, Transaction
+
+
+def _declared(model):
+    table = model.__table__
+    names = {index.name for index in table.indexes}
+    names |= {constraint.name for constraint in table.constraints if constraint.name}
+    return table.name, names, set(table.columns.keys())
+
+
+@pytest.mark.unit
+def test_upgrades_match_the_models():
+    declared = {
+        name: (indexes, columns)
+        for name, indexes, columns in map(
+            _declared, [User, CashFlowPredictionDB, Account, Bill, Transaction]
+        )
+    }
+    for table, statement in UPGRADES:
+        indexes, columns = declared[table]
+        created = re.search(r"IF NOT EXISTS (\w+)", statement).group(1)
+        assert created in (columns if "ADD COLUMN" in statement else indexes), statement
+
+
+@pytest.mark.unit
+def test_other_databases_are_left_alone(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'x.db'}")
+    upgrade_schema(engine)
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("SELECT count(*) FROM sqlite_master").scalar() == 0
+
+
+class Connection:
+    """Records statements; the pg_index lookup answers from `invalid`"""
+
+    def __init__(self, invalid):
+        self.invalid = invalid
+        self.statements = []
+
+    def execute(self, statement, params=None):
+        self.statements.append(str(statement))
+        return self
+
+    def scalar(self):
+        return self.invalid
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("invalid", [None, False, True])
+def test_invalid_index_is_dropped_and_rebuilt(invalid):
+    table, statement = UPGRADES[4]
+    conn = Connection(invalid)
+    _apply(conn, statement)
+
+    executed = [sql for sql in conn.statements if "pg_index" not in sql]
+    if invalid:
+        assert executed == [
+            "DROP INDEX CONCURRENTLY IF EXISTS uq_cash_flow_prediction_user_input",
+            statement,
+        ]
+    else:
+        assert executed == [statement]
+
+
+@pytest.mark.unit
+def test_columns_skip_the_index_check():
+    conn = Connection(True)
+    _apply(conn, UPGRADES[0][1])
+    assert conn.statements == [UPGRADES[0][1]]
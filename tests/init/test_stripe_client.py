@@ -0,0 +1,115 @@
+import uuid
+from urllib.parse import parse_qs
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from services.wallet_service.router import router as wallet_router
+from services.wallet_service.stripe_client import (
+    CircuitBreaker,
+    StripeAPIError,
+    StripeClient,
+    StripeUnavailable,
+    StubStripeClient,
+    get_stripe_client,
+)
+
+
+def _client(handler, **kwargs):
+    return StripeClient(
+        api_key="sk_test_fixture",
+        backoff_base=0,
+        transport=httpx.MockTransport(handler),
+        **kwargs,
+    )
+
+
+@pytest.mark.unit
+async def test_retries_transient_errors_with_one_idempotency_key():
+    seen = []
+
+    def handler(request):
+        seen.append(request.headers["Idempotency-Key"])
+        if len(seen) < 3:
+            return httpx.Response(503, json={"error": {"message": "overloaded"}})
+        form = parse_qs(request.content.decode())
+        assert form["line_items[0][price_data][unit_amount]"] == ["2500"]
+        return httpx.Response(200, json={"id": "cs_test_1", "url": "https://stripe.test/cs_test_1"})
+
+    client = _client(handler, max_retries=2)
+    session = await client.create_checkout_session(
+        mode="payment", line_items=[{"price_data": {"unit_amount": 2500}, "quantity": 1}]
+    )
+    await client.aclose()
+
+    assert session["url"] == "https://stripe.test/cs_test_1"
+    assert len(seen) == 3
+    assert len(set(seen)) == 1
+
+
+@pytest.mark.unit
+async def test_client_errors_are_not_retried():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(400, json={"error": {"message": "Invalid currency"}})
+
+    client = _client(handler)
+    with pytest.raises(StripeAPIError) as excinfo:
+        await client.create_checkout_session(mode="payment")
+    await client.aclose()
+
+    assert excinfo.value.status_code == 400
+    assert len(calls) == 1
+
+
+@pytest.mark.unit
+async def test_circuit_opens_and_fails_fast():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        raise httpx.ConnectTimeout("timed out", request=request)
+
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    client = _client(handler, max_retries=0, breaker=breaker)
+    for _ in range(2):
+        with pytest.raises(StripeUnavailable):
+            await client.create_checkout_session(mode="payment")
+    assert breaker.state == "open"
+
+    with pytest.raises(StripeUnavailable):
+        await client.create_checkout_session(mode="payment")
+    await client.aclose()
+    assert len(calls) == 2  # third call never reached the network
+
+
+@pytest.mark.unit
+def test_circuit_half_open_trial_closes_on_success():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.state == "half_open"
+    assert breaker.allow() is True
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+@pytest.mark.unit
+def test_checkout_route_uses_swappable_client(auth_headers):
+    stub = StubStripeClient()
+    app = FastAPI()
+    app.include_router(wallet_router)
+    app.dependency_overrides[get_stripe_client] = lambda: stub
+
+    response = TestClient(app).post(
+        "/api/wallet/create-checkout",
+        params={"amount": 12.5},
+        headers=auth_headers(uuid.uuid4()),
+    )
+
+    assert response.status_code == 200
+    assert response.json()["checkout_url"].startswith("https://checkout.stripe.test/")
+    assert stub.calls[0]["line_items"][0]["price_data"]["unit_amount"] == 1250
@@ -0,0 +1,61 @@
+import json
+import time
+from pathlib import Path
+
+import pytest
+
+from services.wallet_service.webhooks import InvalidWebhook, construct_event, sign_payload
+
+SECRET = "whsec_test_fixture"
+FIXTURE = (
+    Path(__file__).resolve().parent.parent
+    / "fixtures"
+    / "stripe"
+    / "checkout_session_completed.json"
+)
+
+
+@pytest.fixture
+def payload():
+    return FIXTURE.read_bytes()
+
+
+@pytest.mark.unit
+def test_signed_fixture_is_accepted(payload):
+    event = construct_event(payload, sign_payload(payload, SECRET), SECRET)
+    assert event["id"] == "evt_1QfixtureCheckoutCompleted"
+    assert event["data"]["object"]["amount_total"] == 2500
+
+
+@pytest.mark.unit
+def test_tampered_payload_is_rejected(payload):
+    header = sign_payload(payload, SECRET)
+    tampered = payload.replace(b"2500", b"250000")
+    with pytest.raises(InvalidWebhook):
+        construct_event(tampered, header, SECRET)
+
+
+@pytest.mark.unit
+def test_wrong_secret_is_rejected(payload):
+    with pytest.raises(InvalidWebhook):
+        construct_event(payload, sign_payload(payload, "whsec_other"), SECRET)
+
+
+@pytest.mark.unit
+def test_replayed_signature_is_rejected(payload):
+    header = sign_payload(payload, SECRET, timestamp=int(time.time()) - 3600)
+    with pytest.raises(InvalidWebhook):
+        construct_event(payload, header, SECRET)
+
+
+@pytest.mark.unit
+def test_missing_signature_is_rejected(payload):
+    with pytest.raises(InvalidWebhook):
+        construct_event(payload, None, SECRET)
+
+
+@pytest.mark.unit
+def test_unsigned_garbage_is_rejected():
+    body = json.dumps({"hello": "world"}).encode()
+    with pytest.raises(InvalidWebhook):
+        construct_event(body, sign_payload(body, SECRET), SECRET)
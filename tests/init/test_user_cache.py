@@ -0,0 +1,116 @@
+import uuid
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from services.auth_service.models import Base as AuthBase, User
+from services.auth_service.user_cache import BloomFilter, UserCache
+
+
+@pytest.fixture
+def db():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    AuthBase.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+def _add_users(db, count):
+    users = [
+        User(email=f"user{uuid.uuid4().hex}@example.com", password_hash="x") for _ in range(count)
+    ]
+    db.add_all(users)
+    db.commit()
+    return [user.user_id for user in users]
+
+
+def _count_queries(db, fn):
+    statements = []
+    engine = db.get_bind()
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        result = fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    return result, len(statements)
+
+
+@pytest.mark.unit
+def test_bloom_filter_has_no_false_negatives_and_bounded_false_positives():
+    bloom = BloomFilter(10_000, error_rate=0.01)
+    members = [uuid.uuid4() for _ in range(10_000)]
+    for member in members:
+        bloom.add(member)
+
+    assert all(member in bloom for member in members)
+    false_positives = sum(uuid.uuid4() in bloom for _ in range(10_000))
+    assert false_positives < 300  # 1% target, with slack for randomness
+
+
+@pytest.mark.unit
+def test_unknown_ids_never_reach_the_database_once_primed(db):
+    _add_users(db, 20)
+    cache = UserCache()
+    cache.refresh(db)
+
+    results, queries = _count_queries(db, lambda: [cache.get(db, uuid.uuid4()) for _ in range(50)])
+
+    assert results == [None] * 50
+    assert queries == 0
+    assert cache.get(db, "not-a-uuid") is None
+    assert cache.stats()["negative_hits"] == 51
+
+
+@pytest.mark.unit
+def test_known_users_are_served_from_cache_after_first_lookup(db):
+    user_id = _add_users(db, 1)[0]
+    cache = UserCache()
+    cache.refresh(db)
+
+    first, first_queries = _count_queries(db, lambda: cache.get(db, user_id))
+    second, second_queries = _count_queries(db, lambda: cache.get(db, str(user_id)))
+
+    assert first.user_id == second.user_id == str(user_id)
+    assert (first_queries, second_queries) == (1, 0)
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["db_lookups"] == 1 and stats["hit_ratio"] == 0.5
+
+
+@pytest.mark.unit
+def test_lookups_of_known_users_do_not_grow_the_bloom_count(db):
+    user_id = _add_users(db, 1)[0]
+    cache = UserCache(ttl=0)  # every lookup goes back to the database
+    cache.refresh(db)
+
+    for _ in range(5):
+        assert cache.get(db, user_id) is not None
+
+    assert cache.stats()["db_lookups"] == 5
+    assert cache.stats()["bloom"]["count"] == 1
+
+
+@pytest.mark.unit
+def test_registered_and_newly_inserted_users_become_known(db):
+    cache = UserCache()
+    cache.refresh(db)
+
+    registered = User(user_id=uuid.uuid4(), email="new@example.com", password_hash="x")
+    db.add(registered)
+    db.commit()
+    cache.add(registered)
+    assert cache.get(db, registered.user_id) is not None
+
+    # Created by another worker: visible after the next incremental refresh
+    other = _add_users(db, 1)[0]
+    assert cache.get(db, other) is None
+    cache.refresh(db)
+    assert cache.get(db, other) is not None
@@ -0,0 +1,94 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+import pytest
+
+from services.wallet_service.cache import InProcessBalanceCache
+
+
+class FakeLedger:
+    """Stands in for the account row: writes commit, then invalidate (as the service does)"""
+
+    def __init__(self, cache):
+        self.cache = cache
+        self.balance = Decimal("0")
+        self._lock = threading.Lock()
+
+    def read(self):
+        value = self.balance
+        time.sleep(random.uniform(0, 0.002))  # widen the read-then-fill race window
+        return value
+
+    def credit(self, amount):
+        with self._lock:
+            self.balance += amount
+        self.cache.invalidate("user")
+
+
+@pytest.mark.unit
+def test_hit_miss_and_ttl():
+    cache = InProcessBalanceCache(maxsize=10, ttl=0.05)
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return Decimal("12.50")
+
+    assert cache.get_or_load("u1", loader) == Decimal("12.50")
+    assert cache.get_or_load("u1", loader) == Decimal("12.50")
+    assert len(loads) == 1
+
+    time.sleep(0.06)
+    cache.get_or_load("u1", loader)
+    assert len(loads) == 2
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+    assert stats["hit_ratio"] == pytest.approx(1 / 3, abs=1e-4)
+
+
+@pytest.mark.unit
+def test_lru_eviction():
+    cache = InProcessBalanceCache(maxsize=2, ttl=60)
+    for key in ("a", "b", "c"):
+        cache.get_or_load(key, lambda: Decimal("1"))
+    assert cache.get("a") is None
+    assert cache.get("c") == Decimal("1")
+
+
+@pytest.mark.unit
+def test_fill_started_before_invalidation_is_discarded():
+    cache = InProcessBalanceCache()
+    token = cache.fill_token("user")
+    stale = Decimal("10")  # read from the DB before a concurrent write committed
+    cache.invalidate("user")
+    assert cache.fill("user", stale, token) is False
+    assert cache.get("user") is None
+
+
+@pytest.mark.unit
+def test_cache_converges_under_concurrent_writes():
+    cache = InProcessBalanceCache(ttl=60)
+    ledger = FakeLedger(cache)
+
+    def writer(_):
+        for _ in range(200):
+            ledger.credit(Decimal("1"))
+
+    def reader(_):
+        for _ in range(400):
+            cache.get_or_load("user", ledger.read)
+
+    with ThreadPoolExecutor(max_workers=12) as pool:
+        jobs = [pool.submit(writer, i) for i in range(4)]
+        jobs += [pool.submit(reader, i) for i in range(8)]
+        for job in jobs:
+            job.result()
+
+    assert ledger.balance == Decimal("800")
+    # Whatever survived in the cache must be the committed value, not a stale fill
+    assert cache.get_or_load("user", ledger.read) == Decimal("800")
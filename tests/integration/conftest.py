@@ -0,0 +1,55 @@
+import uuid
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from database.database import get_db
+from services.auth_service.models import Base as AuthBase
+from services.wallet_service.models import Account
+
+
+@pytest.fixture
+def db(session_factory):
+    session = session_factory()
+    AuthBase.metadata.create_all(bind=session.get_bind())
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def routers():
+    """Routers mounted by `client`; test modules override this fixture"""
+    return []
+
+
+@pytest.fixture
+def client(db, routers):
+    app = FastAPI()
+    for router in routers:
+        app.include_router(router)
+    app.dependency_overrides[get_db] = lambda: db
+    return TestClient(app)
+
+
+@pytest.fixture
+def wallet_balance():
+    return 0
+
+
+@pytest.fixture
+def account(db, wallet_balance):
+    account = Account(
+        user_id=uuid.uuid4(), account_name="Wallet", account_type="wallet", balance=wallet_balance
+    )
+    db.add(account)
+    db.commit()
+    return account
+
+
+@pytest.fixture
+def wallet(db, account):
+    """(session, account) for the wallet service tests"""
+    return db, account
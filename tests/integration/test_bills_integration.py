@@ -1,21 +1,36 @@
-import uuid
+import pytest
 
-def test_bills_stats(client):
-    account_id = str(uuid.uuid4())
+from services.bill_service.router import router
+
+
+@pytest.fixture
+def routers():
+    return [router]
+
+
+@pytest.mark.integration
+def test_bills_stats(client, account, auth_headers):
+    headers = auth_headers(str(account.user_id))
     bills = [
-        {"account_id": account_id, "merchant": "A", "amount": 100, "status": "pending"},
-        {"account_id": account_id, "merchant": "B", "amount": 50, "status": "paid"},
-        {"account_id": account_id, "merchant": "C", "amount": 30, "status": "overdue"},
+        {"merchant": "A", "amount": 100},
+        {"merchant": "B", "amount": 50},
+        {"merchant": "C", "amount": 30},
     ]
 
+    bill_ids = []
     for bill in bills:
-        client.post("/api/bills", json=bill)
+        payload = {**bill, "account_id": str(account.account_id), "due_date": "2025-03-12T00:00:00"}
+        response = client.post("/api/bills/", json=payload, headers=headers)
+        assert response.status_code == 201
+        bill_ids.append(response.json()["bill_id"])
+    response = client.patch(f"/api/bills/{bill_ids[1]}", json={"status": "paid"}, headers=headers)
+    assert response.status_code == 200
 
-    response = client.get(f"/api/bills/account/{account_id}/stats")
+    response = client.get(f"/api/bills/account/{account.account_id}/stats", headers=headers)
     assert response.status_code == 200
     stats = response.json()
     assert stats["total_bills"] == 3
     assert stats["total_amount"] == 180
-    assert stats["pending_amount"] == 100
-    assert stats["overdue_amount"] == 30
+    assert stats["pending_amount"] == 130
+    assert stats["overdue_amount"] == 0
     assert stats["paid_amount"] == 50
@@ -0,0 +1,138 @@
+import uuid
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from services.cash_flow_forcast_service.inputs import build_inputs, input_window
+from services.cash_flow_forcast_service.models import CashFlowPredictionDB
+from services.cash_flow_forcast_service.router import router
+from services.wallet_service.models import Account, Bill, TransactionMonthlyRollup
+from services.wallet_service.service import add_balance, deduct_balance, pay_bills
+
+
+@pytest.fixture
+def routers():
+    return [router]
+
+
+@pytest.fixture
+def user_id(db):
+    """Two accounts, three months of rollups inside the input window and one outside"""
+    start, end = input_window()
+    user_id = uuid.uuid4()
+    for balance in (4000, 2000):
+        account = Account(
+            user_id=user_id, account_name="Wallet", account_type="wallet", balance=balance
+        )
+        db.add(account)
+        db.flush()
+        for months_back in range(1, 5):
+            index = end.year * 12 + end.month - 1 - months_back
+            db.add(
+                TransactionMonthlyRollup(
+                    account_id=account.account_id,
+                    month=end.replace(year=index // 12, month=index % 12 + 1),
+                    credit_total=1500,
+                    credit_count=1,
+                    debit_total=600,
+                    debit_count=2,
+                )
+            )
+    db.add(
+        Bill(
+            account_id=account.account_id,
+            merchant="Maroc Telecom",
+            amount=300,
+            due_date=datetime(start.year, start.month, 10),
+            is_recurring=True,
+        )
+    )
+    db.commit()
+    return user_id
+
+
+@pytest.mark.integration
+def test_inputs_are_monthly_averages_over_the_window(db, user_id):
+    inputs = build_inputs(db, [user_id, uuid.uuid4()])
+
+    # Two accounts x 1500 credits a month; the fourth month back is outside the window
+    assert inputs["monthly_income_usd"].tolist() == [3000, 0]
+    assert inputs["monthly_expenses_usd"].tolist() == [1200, 0]
+    assert inputs["monthly_emi_usd"].tolist() == [100, 0]
+    assert inputs["savings_usd"].tolist() == [6000, 0]
+
+
+@pytest.mark.integration
+def test_paid_recurring_bill_and_top_ups_are_counted_once(db, account):
+    user_id = account.user_id
+    add_balance(db, user_id, 1000)  # a top-up, not income
+    bill = Bill(
+        account_id=account.account_id,
+        merchant="Lydec",
+        amount=300,
+        due_date=datetime.utcnow(),
+        is_recurring=True,
+    )
+    db.add(bill)
+    db.commit()
+    pay_bills(db, user_id, [bill.bill_id])
+    deduct_balance(db, user_id, 50)
+
+    # One-month window over the current month
+    next_month = (date.today().replace(day=28) + timedelta(days=4)).replace(day=1)
+    inputs = build_inputs(db, [user_id], as_of=next_month, months=1)
+
+    assert inputs["monthly_income_usd"].tolist() == [0]
+    assert inputs["monthly_expenses_usd"].tolist() == [50]
+    assert inputs["monthly_emi_usd"].tolist() == [300]
+
+
+@pytest.mark.integration
+def test_predict_with_only_user_id(client, db, user_id, auth_headers):
+    response = client.post(
+        "/api/cashflow/predict-cashflow",
+        json={"user_id": str(user_id)},
+        headers=auth_headers(user_id),
+    )
+
+    assert response.status_code == 200
+    stored = db.query(CashFlowPredictionDB).filter_by(user_id=user_id).one()
+    assert float(stored.predicted_income) == 3000
+    assert float(stored.predicted_expenses) == 1200
+
+
+@pytest.mark.integration
+def test_given_figures_override_history(client, db, user_id, auth_headers):
+    response = client.post(
+        "/api/cashflow/predict-cashflow/batch",
+        json={"inputs": [{"user_id": str(user_id), "monthly_income_usd": 5000}]},
+        headers=auth_headers(user_id),
+    )
+
+    assert response.status_code == 200
+    stored = db.query(CashFlowPredictionDB).filter_by(user_id=user_id).one()
+    assert float(stored.predicted_income) == 5000
+    assert float(stored.predicted_expenses) == 1200
+
+
+@pytest.mark.integration
+def test_horizon_forecast_from_history(client, user_id, auth_headers):
+    response = client.get(
+        "/api/cashflow/forecast", params={"months": 3}, headers=auth_headers(user_id)
+    )
+
+    assert response.status_code == 200
+    months = response.json()["months"]
+    assert len(months) == 3
+    assert [month["income"] for month in months] == pytest.approx([3000, 3000, 3000])
+    # 6000 on the accounts plus 1800 net a month
+    assert [month["balance"] for month in months] == pytest.approx([7800, 9600, 11400])
+    assert all(month["p_negative"] == 0 for month in months)
+
+
+@pytest.mark.integration
+def test_horizon_forecast_rejects_long_horizons(client, user_id, auth_headers):
+    response = client.get(
+        "/api/cashflow/forecast", params={"months": 13}, headers=auth_headers(user_id)
+    )
+    assert response.status_code == 422
@@ -0,0 +1,40 @@
+import uuid
+from datetime import date
+
+import pytest
+
+from services.ETF_Recommendation import router as etf
+from services.ETF_Recommendation.models import Recommendation
+
+RESULT = {
+    "date": date(2025, 3, 3),
+    "total_amount": 1000.0,
+    "strategy": "safe",
+    "expected_2y_return": 0.1,
+    "allocations": [
+        {"ETF": "ACWI", "forecast_2y": 0.1, "Weight": 1.0, "Amount_EUR": 1000, "reason": "x"}
+    ],
+}
+
+
+@pytest.fixture
+def routers(monkeypatch):
+    monkeypatch.setattr(etf, "get_recommendation", lambda amount: RESULT)
+    return [etf.router]
+
+
+@pytest.mark.integration
+def test_confirm_stores_the_authenticated_user(client, db, auth_headers):
+    user_id, other = str(uuid.uuid4()), str(uuid.uuid4())
+    payload = {"user_id": other, "amount_eur": 1000}
+
+    assert client.post("/api/etf-recommendation/confirm", json=payload).status_code in (401, 403)
+    response = client.post(
+        "/api/etf-recommendation/confirm", json=payload, headers=auth_headers(user_id)
+    )
+    assert response.status_code == 200
+
+    stored = db.query(Recommendation.user_id).filter(Recommendation.user_id.in_([user_id, other]))
+    assert [row.user_id for row in stored] == [user_id]
+    history = f"/api/etf-recommendation/history/{other}"
+    assert client.get(history, headers=auth_headers(user_id)).status_code == 403
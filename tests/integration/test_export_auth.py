@@ -0,0 +1,23 @@
+import uuid
+
+import pytest
+
+from services.export_service.router import router as export_router
+
+
+@pytest.fixture
+def routers():
+    return [export_router]
+
+
+@pytest.mark.integration
+@pytest.mark.parametrize("kind", ["bills", "transactions"])
+def test_export_requires_the_account_owner(client, account, auth_headers, kind):
+    url = f"/api/export/{kind}?account_id={account.account_id}"
+
+    assert client.get(url).status_code in (401, 403)
+    assert client.get(url, headers=auth_headers(str(uuid.uuid4()))).status_code == 404
+
+    response = client.get(url, headers=auth_headers(str(account.user_id)))
+    assert response.status_code == 200
+    assert response.text.splitlines()[0].startswith(f"{kind[:-1]}_id,account_id")
@@ -0,0 +1,116 @@
+import uuid
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import event, select
+
+from services.auth_service.models import User
+from services.cash_flow_forcast_service import batch
+from services.cash_flow_forcast_service.models import CashFlowForecastRun, CashFlowPredictionDB
+from services.wallet_service.models import Account, TransactionMonthlyRollup
+
+
+@pytest.fixture
+def users(db):
+    """Five users with one account and three months of rollups before March 2025"""
+    user_ids = []
+    for i in range(5):
+        user = User(email=f"forecast-{uuid.uuid4().hex}@example.com", password_hash="x")
+        db.add(user)
+        db.flush()
+        account = Account(
+            user_id=user.user_id, account_name="Wallet", account_type="wallet", balance=1000
+        )
+        db.add(account)
+        db.flush()
+        for month in (12, 1, 2):
+            db.add(
+                TransactionMonthlyRollup(
+                    account_id=account.account_id,
+                    month=date(2024 if month == 12 else 2025, month, 1),
+                    credit_total=3000,
+                    credit_count=1,
+                    debit_total=1000 * (i + 1),
+                    debit_count=1,
+                )
+            )
+        user_ids.append(user.user_id)
+    db.commit()
+    return user_ids
+
+
+@pytest.fixture
+def new_run(db):
+    """A fixed run date per test, with any checkpoint left by an earlier session removed"""
+
+    def clear(run_date):
+        db.query(CashFlowForecastRun).filter_by(run_date=run_date).delete()
+        db.commit()
+        return run_date
+
+    return clear
+
+
+def _predictions(db, user_ids):
+    return (
+        db.execute(select(CashFlowPredictionDB).where(CashFlowPredictionDB.user_id.in_(user_ids)))
+        .scalars()
+        .all()
+    )
+
+
+@pytest.mark.integration
+def test_forecast_scores_every_user_in_chunks(db, users, new_run):
+    run_date = new_run(date(2025, 3, 3))
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement.split(None, 1)[0].upper())
+
+    event.listen(db.get_bind(), "before_cursor_execute", record)
+    try:
+        stats = batch.run_forecast(db, run_date=run_date, chunk_size=2)
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", record)
+
+    predictions = {p.user_id: p for p in _predictions(db, users)}
+    assert set(predictions) == set(users)
+    first = predictions[users[0]]
+    assert float(first.predicted_income) == 3000
+    assert float(first.predicted_expenses) == 1000
+    # 3000 - 1000, minus the predictor's low-savings adjustment (balance < 2x expenses)
+    assert float(first.predicted_balance) == 1900
+    # One multi-row INSERT per chunk, not one per user
+    assert statements.count("INSERT") == stats["chunks"] + 1  # + checkpoint row
+
+    run = db.get(CashFlowForecastRun, run_date)
+    assert run.finished_at is not None
+    assert run.users_processed == stats["users"]
+    assert batch.run_forecast(db, run_date=run_date)["skipped"] is True
+
+
+@pytest.mark.integration
+def test_forecast_resumes_after_last_committed_chunk(db, users, new_run, monkeypatch):
+    run_date = new_run(date(2025, 3, 4))
+    predictor = batch.predictor_model.get()
+    predict_batch = predictor.predict_batch
+    calls = []
+
+    def failing_second_chunk(inputs):
+        calls.append(len(inputs["savings_usd"]))
+        if len(calls) == 2:
+            raise RuntimeError("worker killed")
+        return predict_batch(inputs)
+
+    monkeypatch.setattr(predictor, "predict_batch", failing_second_chunk)
+    with pytest.raises(RuntimeError):
+        batch.run_forecast(db, run_date=run_date, chunk_size=2)
+    run = db.get(CashFlowForecastRun, run_date)
+    assert run.users_processed == 2 and run.finished_at is None
+
+    monkeypatch.setattr(predictor, "predict_batch", predict_batch)
+    batch.run_forecast(db, run_date=run_date, chunk_size=2)
+
+    # Each user scored exactly once across the crash and the resumed run
+    predicted = [p.user_id for p in _predictions(db, users)]
+    assert sorted(predicted) == sorted(users)
@@ -0,0 +1,108 @@
+import os
+import queue
+import re
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("gunicorn")
+pytest.importorskip("uvicorn")
+
+ROOT = Path(__file__).resolve().parents[2]
+BOOTED = re.compile(r"Booting worker with pid: (\d+)")
+STARTED = "Application startup complete"
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _memory_kb(pid: int) -> dict:
+    """Rss, Pss and private (unshared) memory of a process, from smaps_rollup"""
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1])
+    return {
+        "rss": fields["Rss"],
+        "pss": fields["Pss"],
+        "private": fields["Private_Clean"] + fields["Private_Dirty"],
+    }
+
+
+def _launch(workers: int, preload: bool, timeout: float = 180) -> dict:
+    """Start the gateway under gunicorn, wait for every worker, measure, then stop it"""
+    env = dict(
+        os.environ,
+        PORT=str(_free_port()),
+        WEB_CONCURRENCY=str(workers),
+        GUNICORN_PRELOAD="1" if preload else "0",
+    )
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "api_gateway.main:app"],
+        cwd=ROOT,
+        env=env,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    lines = queue.Queue()
+    threading.Thread(target=lambda: [lines.put(l) for l in process.stderr], daemon=True).start()
+
+    pids, ready = [], 0
+    try:
+        while ready < workers:
+            line = lines.get(timeout=max(0.0, timeout - (time.perf_counter() - started)))
+            booted = BOOTED.search(line)
+            if booted:
+                pids.append(int(booted.group(1)))
+            elif STARTED in line:
+                ready += 1
+        startup = time.perf_counter() - started
+
+        master = _memory_kb(process.pid)
+        per_worker = [_memory_kb(pid) for pid in pids]
+    finally:
+        process.send_signal(signal.SIGTERM)
+        process.wait(timeout=60)
+
+    return {
+        "startup": startup,
+        "master_rss_mb": master["rss"] / 1024,
+        "worker_private_mb": sum(w["private"] for w in per_worker) / len(per_worker) / 1024,
+        "total_pss_mb": (master["pss"] + sum(w["pss"] for w in per_worker)) / 1024,
+    }
+
+
+@pytest.mark.slow
+@pytest.mark.skipif(not Path("/proc/self/smaps_rollup").exists(), reason="needs Linux /proc")
+def test_worker_memory_benchmark():
+    """Per-worker incremental memory and startup time with and without preloading"""
+    results = {}
+    print()
+    for workers in (1, 4, 8):
+        for preload in (False, True):
+            result = _launch(workers, preload)
+            results[workers, preload] = result
+            print(
+                f"{workers} workers, preload {'on ' if preload else 'off'}: "
+                f"startup {result['startup']:6.2f} s, "
+                f"per worker {result['worker_private_mb']:7.1f} MB private, "
+                f"total {result['total_pss_mb']:7.1f} MB PSS, "
+                f"master {result['master_rss_mb']:7.1f} MB RSS"
+            )
+
+    for workers in (4, 8):
+        shared, separate = results[workers, True], results[workers, False]
+        assert shared["worker_private_mb"] < separate["worker_private_mb"]
+        assert shared["total_pss_mb"] < separate["total_pss_mb"]
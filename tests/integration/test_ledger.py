@@ -0,0 +1,48 @@
+import time
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from services.wallet_service import ledger
+from services.wallet_service.models import BalanceSnapshot, Transaction
+from services.wallet_service.service import add_balance, deduct_balance
+
+
+@pytest.mark.integration
+def test_balance_at_uses_snapshot_plus_tail(wallet):
+    db, account = wallet
+    user_id, account_id = account.user_id, account.account_id
+    for _ in range(5):
+        add_balance(db, user_id, 10)
+    assert ledger.take_snapshot(db, account_id) is not None
+
+    checkpoint = datetime.utcnow()
+    time.sleep(0.01)
+    deduct_balance(db, user_id, 15)
+
+    assert ledger.balance_at(db, account_id, checkpoint) == Decimal("50.00")
+    assert ledger.balance_at(db, account_id, datetime.utcnow()) == Decimal("35.00")
+
+    report = ledger.reconcile(db, account_id)
+    assert report["consistent"] is True
+    assert report["tail_rows"] == 1
+
+
+@pytest.mark.integration
+def test_verifier_flags_rewritten_history(wallet):
+    db, account = wallet
+    user_id, account_id = account.user_id, account.account_id
+    for _ in range(3):
+        add_balance(db, user_id, 20)
+    ledger.take_snapshot(db, account_id)
+
+    # Rewrite one covered ledger row behind the snapshot's back
+    row = db.query(Transaction).filter(Transaction.account_id == account_id).first()
+    row.amount = Decimal("1.00")
+    db.commit()
+
+    assert ledger.verify_snapshots(db) >= 1
+    snapshot = db.query(BalanceSnapshot).filter(BalanceSnapshot.account_id == account_id).one()
+    assert snapshot.verified_at is not None
+    assert snapshot.is_consistent is False
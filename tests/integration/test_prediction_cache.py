@@ -0,0 +1,103 @@
+import uuid
+
+import pytest
+from sqlalchemy import event
+
+from services.cash_flow_forcast_service.models import CashFlowPredictionDB
+from services.cash_flow_forcast_service.router import predictor_model, router
+
+
+@pytest.fixture
+def routers():
+    return [router]
+
+
+def _payload(user_id, **overrides):
+    payload = {
+        "user_id": str(user_id),
+        "monthly_income_usd": 4000,
+        "monthly_expenses_usd": 1500,
+        "monthly_emi_usd": 300,
+        "savings_usd": 12000,
+    }
+    payload.update(overrides)
+    return payload
+
+
+@pytest.mark.integration
+def test_repeated_inputs_reuse_the_stored_prediction(client, db, auth_headers):
+    user_id = uuid.uuid4()
+    headers = auth_headers(user_id)
+
+    first = client.post("/api/cashflow/predict-cashflow", json=_payload(user_id), headers=headers)
+    assert first.status_code == 200
+
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement.split(None, 1)[0].upper())
+
+    event.listen(db.get_bind(), "before_cursor_execute", record)
+    try:
+        again = client.post(
+            "/api/cashflow/predict-cashflow", json=_payload(user_id), headers=headers
+        )
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", record)
+
+    assert again.status_code == 200
+    # The stored row holds 2 decimals
+    hit, miss = again.json(), first.json()
+    for field in ("net_cashflow", "confidence"):
+        assert hit.pop(field) == pytest.approx(miss.pop(field), abs=0.005)
+    assert hit == miss
+    # A hit is one UPDATE ... RETURNING that bumps last_seen_at, no INSERT
+    assert statements == ["UPDATE"]
+
+    rows = db.query(CashFlowPredictionDB).filter_by(user_id=user_id).all()
+    assert len(rows) == 1
+    assert rows[0].last_seen_at > rows[0].prediction_date
+
+
+@pytest.mark.integration
+def test_new_prediction_is_returned_unrounded(client, auth_headers, monkeypatch):
+    user_id = uuid.uuid4()
+    model = predictor_model.current().model
+    prediction = {
+        "net_cashflow": 2200.123456,
+        "cashflow_risk": 0,
+        "risk_level": "Low",
+        "risk_probability": 0.000009,
+    }
+    monkeypatch.setattr(model, "predict", lambda figures: prediction)
+
+    response = client.post(
+        "/api/cashflow/predict-cashflow", json=_payload(user_id), headers=auth_headers(user_id)
+    )
+
+    assert response.status_code == 200
+    assert response.json()["confidence"] == 0.000009
+    assert response.json()["net_cashflow"] == 2200.123456
+
+
+@pytest.mark.integration
+def test_new_inputs_add_history(client, db, auth_headers):
+    user_id = uuid.uuid4()
+    headers = auth_headers(user_id)
+
+    client.post("/api/cashflow/predict-cashflow", json=_payload(user_id), headers=headers)
+    client.post(
+        "/api/cashflow/predict-cashflow",
+        json=_payload(user_id, savings_usd=500),
+        headers=headers,
+    )
+    # Batch scoring the same two scenarios again only touches the stored rows
+    response = client.post(
+        "/api/cashflow/predict-cashflow/batch",
+        json={"inputs": [_payload(user_id), _payload(user_id, savings_usd=500)]},
+        headers=headers,
+    )
+    assert response.status_code == 200
+
+    history = client.get(f"/api/cashflow/user-history/{user_id}", headers=headers).json()
+    assert len(history) == 2
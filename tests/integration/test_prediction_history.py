@@ -0,0 +1,91 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+from services.cash_flow_forcast_service.models import CashFlowPredictionDB
+from services.cash_flow_forcast_service.router import router
+
+
+@pytest.fixture
+def routers():
+    return [router]
+
+
+@pytest.fixture
+def user_id(db):
+    """Two predictions a day over three weeks from Monday 2025-01-06"""
+    user_id = uuid.uuid4()
+    start = datetime(2025, 1, 6, 8)
+    for day in range(21):
+        for hour, balance in ((0, 100 + day), (10, 200 + day)):
+            db.add(
+                CashFlowPredictionDB(
+                    user_id=user_id,
+                    predicted_income=3000,
+                    predicted_expenses=1000,
+                    predicted_balance=balance,
+                    confidence=0.5,
+                    prediction_date=start + timedelta(days=day, hours=hour),
+                )
+            )
+    db.commit()
+    return user_id
+
+
+@pytest.mark.integration
+def test_history_pages_by_cursor(client, user_id, auth_headers):
+    headers = auth_headers(user_id)
+    url = f"/api/cashflow/user-history/{user_id}"
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 16, **({"cursor": cursor} if cursor else {})}
+        page = client.get(url, params=params, headers=headers)
+        seen.extend(page.json())
+        cursor = page.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+
+    assert len(seen) == 42
+    assert len({item["prediction_id"] for item in seen}) == 42
+    assert [item["date"] for item in seen] == sorted((item["date"] for item in seen), reverse=True)
+    assert seen[0]["balance"] == 220.0
+
+
+@pytest.mark.integration
+def test_history_rejects_bad_cursor(client, user_id, auth_headers):
+    response = client.get(
+        f"/api/cashflow/user-history/{user_id}",
+        params={"cursor": "not-a-cursor"},
+        headers=auth_headers(user_id),
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.integration
+def test_history_buckets_by_week(client, user_id, auth_headers):
+    headers = auth_headers(user_id)
+    url = f"/api/cashflow/user-history/{user_id}"
+
+    first = client.get(url, params={"bucket": "week", "limit": 2}, headers=headers)
+    assert [item["count"] for item in first.json()] == [14, 14]
+    latest = first.json()[0]
+    assert latest["period"].startswith("2025-01-20")
+    assert latest["balance_last"] == 220.0
+    assert latest["balance_min"] == 114.0
+    assert latest["balance_max"] == 220.0
+
+    rest = client.get(
+        url, params={"bucket": "week", "cursor": first.headers["X-Next-Cursor"]}, headers=headers
+    )
+    assert [item["period"][:10] for item in rest.json()] == ["2025-01-06"]
+    assert "X-Next-Cursor" not in rest.headers
+
+
+@pytest.mark.integration
+def test_history_without_paging_params_is_the_full_list(client, user_id, auth_headers):
+    response = client.get(f"/api/cashflow/user-history/{user_id}", headers=auth_headers(user_id))
+
+    assert len(response.json()) == 42
+    assert "X-Next-Cursor" not in response.headers
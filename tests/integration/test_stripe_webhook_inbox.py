@@ -0,0 +1,87 @@
+import json
+import uuid
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from database.database import get_db
+from services.wallet_service import router as wallet_router
+from services.wallet_service.models import Account, StripeEvent
+from services.wallet_service.webhooks import process_pending_events, sign_payload
+
+SECRET = "whsec_test_fixture"
+FIXTURE = (
+    Path(__file__).resolve().parent.parent
+    / "fixtures"
+    / "stripe"
+    / "checkout_session_completed.json"
+)
+
+
+@pytest.fixture
+def webhook_client(session_factory, monkeypatch):
+    monkeypatch.setattr(wallet_router, "STRIPE_WEBHOOK_SECRET", SECRET)
+    app = FastAPI()
+    app.include_router(wallet_router.router)
+
+    def override_get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    return TestClient(app)
+
+
+def _delivery(user_id):
+    event = json.loads(FIXTURE.read_text())
+    event["id"] = f"evt_{uuid.uuid4().hex}"
+    event["data"]["object"]["metadata"]["user_id"] = str(user_id)
+    payload = json.dumps(event).encode()
+    return event["id"], payload, {"stripe-signature": sign_payload(payload, SECRET)}
+
+
+@pytest.mark.integration
+def test_retried_delivery_credits_once(webhook_client, session_factory):
+    user_id = uuid.uuid4()
+    event_id, payload, headers = _delivery(user_id)
+
+    for _ in range(3):  # Stripe retry storm
+        response = webhook_client.post("/api/wallet/webhook", content=payload, headers=headers)
+        assert response.status_code == 200
+
+    db = session_factory()
+    try:
+        assert db.query(StripeEvent).filter(StripeEvent.event_id == event_id).count() == 1
+        # Acknowledged but not applied yet
+        assert db.query(Account).filter(Account.user_id == user_id).count() == 0
+
+        while process_pending_events(db):
+            pass
+
+        account = db.query(Account).filter(Account.user_id == user_id).one()
+        assert account.balance == Decimal("25.00")
+        event = db.query(StripeEvent).filter(StripeEvent.event_id == event_id).one()
+        assert event.processed_at is not None
+    finally:
+        db.close()
+
+
+@pytest.mark.integration
+def test_bad_signature_is_not_stored(webhook_client, session_factory):
+    event_id, payload, _ = _delivery(uuid.uuid4())
+    response = webhook_client.post(
+        "/api/wallet/webhook", content=payload, headers={"stripe-signature": "t=1,v1=deadbeef"}
+    )
+    assert response.status_code == 400
+
+    db = session_factory()
+    try:
+        assert db.query(StripeEvent).filter(StripeEvent.event_id == event_id).count() == 0
+    finally:
+        db.close()
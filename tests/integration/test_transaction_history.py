@@ -0,0 +1,77 @@
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+from services.wallet_service.history import list_transactions, monthly_totals
+from services.wallet_service.models import Transaction
+from services.wallet_service.rollups import add_to_rollups, rebuild_rollups
+from services.wallet_service.service import add_balance, deduct_balance
+from shared.cursors import InvalidCursor
+
+
+def _seed(db, account, count, start=datetime(2025, 1, 1)):
+    rows = [
+        Transaction(
+            account_id=account.account_id,
+            amount=Decimal(i + 1),
+            type="credit" if i % 2 == 0 else "debit",
+            transaction_date=start + timedelta(days=i),
+            source="sms",
+            category="Food" if i % 3 == 0 else "Transport",
+        )
+        for i in range(count)
+    ]
+    db.add_all(rows)
+    db.flush()
+    add_to_rollups(
+        db, [(row.account_id, row.transaction_date, row.type, row.amount) for row in rows]
+    )
+    db.commit()
+    return rows
+
+
+@pytest.mark.integration
+def test_keyset_pages_cover_history_once(wallet):
+    db, account = wallet
+    rows = _seed(db, account, 95)
+
+    seen, cursor = [], None
+    while True:
+        page = list_transactions(db, account.user_id, limit=20, cursor=cursor)
+        seen.extend(tx.transaction_id for tx in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    newest_first = sorted(rows, key=lambda r: (r.transaction_date, r.transaction_id), reverse=True)
+    assert seen == [row.transaction_id for row in newest_first]
+
+
+@pytest.mark.integration
+def test_filters_and_bad_cursor(wallet):
+    db, account = wallet
+    _seed(db, account, 30)
+
+    page = list_transactions(db, account.user_id, limit=100, tx_type="debit", category="Food")
+    assert page["items"]
+    assert all(tx.type == "debit" and tx.category == "Food" for tx in page["items"])
+    assert list_transactions(db, account.user_id, source="wallet")["items"] == []
+
+    with pytest.raises(InvalidCursor):
+        list_transactions(db, account.user_id, cursor="not-a-cursor")
+
+
+@pytest.mark.integration
+def test_rollups_track_wallet_writes_and_match_rebuild(wallet):
+    db, account = wallet
+    _seed(db, account, 40)
+    add_balance(db, account.user_id, Decimal("100"))
+    deduct_balance(db, account.user_id, Decimal("30"))
+
+    incremental = monthly_totals(db, account.user_id)
+    rebuild_rollups(db, account.account_id)
+    assert monthly_totals(db, account.user_id) == incremental
+
+    current = date.today().replace(day=1)
+    assert monthly_totals(db, account.user_id, since=current)[0]["month"] == current
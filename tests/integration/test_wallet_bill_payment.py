@@ -0,0 +1,104 @@
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import event
+
+from services.wallet_service.models import Account, Bill, Transaction
+from services.wallet_service.service import (
+    BillPaymentError,
+    InsufficientBalance,
+    pay_bills,
+)
+
+
+@pytest.fixture
+def wallet_balance():
+    return 1000
+
+
+def _bills(db, account, count, amount=10):
+    bills = [
+        Bill(
+            account_id=account.account_id,
+            merchant=f"Merchant {i}",
+            amount=amount,
+            due_date=datetime(2025, 3, 12),
+        )
+        for i in range(count)
+    ]
+    db.add_all(bills)
+    db.commit()
+    return [bill.bill_id for bill in bills]
+
+
+def _count_statements(db, fn):
+    statements = []
+    engine = db.get_bind()
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    return len(statements)
+
+
+@pytest.mark.integration
+def test_pay_several_bills_atomically(wallet):
+    db, account = wallet
+    bill_ids = _bills(db, account, 3, amount=25)
+
+    result = pay_bills(db, account.user_id, bill_ids)
+
+    assert result["total_paid"] == Decimal("75.00")
+    assert result["balance"] == Decimal("925.00")
+    db.expire_all()
+    for payment in result["payments"]:
+        bill = db.query(Bill).filter(Bill.bill_id == payment["bill_id"]).one()
+        assert bill.status == "paid"
+        assert bill.transaction_id == payment["transaction_id"]
+        tx = db.query(Transaction).filter(Transaction.transaction_id == bill.transaction_id).one()
+        assert tx.type == "debit"
+        assert tx.amount == Decimal("25.00")
+
+
+@pytest.mark.integration
+def test_insufficient_total_changes_nothing(wallet):
+    db, account = wallet
+    bill_ids = _bills(db, account, 3, amount=400)
+
+    with pytest.raises(InsufficientBalance):
+        pay_bills(db, account.user_id, bill_ids)
+
+    db.expire_all()
+    assert db.query(Account).filter(Account.account_id == account.account_id).one().balance == 1000
+    assert all(
+        bill.status == "pending" for bill in db.query(Bill).filter(Bill.bill_id.in_(bill_ids))
+    )
+
+
+@pytest.mark.integration
+def test_already_paid_bill_rejects_whole_batch(wallet):
+    db, account = wallet
+    bill_ids = _bills(db, account, 2)
+    pay_bills(db, account.user_id, bill_ids[:1])
+
+    with pytest.raises(BillPaymentError):
+        pay_bills(db, account.user_id, bill_ids)
+
+    db.expire_all()
+    assert db.query(Bill).filter(Bill.bill_id == bill_ids[1]).one().status == "pending"
+
+
+@pytest.mark.integration
+def test_round_trips_do_not_grow_with_bill_count(wallet):
+    db, account = wallet
+    few = _bills(db, account, 2, amount=1)
+    many = _bills(db, account, 40, amount=1)
+
+    user_id = account.user_id
+    few_statements = _count_statements(db, lambda: pay_bills(db, user_id, few))
+    many_statements = _count_statements(db, lambda: pay_bills(db, user_id, many))
+
+    assert many_statements == few_statements
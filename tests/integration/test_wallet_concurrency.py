@@ -0,0 +1,95 @@
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+import pytest
+
+from services.wallet_service.models import Account, Transaction
+from services.wallet_service.service import InsufficientBalance, add_balance, deduct_balance
+
+THREADS = 16
+OPS_PER_THREAD = 50
+
+
+def _create_account(session_factory, balance):
+    db = session_factory()
+    try:
+        account = Account(
+            user_id=uuid.uuid4(), account_name="Wallet", account_type="wallet", balance=balance
+        )
+        db.add(account)
+        db.commit()
+        return account.user_id, account.account_id
+    finally:
+        db.close()
+
+
+def _hammer(session_factory, user_id, worker):
+    """Alternate top-ups of 2.00 and payments of 1.00 on the same account"""
+    db = session_factory()
+    try:
+        for op in range(OPS_PER_THREAD):
+            if (worker + op) % 2 == 0:
+                add_balance(db, user_id, 2.00)
+            else:
+                deduct_balance(db, user_id, 1.00)
+    finally:
+        db.close()
+
+
+@pytest.mark.integration
+@pytest.mark.slow
+def test_concurrent_topups_and_payments_keep_exact_balance(session_factory):
+    user_id, account_id = _create_account(session_factory, Decimal("1000.00"))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=THREADS) as pool:
+        list(pool.map(lambda w: _hammer(session_factory, user_id, w), range(THREADS)))
+    elapsed = time.perf_counter() - started
+
+    total_ops = THREADS * OPS_PER_THREAD
+    credits = sum(1 for w in range(THREADS) for op in range(OPS_PER_THREAD) if (w + op) % 2 == 0)
+    debits = total_ops - credits
+    print(
+        f"\n{total_ops} balance updates on one account in {elapsed:.2f}s "
+        f"({total_ops / elapsed:.0f} ops/s, {THREADS} threads)"
+    )
+
+    db = session_factory()
+    try:
+        account = db.query(Account).filter(Account.account_id == account_id).one()
+        assert account.balance == Decimal("1000.00") + Decimal(credits * 2 - debits)
+        assert (
+            db.query(Transaction).filter(Transaction.account_id == account_id).count() == total_ops
+        )
+    finally:
+        db.close()
+
+
+@pytest.mark.integration
+@pytest.mark.slow
+def test_concurrent_payments_never_overdraw(session_factory):
+    user_id, account_id = _create_account(session_factory, Decimal("10.00"))
+
+    def pay(_):
+        db = session_factory()
+        try:
+            deduct_balance(db, user_id, 1.00)
+            return True
+        except InsufficientBalance:
+            return False
+        finally:
+            db.close()
+
+    with ThreadPoolExecutor(max_workers=THREADS) as pool:
+        results = list(pool.map(pay, range(THREADS * 4)))
+
+    assert results.count(True) == 10
+
+    db = session_factory()
+    try:
+        account = db.query(Account).filter(Account.account_id == account_id).one()
+        assert account.balance == Decimal("0.00")
+    finally:
+        db.close()
@@ -0,0 +1,107 @@
+import uuid
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event
+
+from database.database import save_prediction
+from services.auth_service.router import router as auth_router
+from services.bill_service.router import router as bill_router
+from services.sms_parser_service.db_saver import SMSDatabaseSaver
+from services.wallet_service.service import get_account
+
+
+class StatementCounter:
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+
+    def _record(self, conn, cursor, statement, *args):
+        self.statements.append(statement.split(None, 1)[0].upper())
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._record)
+
+
+@pytest.fixture
+def routers():
+    return [auth_router, bill_router]
+
+
+@pytest.mark.integration
+def test_bill_create_and_update_do_not_read_back(client, db, account, auth_headers):
+    headers = auth_headers(account.user_id)
+    payload = {
+        "merchant": "EDF",
+        "amount": 89.5,
+        "due_date": "2025-03-12T00:00:00",
+        "account_id": str(account.account_id),
+    }
+
+    with StatementCounter(db.get_bind()) as created:
+        response = client.post("/api/bills/", json=payload, headers=headers)
+    assert response.status_code == 201
+    assert response.json()["status"] == "pending"
+    # Ownership check + INSERT ... RETURNING (was: + SELECT refresh)
+    assert created.statements == ["SELECT", "INSERT"]
+
+    bill_id = response.json()["bill_id"]
+    with StatementCounter(db.get_bind()) as updated:
+        response = client.patch(f"/api/bills/{bill_id}", json={"amount": 95}, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["amount"] == 95
+    # Single UPDATE ... RETURNING (was: SELECT, UPDATE, SELECT refresh)
+    assert updated.statements == ["UPDATE"]
+
+
+@pytest.mark.integration
+def test_register_is_one_insert_and_duplicates_hit_the_constraint(client, db):
+    payload = {"email": f"{uuid.uuid4().hex}@example.com", "password": "password123"}
+
+    with StatementCounter(db.get_bind()) as registered:
+        response = client.post("/api/auth/register", json=payload)
+    assert response.status_code == 201
+    assert response.json()["user"]["email"] == payload["email"]
+    assert registered.statements == ["INSERT"]
+
+    with StatementCounter(db.get_bind()) as duplicate:
+        response = client.post("/api/auth/register", json=payload)
+    assert response.status_code == 400
+    assert duplicate.statements == ["INSERT"]
+
+
+@pytest.mark.integration
+def test_service_writes_return_rows_without_refresh(db, account):
+    account_id = account.account_id  # loaded outside the counted blocks
+
+    with StatementCounter(db.get_bind()) as opened:
+        wallet = get_account(db, uuid.uuid4())
+    assert wallet.balance == 0
+    assert opened.statements == ["SELECT", "INSERT"]
+
+    with StatementCounter(db.get_bind()) as predicted:
+        record = save_prediction(
+            db,
+            {
+                "user_id": uuid.uuid4(),
+                "predicted_income": 1000,
+                "predicted_expenses": 800,
+                "predicted_balance": 200,
+                "confidence": 0.5,
+                "timestamp": datetime.utcnow(),
+            },
+        )
+    assert record.prediction_id is not None
+    assert predicted.statements == ["INSERT"]
+
+    parsed = {"provider": "Inwi", "amount": "450.00", "due_date": "12/03/2025"}
+    parsed["raw_text"] = "Votre facture Inwi de 450.00dh payable avant 12/03/2025"
+    with StatementCounter(db.get_bind()) as saved:
+        result = SMSDatabaseSaver(db).save_sms_data(account_id, parsed)
+    assert result["bill"].transaction_id == result["transaction"].transaction_id
+    # Transaction, rollup upsert, bill (was: + 2 SELECT refreshes)
+    assert saved.statements == ["INSERT", "INSERT", "INSERT"]